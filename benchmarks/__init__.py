@@ -0,0 +1 @@
+"""Benchmarks for Eura Pass. Run a module with `python -m benchmarks.<name>` from the project root."""
@@ -0,0 +1,192 @@
+"""Load test of the local API server (server.py): requests per second at many concurrent clients.
+
+A synthetic vault with several users is served on a free port of 127.0.0.1. Every client logs in
+once (one key derivation each), then sends a mix of requests for the given time: full entries
+(GET /passwords/<id>), overview pages (GET /passwords) and, optionally, add + delete pairs.
+Throughput and latency percentiles are printed per request type.
+
+Usage:
+    python -m benchmarks.api_load --clients 50 --duration 10 --workers 8
+    python -m benchmarks.api_load --clients 50 --writes 0.05 --kdf-iterations 480000
+"""
+
+# API
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Services
+from services.database import Database
+from services.password_service import PasswordService, KDF_POLICY_SETTING
+from services.key_derivation import KdfParams, ALGORITHM, MIN_ITERATIONS
+
+# Models
+from models import user_session
+
+# Benchmarks
+from benchmarks.vault_generator import synthetic_entries, create_user, MASTER_PASSWORD
+
+# Server
+import server as api_server
+
+
+def create_vault(path: str, users: int, entries: int, kdf_iterations: int) -> List[str]:
+    """Creates the users with entries each and returns their user names."""
+
+    database = Database(path)
+    database.set_setting(KDF_POLICY_SETTING, KdfParams(ALGORITHM, kdf_iterations).encode()) #Skips the calibration, the login cost is fixed
+    service = PasswordService(database, kdf_workers=1)
+    session = user_session.get_session()
+
+    usernames = []
+    try:
+        for index in range(users):
+            username = f"last{index}"
+            user_id = create_user(database, username, MASTER_PASSWORD)
+            session.login(user_id, MASTER_PASSWORD, username=username)
+            service.save_passwords_many(user_id, synthetic_entries(entries, seed=index + 1), MASTER_PASSWORD)
+            usernames.append(username)
+    finally:
+        session.logout()
+        service.close()
+        database.close()
+    return usernames
+
+
+class Client:
+    def __init__(self, port: int):
+        """One simulated tool: a new connection per request, like the server expects (HTTP/1.0)."""
+
+        self.port = port
+        self.token = None
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, dict]:
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+
+def run_client(port: int, username: str, barrier: threading.Barrier, duration: float, writes: float, seed: int, results: Dict[str, List[float]], errors: Dict[str, int], lock: threading.Lock):
+    """Logs in, waits for all clients, then sends requests until the time is up."""
+
+    rng = random.Random(seed)
+    client = Client(port)
+    timings = defaultdict(list)
+    failed = defaultdict(int)
+
+    def timed(name: str, method: str, path: str, body: Optional[dict] = None, expected: int = 200) -> dict:
+        start = time.perf_counter()
+        try:
+            status, data = client.request(method, path, body)
+        except OSError:
+            status, data = 0, {}
+        timings[name].append((time.perf_counter() - start) * 1000)
+        if status != expected:
+            failed[name] += 1
+        return data
+
+    data = timed("login", "POST", "/login", {"username": username, "master_password": MASTER_PASSWORD})
+    client.token = data.get("token")
+    _, page = client.request("GET", "/passwords?limit=1000") #Entry IDs to request (not measured)
+    ids = [entry["id"] for entry in page.get("entries", [])]
+
+    barrier.wait()
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end and ids:
+        choice = rng.random()
+        if choice < writes:
+            created = timed("add", "POST", "/passwords", {"title": f"Last {seed}", "password": "geheim123"}, expected=201)
+            if "id" in created:
+                timed("delete", "DELETE", f"/passwords/{created['id']}")
+        elif choice < writes + 0.3:
+            timed("overview", "GET", f"/passwords?limit=50&after_id={rng.choice(ids) - 1}")
+        else:
+            timed("get", "GET", f"/passwords/{rng.choice(ids)}")
+
+    with lock:
+        for name, values in timings.items():
+            results[name].extend(values)
+        for name, count in failed.items():
+            errors[name] += count
+
+
+def run(clients: int, users: int, entries: int, duration: float, workers: int, pool_size: Optional[int], writes: float, kdf_iterations: int):
+    """Starts the server, runs the clients and prints requests per second and latencies."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "api.db")
+        usernames = create_vault(path, users, entries, kdf_iterations)
+
+        server = api_server.create_server(path, port=0, workers=workers, pool_size=pool_size)
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        results, errors, lock = defaultdict(list), defaultdict(int), threading.Lock()
+        barrier = threading.Barrier(clients + 1)
+        threads = [
+            threading.Thread(target=run_client, args=(port, usernames[index % users], barrier, duration, writes, index, results, errors, lock))
+            for index in range(clients)
+        ]
+
+        login_start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        barrier.wait() #Every client is logged in
+        login_seconds = time.perf_counter() - login_start
+
+        for thread in threads:
+            thread.join()
+
+        connections = len(server.api.db.connections._connections)
+        server.shutdown()
+        server.server_close()
+        server.api.close()
+        server.api.db.close()
+
+    print(f"{clients} clients, {users} users with {entries} entries, {workers} workers, "
+          f"{connections} database connections, PBKDF2 {kdf_iterations} iterations")
+    print(f"all logins done after {login_seconds:.2f} s ({clients / login_seconds:.1f} logins/s)")
+    print(f"{'request':<10} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    total = 0
+    for name in ("login", "get", "overview", "add", "delete"):
+        timings = sorted(results.get(name, []))
+        if not timings:
+            continue
+        if name != "login":
+            total += len(timings)
+        quantiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+        rate = "" if name == "login" else f"{len(timings) / duration:.1f}"
+        print(f"{name:<10} {len(timings):>7} {rate:>8} {statistics.median(timings):>8.1f} {quantiles[94]:>8.1f} {quantiles[98]:>8.1f} {errors.get(name, 0):>7}")
+
+    print(f"total      {total:>7} {total / duration:>8.1f} req/s after login")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--users", type=int, default=5, help="vault users the clients are spread over")
+    parser.add_argument("--entries", type=int, default=1000, help="entries per user")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of requests after the logins")
+    parser.add_argument("--workers", type=int, default=8, help="request worker threads of the server")
+    parser.add_argument("--pool-size", type=int, help="database connections (default: as many as workers)")
+    parser.add_argument("--writes", type=float, default=0.0, help="share of requests that add and delete an entry")
+    parser.add_argument("--kdf-iterations", type=int, default=MIN_ITERATIONS, help="PBKDF2 iterations of the vault (the login cost)")
+    args = parser.parse_args()
+
+    run(args.clients, args.users, args.entries, args.duration, args.workers, args.pool_size, args.writes, args.kdf_iterations)
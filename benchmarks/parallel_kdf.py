@@ -0,0 +1,50 @@
+"""Measures how the parallel legacy-key derivation scales with the number of worker processes.
+
+Usage:
+    python -m benchmarks.parallel_kdf --salts 64 --workers 1 2 4 8 16
+"""
+
+# API
+import argparse
+import os
+import secrets
+import time
+
+# Services
+from services.key_derivation import ParallelKeyDeriver, ITERATIONS
+
+
+def run(salt_count: int, worker_counts, iterations: int):
+    """Derives salt_count keys once per worker count and prints the wall time and speedup."""
+
+    salts = [secrets.token_bytes(16) for _ in range(salt_count)]
+    baseline = None
+
+    print(f"{salt_count} salts, {iterations} PBKDF2 iterations, {os.cpu_count()} CPU cores")
+    print(f"{'workers':>8} {'wall [s]':>10} {'keys/s':>8} {'speedup':>8}")
+
+    for workers in worker_counts:
+        deriver = ParallelKeyDeriver(max_workers=workers)
+        deriver.derive("benchmark", salts[:1], iterations) #Start the worker processes outside the measurement
+
+        start = time.perf_counter()
+        keys = deriver.derive("benchmark", salts, iterations)
+        elapsed = time.perf_counter() - start
+        deriver.shutdown()
+
+        assert len(keys) == salt_count
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.2f} {salt_count / elapsed:>8.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--salts", type=int, default=32, help="number of legacy rows (distinct salts)")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers, help="worker counts to compare")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS, help="PBKDF2 iterations per key")
+    args = parser.parse_args()
+
+    run(args.salts, args.workers, args.iterations)
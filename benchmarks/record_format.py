@@ -0,0 +1,98 @@
+"""Compares the storage size and decryption time of record format v3 with the per-field format v2.
+
+The same synthetic entries are written once per format into separate vaults; the file sizes,
+the encrypted bytes per entry and the time to decrypt full entries and overview rows are printed.
+
+Usage:
+    python -m benchmarks.record_format --entries 10000
+"""
+
+# API
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict
+
+# Services
+from services.database import Database
+from services.password_service import PasswordService, VAULT_VERSION, RECORD_VERSION
+
+# Models
+from models import user_session
+
+# Benchmarks
+from benchmarks.vault_generator import synthetic_entries, create_user, MASTER_PASSWORD, USERNAME, DOMAINS
+
+
+def write_vault(path: str, entries: int, version: int, long_notes: int) -> Dict[str, float]:
+    """Writes the entries in the given format and measures size and decryption time."""
+
+    database = Database(path)
+    service = PasswordService(database, kdf_workers=1, entry_cache_size=0)
+    session = user_session.get_session()
+
+    try:
+        user_id = create_user(database)
+        session.login(user_id, MASTER_PASSWORD, username=USERNAME)
+        vault = service.unlock_vault(user_id, MASTER_PASSWORD)
+        encrypt = service.encrypt_record if version == RECORD_VERSION else service.encrypt_fields
+
+        rows = []
+        for index, entry in enumerate(synthetic_entries(entries)):
+            if index < long_notes: #Some entries with long notes (stored uncompressed in the secret token)
+                entry["notes"] = f"Wiederherstellungscodes und Hinweise für {DOMAINS[index % len(DOMAINS)]}. " * 30
+            rows.append(encrypt(vault, *(entry[field] for field in ("title", "username", "password", "two_fa_key", "website", "notes"))) + (b"", version))
+        database.save_passwords_many(user_id, rows)
+
+        with database.connections.connection() as conn:
+            encrypted_bytes = conn.execute(
+                "SELECT SUM(LENGTH(title) + LENGTH(username) + LENGTH(password) + LENGTH(two_fa_key) + LENGTH(website) + LENGTH(notes)) FROM passwords"
+            ).fetchone()[0]
+            conn.execute("VACUUM")
+
+        start = time.perf_counter()
+        decrypted = service.load_passwords(user_id, MASTER_PASSWORD)
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        overview = service.get_password_overview(user_id, MASTER_PASSWORD)
+        overview_seconds = time.perf_counter() - start
+
+        assert len(decrypted) == len(overview) == entries
+    finally:
+        service.close()
+        database.close()
+        session.logout()
+
+    return {
+        "file_kib": os.path.getsize(path) / 1024,
+        "bytes_per_entry": encrypted_bytes / entries,
+        "decrypt_us_per_entry": full_seconds / entries * 1e6,
+        "overview_us_per_entry": overview_seconds / entries * 1e6,
+    }
+
+
+def run(entries: int, long_notes: int):
+    """Prints the results of both formats side by side."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "v2": write_vault(os.path.join(directory, "v2.db"), entries, VAULT_VERSION, long_notes),
+            "v3": write_vault(os.path.join(directory, "v3.db"), entries, RECORD_VERSION, long_notes),
+        }
+
+    print(f"{entries} entries ({long_notes} with long notes)")
+    print(f"{'':<24} {'v2':>10} {'v3':>10} {'change':>8}")
+    for name in results["v2"]:
+        before, after = results["v2"][name], results["v3"][name]
+        print(f"{name:<24} {before:>10.1f} {after:>10.1f} {(after - before) / before * 100:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000, help="number of entries per vault")
+    parser.add_argument("--long-notes", type=int, default=100, help="entries with about 2 KB of notes")
+    args = parser.parse_args()
+
+    run(args.entries, args.long_notes)
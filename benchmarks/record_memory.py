@@ -0,0 +1,73 @@
+"""Compares the memory per decrypted entry of plain dicts/tuples with the slotted record types.
+
+Usage:
+    python -m benchmarks.record_memory --entries 100000
+"""
+
+# API
+import argparse
+import gc
+import tracemalloc
+
+# Models
+from models.password_entry import PasswordEntry, OverviewRow
+
+
+def make_fields(entry_count: int):
+    """Returns realistic field strings per entry (built before measuring, so both layouts share them)."""
+
+    return [
+        (
+            password_id,
+            f"Konto {password_id}",
+            f"user{password_id}@example.com",
+            f"pw-{password_id:08d}-secret",
+            "",
+            f"https://site{password_id}.example.org",
+            "Notiz" if password_id % 4 == 0 else "",
+        )
+        for password_id in range(1, entry_count + 1)
+    ]
+
+
+def measure(build) -> int:
+    """Returns the bytes allocated (and still alive) by build()."""
+
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def run(entry_count: int):
+    """Prints the bytes per entry of every record layout, strings excluded (they are identical for all layouts)."""
+
+    fields = make_fields(entry_count)
+    names = ("id", "title", "username", "password", "two_fa_key", "website", "notes")
+
+    layouts = {
+        "entry as dict (before)": lambda: [dict(zip(names, row)) for row in fields],
+        "PasswordEntry (after)": lambda: [PasswordEntry(*row) for row in fields],
+        "overview as tuple (before)": lambda: [(row[0], row[1], row[2], row[5]) for row in fields],
+        "OverviewRow (after)": lambda: [OverviewRow(row[0], row[1], row[2], row[5]) for row in fields],
+    }
+
+    print(f"{entry_count} entries, container overhead without the field strings")
+    print(f"{'layout':<28} {'total [MB]':>11} {'bytes/entry':>12}")
+    for name, build in layouts.items():
+        size = measure(build)
+        print(f"{name:<28} {size / 1e6:>11.1f} {size / entry_count:>12.1f}")
+
+    string_bytes = measure(lambda: make_fields(entry_count))
+    print(f"{'field strings (for scale)':<28} {string_bytes / 1e6:>11.1f} {string_bytes / entry_count:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000, help="number of decrypted entries")
+    args = parser.parse_args()
+
+    run(args.entries)
@@ -0,0 +1,241 @@
+"""Benchmark suite: times the hot paths of Eura Pass on synthetic vaults of several sizes.
+
+Every vault is generated in the real storage format (see benchmarks/vault_generator.py).
+Results are printed and can be written as JSON; two result files can be compared to spot
+regressions between versions.
+
+Usage:
+    python -m benchmarks.run --sizes 100 1000 10000 100000 --output results.json
+    python -m benchmarks.run --compare baseline.json results.json --threshold 10
+"""
+
+# API
+import argparse
+import json
+import os
+import platform
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Services
+from services.database import Database
+from services.password_service import PasswordService
+
+# Models
+from models import user_session
+
+# Benchmarks
+from benchmarks.vault_generator import generate_vault, MASTER_PASSWORD, USERNAME
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+
+def timed(function: Callable, repeat: int, setup: Optional[Callable] = None) -> Dict[str, float]:
+    """Runs function repeat times (setup before every run, not timed) and returns the timings in ms."""
+
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "runs": repeat,
+    }
+
+
+def bench_key_derivation(repeat: int) -> List[Dict]:
+    """Times one PBKDF2 key derivation (independent of the vault size)."""
+
+    service = PasswordService(Database(":memory:"), kdf_workers=1)
+    try:
+        stats = timed(lambda: service.generate_key(MASTER_PASSWORD, secrets.token_bytes(16)), repeat)
+    finally:
+        service.close()
+    return [{"name": "generate_key", "entries": 0, **stats}]
+
+
+def bench_vault(size: int, legacy: int, repeat: int, lookups: int, directory: str) -> List[Dict]:
+    """Generates a vault of the given size and times the service operations on it."""
+
+    path = os.path.join(directory, f"vault_{size}.db")
+    database = Database(path)
+    service = PasswordService(database, entry_cache_size=0) #Measure real lookups, not the entry cache
+    session = user_session.get_session()
+    results = []
+
+    def record(name: str, stats: Dict[str, float]):
+        results.append({"name": name, "entries": size, **stats})
+        print(f"  {name:<22} {stats['median_ms']:>10.2f} ms (min {stats['min_ms']:.2f}, {stats['runs']} runs)")
+
+    try:
+        user_id, elapsed = generate_vault(path, size, legacy, password_service=service)
+        elapsed_ms = elapsed * 1000
+        record("generate_vault", {"median_ms": elapsed_ms, "min_ms": elapsed_ms, "max_ms": elapsed_ms, "runs": 1})
+
+        #Cold unlock: the session's key cache is empty, so the data key has to be unwrapped with PBKDF2
+        record("unlock_cold", timed(
+            lambda: service.unlock_vault(user_id, MASTER_PASSWORD), repeat,
+            setup=lambda: session.login(user_id, MASTER_PASSWORD, username=USERNAME)
+        ))
+
+        overview = service.get_password_overview(user_id, MASTER_PASSWORD) #Warms the key cache
+        record("get_password_overview", timed(lambda: service.get_password_overview(user_id, MASTER_PASSWORD), repeat))
+        record("load_passwords", timed(lambda: service.load_passwords(user_id, MASTER_PASSWORD), repeat))
+
+        ids = [row.id for row in overview]
+        rng = random.Random(size)
+        sample = [rng.choice(ids) for _ in range(lookups)]
+        stats = timed(lambda: [service.load_password(user_id, password_id, MASTER_PASSWORD) for password_id in sample], repeat)
+        record("load_password", {key: value / lookups if key.endswith("_ms") else value for key, value in stats.items()})
+
+        saved = []
+        stats = timed(lambda: saved.append(service.save_password(user_id, "Benchmark", "bench@example.org", "secret", MASTER_PASSWORD, website="example.org")), repeat)
+        record("save_password", stats)
+        record("delete_password", timed(lambda: service.delete_password(saved.pop()), repeat))
+
+        render = bench_overview_render(overview, repeat)
+        if render:
+            record("overview_render", render)
+
+    finally:
+        service.close()
+        database.close()
+        session.logout()
+
+    return results
+
+
+def bench_overview_render(overview, repeat: int) -> Optional[Dict[str, float]]:
+    """Times a full render and a scroll pass of the virtual overview list in a (headless) Tk window.
+
+    Returns None if no display is available.
+    """
+
+    try:
+        import customtkinter as ctk
+        from ui.virtual_list import VirtualList
+        from ui.password_overview_ui import PasswordCard, CARD_HEIGHT
+
+        root = ctk.CTk()
+    except Exception as e: #No display (e.g. a CI container without Xvfb)
+        print(f"  overview_render        skipped ({e.__class__.__name__}: {e})")
+        return None
+
+    try:
+        root.geometry("1080x720")
+        list_view = VirtualList(
+            root,
+            row_height=CARD_HEIGHT,
+            create_row=lambda parent: PasswordCard(parent, lambda password_id: None),
+            render_row=lambda card, index: card.show(overview[index].id, overview[index].title, overview[index].username),
+            width=300,
+        )
+        list_view.pack(fill="y", expand=True, side="left")
+        root.update()
+
+        def render():
+            list_view.set_row_count(len(overview))
+            for step in range(0, min(len(overview), 200)):
+                list_view.scroll_to(step) #One recycled row per step
+            root.update_idletasks()
+
+        return timed(render, repeat)
+    finally:
+        root.destroy()
+
+
+def collect_meta() -> Dict[str, str]:
+    """Returns the environment of the run, so results of different machines are not mixed up."""
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception: #Not a git checkout
+        commit = ""
+
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run(sizes: List[int], legacy: int, repeat: int, lookups: int) -> Dict:
+    """Runs the whole suite and returns the results."""
+
+    results = bench_key_derivation(repeat)
+    print(f"generate_key {results[0]['median_ms']:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            print(f"{size} entries ({legacy} legacy):")
+            results.extend(bench_vault(size, legacy, repeat if size < 100000 else max(1, repeat // 2), lookups, directory))
+
+    return {"meta": collect_meta(), "results": results}
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> bool:
+    """Prints the change of every result against the baseline.
+
+    Returns:
+        bool: True if a median got slower by more than threshold percent.
+    """
+
+    print(f"baseline {baseline['meta'].get('commit') or '?'} -> current {current['meta'].get('commit') or '?'}")
+    print(f"{'benchmark':<22} {'entries':>8} {'baseline':>11} {'current':>11} {'change':>8}")
+
+    before = {(result["name"], result["entries"]): result for result in baseline["results"]}
+    regressed = False
+
+    for result in current["results"]:
+        old = before.get((result["name"], result["entries"]))
+        if old is None or old["median_ms"] <= 0:
+            continue
+
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{result['name']:<22} {result['entries']:>8} {old['median_ms']:>9.2f}ms {result['median_ms']:>9.2f}ms {change:>+7.1f}%{flag}")
+
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="vault sizes to benchmark")
+    parser.add_argument("--legacy", type=int, default=0, help="legacy v1 entries added to every vault (slow to generate)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    parser.add_argument("--lookups", type=int, default=50, help="random detail lookups per run")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=10.0, help="slowdown in percent reported as regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as file:
+            baseline = json.load(file)
+        with open(args.compare[1], encoding="utf-8") as file:
+            current = json.load(file)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    report = run(args.sizes, args.legacy, args.repeat, args.lookups)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
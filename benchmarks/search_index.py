@@ -0,0 +1,92 @@
+"""Measures building and querying the in-memory search index on a synthetic vault.
+
+The target is below 5 ms per query at 100k entries. Measured at 100k entries (20 runs), most
+queries take well under 1 ms, and two words about 1.5 ms. A domain or a two-letter prefix that
+matches a fifth of the vault takes 3-4 ms. A letter next to such a domain ("letter + domain")
+is the one query above the target at about 13 ms: the letter is matched among 20k candidates.
+A lone one- or two-letter prefix is capped (see SHORT_PREFIX_LIMIT in models/search_index.py).
+
+Usage:
+    python -m benchmarks.search_index --entries 100000 --repeat 20
+"""
+
+# API
+import argparse
+import random
+import string
+import time
+
+# Models
+from models.search_index import SearchIndex
+from models.password_entry import OverviewRow
+
+DOMAINS = ("gmail.com", "web.de", "gmx.de", "outlook.com", "example.org")
+
+
+def make_rows(entry_count: int, vocabulary_size: int, seed: int = 1):
+    """Returns overview rows built from a random vocabulary, plus the vocabulary."""
+
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(vocabulary_size)]
+
+    rows = [
+        OverviewRow(
+            password_id,
+            f"{rng.choice(words).title()} {rng.choice(words)}",
+            f"{rng.choice(words)}.{rng.choice(words)}@{rng.choice(DOMAINS)}",
+            f"https://www.{rng.choice(words)}.{rng.choice(('de', 'com', 'org'))}",
+        )
+        for password_id in range(1, entry_count + 1)
+    ]
+    return rows, words
+
+
+def run(entry_count: int, vocabulary_size: int, repeat: int):
+    """Builds the index and prints the average and worst time of typical queries."""
+
+    rows, words = make_rows(entry_count, vocabulary_size)
+    index = SearchIndex()
+
+    start = time.perf_counter()
+    index.add_many(rows)
+    print(f"{entry_count} entries, {vocabulary_size} words: built in {time.perf_counter() - start:.2f} s")
+
+    word = words[0]
+    typo = word[:-1] + ("x" if word[-1] != "x" else "y")
+    queries = {
+        "prefix (1 letter)": word[:1],
+        "prefix (2 letters)": word[:2],
+        "prefix (3 letters)": word[:3],
+        "exact word": word,
+        "substring": word[1:-1] if len(word) > 4 else word,
+        "typo": typo,
+        "two words": f"{word} {DOMAINS[0].split('.')[0]}",
+        "letter + domain": f"{word[:1]} {DOMAINS[0].split('.')[0]}",
+        "domain (matches many)": "gmail",
+        "no match": "qqqqzz",
+    }
+
+    print(f"{'query':<24} {'results':>8} {'avg [ms]':>9} {'max [ms]':>9}")
+    for name, query in queries.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = index.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<24} {len(results):>8} {sum(timings) / repeat:>9.2f} {max(timings):>9.2f}")
+
+    start = time.perf_counter()
+    row = rows[0]
+    index.remove(row.id)
+    index.add(row.id, row.title, row.username, row.website)
+    print(f"incremental update: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000, help="number of vault entries")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="number of distinct words the entries are built from")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per query")
+    args = parser.parse_args()
+
+    run(args.entries, args.vocabulary, args.repeat)
@@ -0,0 +1,100 @@
+"""Generates synthetic vaults in the real on-disk format, for benchmarks and manual testing.
+
+Entries are encrypted by PasswordService exactly as the app stores them: format v3 rows with
+the user's data key and, optionally, legacy v1 rows through encrypt_data (one PBKDF2 run per row,
+so keep their number small).
+
+Usage:
+    python -m benchmarks.vault_generator vault.db --entries 10000 --legacy 20
+"""
+
+# API
+import argparse
+import random
+import string
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+# Services
+from services.database import Database
+from services.auth_service import AuthService
+from services.password_service import PasswordService, LEGACY_VERSION
+
+# Models
+from models import user_session
+
+USERNAME = "benchmark"
+MASTER_PASSWORD = "benchmark-master-password"
+DOMAINS = ("gmail.com", "web.de", "gmx.de", "outlook.com", "example.org")
+
+
+def synthetic_entries(count: int, seed: int = 1) -> Iterator[Dict[str, str]]:
+    """Yields count realistic-looking entries (every fourth with notes, every third with a 2FA key)."""
+
+    rng = random.Random(seed)
+    for index in range(count):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+        yield {
+            "title": f"{name.title()} {index}",
+            "username": f"{name}{rng.randint(1, 999)}@{rng.choice(DOMAINS)}",
+            "password": "".join(rng.choices(string.ascii_letters + string.digits + "!$%&", k=20)),
+            "two_fa_key": "".join(rng.choices(string.ascii_uppercase + "234567", k=32)) if index % 3 == 0 else "",
+            "website": f"https://www.{name}.{rng.choice(('de', 'com', 'org'))}",
+            "notes": f"Notiz zu {name}, angelegt für den Benchmark." if index % 4 == 0 else "",
+        }
+
+
+def create_user(database: Database, username: str = USERNAME, master_password: str = MASTER_PASSWORD) -> int:
+    """Registers the benchmark user (if needed) and returns its ID."""
+
+    auth_service = AuthService(database)
+    auth_service.register_user(f"{username}@example.org", username, master_password) #Fails silently if the user exists
+    user = auth_service.authenticate_user(username, master_password)
+    return user[0]
+
+
+def generate_vault(db_path: str, entries: int, legacy_entries: int = 0, seed: int = 1, password_service: Optional[PasswordService] = None) -> Tuple[int, float]:
+    """Fills the database at db_path with a synthetic vault for the benchmark user.
+
+    Args:
+        entries: Number of format v3 entries (saved with save_passwords_many in one transaction).
+        legacy_entries: Number of additional legacy v1 entries (saved one by one through encrypt_data).
+        password_service (optional): Service (and its database) to use, temporary ones are created and closed otherwise.
+
+    Returns:
+        tuple: The user ID and the seconds it took.
+    """
+
+    start = time.perf_counter()
+    database = password_service.db if password_service else Database(db_path)
+    user_id = create_user(database)
+    user_session.get_session().login(user_id, MASTER_PASSWORD, username=USERNAME)
+
+    service = password_service or PasswordService(database, kdf_workers=1)
+    try:
+        service.save_passwords_many(user_id, synthetic_entries(entries, seed), MASTER_PASSWORD)
+
+        for entry in synthetic_entries(legacy_entries, seed + 1):
+            *fields, salt = service.encrypt_data(
+                entry["title"], entry["username"], entry["password"],
+                entry["two_fa_key"], entry["website"], entry["notes"], MASTER_PASSWORD
+            )
+            database.save_password(user_id, *fields, salt=salt, version=LEGACY_VERSION)
+    finally:
+        if password_service is None:
+            service.close()
+            database.close()
+
+    return user_id, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="database file to create or extend")
+    parser.add_argument("--entries", type=int, default=1000, help="number of format v3 entries")
+    parser.add_argument("--legacy", type=int, default=0, help="number of legacy v1 entries (slow: one PBKDF2 run each)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of the generated data")
+    args = parser.parse_args()
+
+    user_id, elapsed = generate_vault(args.path, args.entries, args.legacy, args.seed)
+    print(f"{args.entries + args.legacy} entries for user '{USERNAME}' (ID {user_id}, master password '{MASTER_PASSWORD}') in {elapsed:.1f} s")
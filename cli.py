@@ -0,0 +1,268 @@
+"""Eura Pass ohne Oberfläche: Zugriff auf den Tresor über die Kommandozeile.
+
+Imports only the services layer (no Tk, no Pillow), so the start costs little more than the
+key derivation of the unlock.
+
+Usage:
+    python cli.py --user NAME unlock
+    python cli.py --user NAME list --json
+    python cli.py --user NAME get 42 --field password
+    python cli.py --user NAME add --title GitHub --username me@example.org --website github.com
+    python cli.py --user NAME delete 42
+    python cli.py --user NAME search git
+    python cli.py --user NAME blind-index on
+    python cli.py --user NAME calibrate --target-ms 500
+
+The master password is read from EURA_MASTER_PASSWORD or prompted for; the user name may also
+be set with EURA_USER.
+"""
+
+#API
+import argparse
+import getpass
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+# Services
+from services.database import Database
+from services.auth_service import AuthService
+from services.password_service import PasswordService
+from services.key_derivation import TARGET_SECONDS
+
+# Models
+from models import user_session
+from models.password_entry import PasswordEntry, OverviewRow
+
+USER_ENV = "EURA_USER"
+MASTER_PASSWORD_ENV = "EURA_MASTER_PASSWORD"
+
+
+class CliError(Exception):
+    """Raised for errors that are reported to the user (exit code 1)."""
+
+
+def print_output(data, as_json: bool, text: str):
+    """Prints data as JSON for scripts or the given text for people."""
+
+    if as_json:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    elif text:
+        print(text)
+
+
+def format_rows(rows: List[OverviewRow]) -> str:
+    """Formats overview rows as a table."""
+
+    lines = [f"{'ID':>6}  {'Titel':<30} {'Benutzername':<30} Website"]
+    for row in rows:
+        lines.append(f"{row.id:>6}  {row.title:<30} {row.username:<30} {row.website}")
+    return "\n".join(lines)
+
+
+def row_to_dict(row: OverviewRow) -> dict:
+    """Returns an overview row as a dict for the JSON output."""
+
+    return {"id": row.id, "title": row.title, "username": row.username, "website": row.website}
+
+
+def read_secret(value: Optional[str], env: Optional[str], prompt: str) -> str:
+    """Returns value, else the environment variable env, else prompts for it without echo."""
+
+    if value:
+        return value
+    if env and os.environ.get(env):
+        return os.environ[env]
+    return getpass.getpass(prompt)
+
+
+class Cli:
+    def __init__(self, database: Database):
+        """Runs the commands on the services layer, one unlock per call."""
+
+        self.db = database
+        self.auth_service = AuthService(database)
+        self.password_service = PasswordService(database) # Searches through the blind index only if the user turned it on
+        self.user_id = None
+        self.master_password = None
+
+    def close(self):
+        """Stops the key derivation workers."""
+
+        self.password_service.close()
+
+    def login(self, username: str, master_password: str):
+        """Authenticates the user and starts the session, so the unlocked keys are cached for this call.
+
+        Raises:
+            CliError: If the user name or master password is wrong.
+        """
+
+        user = self.auth_service.authenticate_user(username, master_password)
+        if not user:
+            raise CliError("Ungültiger Benutzername/E-Mail oder Passwort.")
+
+        user_id, email, username_db = user
+        user_session.get_session().login(user_id=user_id, master_password=master_password, username=username_db, email=email)
+        self.user_id = user_id
+        self.master_password = master_password
+
+    def unlock(self, args) -> int:
+        start = time.perf_counter()
+        self.password_service.unlock_vault(self.user_id, self.master_password)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        entries = self.db.count_passwords(self.user_id) #COUNT(*), no rows are loaded
+
+        print_output(
+            {"user_id": self.user_id, "entries": entries, "unlock_ms": round(elapsed_ms, 1)},
+            args.json,
+            f"Tresor entsperrt ({entries} Passwörter, {elapsed_ms:.0f} ms)."
+        )
+        return 0
+
+    def list(self, args) -> int:
+        rows = self.password_service.get_password_overview(self.user_id, self.master_password)
+        print_output([row_to_dict(row) for row in rows], args.json, format_rows(rows))
+        return 0
+
+    def get(self, args) -> int:
+        entry = self.password_service.load_password(self.user_id, args.id, self.master_password)
+        if entry is None:
+            raise CliError(f"Kein Passwort mit der ID {args.id} gefunden.")
+
+        if args.field:
+            print_output({args.field: getattr(entry, args.field)}, args.json, getattr(entry, args.field))
+            return 0
+
+        labels = {"id": "ID", "title": "Titel", "username": "Benutzername", "password": "Passwort",
+                  "two_fa_key": "2FA-Schlüssel", "website": "Website", "notes": "Notizen"}
+        print_output(entry.to_dict(), args.json, "\n".join(f"{labels[name]}: {value}" for name, value in entry.to_dict().items()))
+        return 0
+
+    def add(self, args) -> int:
+        password = read_secret(args.password, None, "Passwort des Eintrags: ")
+
+        is_valid, error_msg = self.password_service.validate_password_data(args.title, password)
+        if not is_valid:
+            raise CliError(error_msg)
+
+        password_id = self.password_service.save_password(
+            self.user_id, args.title, args.username, password, self.master_password,
+            two_fa_key=args.two_fa_key, website=args.website, notes=args.notes
+        )
+        print_output({"id": password_id}, args.json, f"Passwort gespeichert (ID {password_id}).")
+        return 0
+
+    def delete(self, args) -> int:
+        if self.db.get_password_by_id(self.user_id, args.id) is None: #Never delete entries of other users
+            raise CliError(f"Kein Passwort mit der ID {args.id} gefunden.")
+
+        self.password_service.delete_password(args.id)
+        print_output({"id": args.id, "deleted": True}, args.json, f"Passwort {args.id} gelöscht.")
+        return 0
+
+    def search(self, args) -> int:
+        rows = self.password_service.search_passwords(self.user_id, self.master_password, args.query)
+        print_output([row_to_dict(row) for row in rows], args.json, format_rows(rows))
+        return 0
+
+    def blind_index(self, args) -> int:
+        if args.state == "status":
+            enabled = self.password_service.is_blind_index_enabled(self.user_id)
+            print_output({"blind_index": enabled}, args.json, "Suchindex ist aktiviert." if enabled else "Suchindex ist deaktiviert.")
+            return 0
+
+        enabled = args.state == "on"
+        indexed = self.password_service.set_blind_index_enabled(self.user_id, self.master_password, enabled)
+        print_output(
+            {"blind_index": enabled, "indexed": indexed},
+            args.json,
+            f"Suchindex aktiviert ({indexed} Einträge indexiert)." if enabled else "Suchindex deaktiviert, alle Tokens gelöscht."
+        )
+        return 0
+
+    def calibrate(self, args) -> int:
+        policy = self.password_service.calibrate_kdf(args.target_ms / 1000)
+        self.password_service.unlock_vault(self.user_id, self.master_password) #Rewraps the data key with the new parameters
+
+        print_output(
+            {"algorithm": policy.algorithm, "iterations": policy.iterations, "target_ms": args.target_ms},
+            args.json,
+            f"KDF kalibriert: {policy.iterations} Iterationen (Ziel {args.target_ms:.0f} ms pro Entsperren)."
+        )
+        return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Returns the argument parser with one sub-command per operation."""
+
+    parser = argparse.ArgumentParser(prog="eura-pass", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="passwords.db", help="Pfad der Datenbank (Standard: passwords.db)")
+    parser.add_argument("--user", default=os.environ.get(USER_ENV), help=f"Benutzername oder E-Mail (oder {USER_ENV})")
+    parser.add_argument("--json", action="store_true", help="Ausgabe als JSON für Skripte")
+
+    # --json is also accepted after the command; SUPPRESS keeps a top-level --json from being reset
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help="Ausgabe als JSON für Skripte")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("unlock", parents=[output], help="Master-Passwort prüfen und Tresor entsperren")
+    commands.add_parser("list", parents=[output], help="Alle Passwörter auflisten (ohne Passwörter)")
+
+    get_parser = commands.add_parser("get", parents=[output], help="Ein Passwort anhand der ID anzeigen")
+    get_parser.add_argument("id", type=int)
+    get_parser.add_argument("--field", choices=PasswordEntry.__slots__, help="Nur dieses Feld ausgeben")
+
+    add_parser = commands.add_parser("add", parents=[output], help="Ein Passwort hinzufügen")
+    add_parser.add_argument("--title", required=True)
+    add_parser.add_argument("--username", default="")
+    add_parser.add_argument("--password", help="Wird abgefragt, wenn nicht angegeben (sicherer)")
+    add_parser.add_argument("--two-fa-key", default="")
+    add_parser.add_argument("--website", default="")
+    add_parser.add_argument("--notes", default="")
+
+    delete_parser = commands.add_parser("delete", parents=[output], help="Ein Passwort anhand der ID löschen")
+    delete_parser.add_argument("id", type=int)
+
+    search_parser = commands.add_parser("search", parents=[output], help="Titel, Benutzernamen und Websites durchsuchen")
+    search_parser.add_argument("query")
+
+    index_parser = commands.add_parser(
+        "blind-index", parents=[output],
+        help="Suchindex ein-/ausschalten (Suche ohne Entschlüsseln, verrät aber gleiche Wörter in der Datenbank)"
+    )
+    index_parser.add_argument("state", choices=("on", "off", "status"))
+
+    calibrate_parser = commands.add_parser("calibrate", parents=[output], help="Schlüsselableitung auf diesen Rechner abstimmen")
+    calibrate_parser.add_argument("--target-ms", type=float, default=TARGET_SECONDS * 1000, help="Angestrebte Dauer des Entsperrens in ms")
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs one command and returns the exit code (0 on success, 1 on errors)."""
+
+    args = build_parser().parse_args(argv)
+    if not args.user:
+        print(f"Fehler: Benutzername fehlt (--user oder {USER_ENV}).", file=sys.stderr)
+        return 1
+
+    database = Database(args.db)
+    cli = Cli(database)
+    try:
+        cli.login(args.user, read_secret(None, MASTER_PASSWORD_ENV, "Master-Passwort: "))
+        return getattr(cli, args.command.replace("-", "_"))(args)
+    except CliError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    finally:
+        user_session.get_session().logout() # Wipes the cached keys
+        cli.close()
+        database.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
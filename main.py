@@ -1,17 +1,20 @@
 #API
+import time
+START = time.perf_counter() # Reference point of the startup profile
+
+import threading
 import customtkinter as ctk
-from PIL import Image
 
 # Services
-from services.database import Database
+# Only what the login window needs is imported here. The database setup, cryptography and the
+# main window modules are loaded in the background while the login window is shown.
 from services.auth_service import AuthService
-from services.password_service import PasswordService
+from services.startup_profile import StartupProfile
+from services import tracing
 
 # UI
 from ui.login_ui import LoginWindow
-from ui.password_overview_ui import PasswordOverviewUI
-from ui.password_details_ui import PasswordDetailsUI
-from ui.add_password_ui import AddPasswordWindow
+from ui.icon_cache import get_icon_cache
 
 # Models
 from models import user_session
@@ -19,50 +22,132 @@ from models import user_session
 # Config
 import config.colors as app
 
+profile = StartupProfile(START)
+profile.mark("main.py imported")
+
 
 class App(ctk.CTk):
     def __init__(self):
         """
-        Initializes the main application window and core components.
+        Initializes the main application window, which stays hidden until the first login.
 
         - Configures window properties (title, size, appearance).
-        - Sets up services:
+        - Starts the background setup of the services (see _load_services):
             - Database connection
             - Authentication service
             - Password management service
+            - CSV import service
+            - Encrypted backup service
+        The UI components are built by build_main_window after the login.
+        """
+        with profile.phase("main window"):
+            super().__init__()
+
+            self.title("Eura Pass") #Set window title
+            self.geometry("1080x720") #Set window size
+            self.minsize(1080, 600) #Set minimum window size
+            ctk.set_appearance_mode("dark") #Set appearance mode
+            self.configure(fg_color=app.background_color) #Set background color
+
+            self.withdraw()
+
+        self.distance_to_search_bar = 50 # Initial the default distance from title elements to search bar
+        self.is_add_sidebar_open = False # State variable for add sidebar visibility
+        self.main_window_built = False
+
+        self.services_ready = threading.Event()
+        self.services_error = None
+        threading.Thread(target=self._load_services, name="startup", daemon=True).start()
+
+    def _load_services(self):
+        """Startup thread: imports and sets up the services and warms the main window modules and icons.
+
+        Runs while the login window is shown; no Tk calls may happen here.
+        """
+        try:
+            with profile.phase("import services"):
+                from services.database import Database
+                from services.password_service import PasswordService # Loads cryptography
+                from services.import_service import ImportService
+                from services.backup_service import BackupService
+                from services.master_password_service import MasterPasswordService
+
+            with profile.phase("database setup"):
+                self.database = Database()
+
+            self.auth_service = AuthService(self.database)
+            self.password_service = PasswordService(self.database)
+            self.import_service = ImportService(self.password_service)
+            self.backup_service = BackupService(self.password_service)
+            self.master_password_service = MasterPasswordService(self.password_service, self.auth_service)
+
+            with profile.phase("import main window modules"):
+                import ui.password_overview_ui, ui.password_details_ui, ui.add_password_ui, ui.background_worker, ui.debug_overlay, ui.change_master_password_ui
+
+            with profile.phase("icons"):
+                get_icon_cache().warm()
+
+        except Exception as e: #Reported when the services are needed
+            self.services_error = e
+        finally:
+            self.services_ready.set()
+
+    def wait_for_services(self):
+        """Waits for the background setup (usually done before the user has typed the password).
+
+        Raises:
+            Exception: The error of the setup, if it failed.
+        """
+        self.services_ready.wait()
+        if self.services_error is not None:
+            raise self.services_error
+
+    def get_auth_service(self) -> AuthService:
+        """Returns the authentication service once the database is set up."""
+        self.wait_for_services()
+        return self.auth_service
+
+    def build_main_window(self):
+        """Builds the UI components of the main window (once, on the first login).
+
+        - Starts the background worker for crypto and database work.
         - Initializes UI components:
             - Title bar and icons
             - Password overview, details, and add windows
         - Configures grid layout for responsive design.
         """
-        super().__init__()
+        if self.main_window_built:
+            return
+        self.wait_for_services()
 
-        self.title("Eura Pass") #Set window title
-        self.geometry("1080x720") #Set window size
-        self.minsize(1080, 600) #Set minimum window size
-        ctk.set_appearance_mode("dark") #Set appearance mode
-        self.configure(fg_color=app.background_color) #Set background color
+        from ui.password_overview_ui import PasswordOverviewUI
+        from ui.password_details_ui import PasswordDetailsUI
+        from ui.add_password_ui import AddPasswordWindow
+        from ui.background_worker import BackgroundWorker
 
-        self.withdraw()
+        with profile.phase("build main window"):
+            self.worker = BackgroundWorker(self) # Keeps PBKDF2 and SQLite off the Tk main loop
 
-        self.database = Database()
-        self.auth_service = AuthService(self.database)
-        self.password_service = PasswordService(self.database)
+            self.grid_rowconfigure(0, weight=0)
+            self.grid_rowconfigure(1, weight=1)
+            self.grid_columnconfigure(0, weight=0)
+            self.grid_columnconfigure(1, weight=1)
 
-        self.grid_rowconfigure(0, weight=0)
-        self.grid_rowconfigure(1, weight=1)
-        self.grid_columnconfigure(0, weight=0)
-        self.grid_columnconfigure(1, weight=1)
+            self._create_title_bar_frame()
+            self._load_icons()
 
-        self._create_title_bar_frame()
-        self._load_icons()
+            self.password_overview_ui = PasswordOverviewUI(self, self.password_service, self.worker)
+            self.password_details_ui = PasswordDetailsUI(self, self.password_service)
+            self.add_window = AddPasswordWindow(self, self.password_service, self.import_service, self.backup_service, self.worker)
 
-        self.password_overview_ui = PasswordOverviewUI(self, self.password_service)
-        self.password_details_ui = PasswordDetailsUI(self, self.password_service)
-        self.add_window = AddPasswordWindow(self, self.password_service)
+            self.create_title_bar()
 
-        self.distance_to_search_bar = 50 # Initial the default distance from title elements to search bar
-        self.is_add_sidebar_open = False # State variable for add sidebar visibility
+            if tracing.is_enabled(): # Latest unlock breakdown, toggled with F12
+                from ui.debug_overlay import DebugOverlay
+                self.debug_overlay = DebugOverlay(self)
+                self.bind("<F12>", lambda event: self.debug_overlay.toggle())
+
+        self.main_window_built = True
 
     def _create_title_bar_frame(self):
         """Creates the title bar frame for the application."""
@@ -76,19 +161,11 @@ class App(ctk.CTk):
         )
 
     def _load_icons(self):
-        """Loads images for various icons used in the application."""
-        self.home_screen_search_bar_icon = ctk.CTkImage( # Magnifying glass icon for the search bar
-            light_image=Image.open("assets/home_screen_search_bar_icon.png"),
-            size=(20, 20)
-        )
-        self.add_button_icon = ctk.CTkImage( # Plus icon for the add password button
-            light_image=Image.open("assets/plus_icon.png"),
-            size=(15, 15)
-        )
-        self.logo_title_icon = ctk.CTkImage( # Logo icon for the title bar
-            light_image=Image.open("assets/logo_title_icon.png"),
-            size=(30, 30)
-        )
+        """Loads images for various icons used in the application (pre-scaled, see IconCache)."""
+        icons = get_icon_cache()
+        self.home_screen_search_bar_icon = icons.get_icon("home_screen_search_bar_icon.png", (20, 20)) # Magnifying glass icon for the search bar
+        self.add_button_icon = icons.get_icon("plus_icon.png", (15, 15)) # Plus icon for the add password button
+        self.logo_title_icon = icons.get_icon("logo_title_icon.png", (30, 30)) # Logo icon for the title bar
 
     def create_title_bar(self):
         """Creates and configures the title bar with logo, title, search bar, and add button."""
@@ -179,6 +256,10 @@ class App(ctk.CTk):
             border_width=0,
         )
         self.password_search_bar.grid(row=0, column=1, padx=(0, 15), pady=0, sticky="ew")
+        self.password_search_bar.bind(
+            "<KeyRelease>",
+            lambda event: self.password_overview_ui.set_search_query(self.password_search_bar.get())
+        ) # Filters the overview while typing
 
     def toggle_add_sidebar(self):
         """Toggles the visibility of the add password sidebar."""
@@ -192,8 +273,10 @@ class App(ctk.CTk):
             self.add_window.place_forget()
             self.password_search_bar.configure(state="normal")
 
-    def show_password_details(self, title: str, username: str):
-        """Displays the details of a selected password."""
+    def show_password_details(self, password_id: int):
+        """Displays the details of a selected password.
+            The entry is decrypted in the background, clicking another card cancels the pending load.
+        """
         session = user_session.get_session()
 
         if not session.is_logged_in():
@@ -202,14 +285,71 @@ class App(ctk.CTk):
         master_password = session.get_master_password()
         user_id = session.get_user_id()
 
-        all_passwords = self.password_service.load_passwords(user_id, master_password)
-
-        selected_password = self.password_service.find_password(
-            all_passwords, title, username
+        self.password_details_ui.show_loading()
+        self.worker.submit(
+            lambda task: self.password_service.load_password(user_id, password_id, master_password),
+            on_done=self._display_loaded_password,
+            key="details",
         )
 
+    def _display_loaded_password(self, selected_password):
+        """Shows a password loaded by show_password_details (or the placeholder if it is gone)."""
         if selected_password:
             self.password_details_ui.display_password_details(selected_password)
+        else:
+            self.password_details_ui.show_placeholder()
+
+    def start_vault_migration(self):
+        """Starts the online migration of legacy entries to vault format v2.
+
+        The migration runs batch by batch in the background, so the vault stays usable meanwhile.
+        """
+        session = user_session.get_session()
+
+        if not session.is_logged_in():
+            return
+
+        user_id = session.get_user_id()
+        master_password = session.get_master_password()
+
+        def migrate(task):
+            while not task.cancelled and self.password_service.migrate_vault_batch(user_id, master_password):
+                pass
+
+        self.worker.submit(
+            migrate,
+            on_error=lambda e: print(f"Fehler bei der Migration des Tresors: {e}"),
+            key="migration",
+        )
+
+    def show_change_master_password(self):
+        """Opens the window to change the master password (only one at a time)."""
+        from ui.change_master_password_ui import ChangeMasterPasswordWindow
+
+        if getattr(self, 'change_master_password_window', None) is not None and self.change_master_password_window.winfo_exists():
+            self.change_master_password_window.focus()
+            return
+        self.change_master_password_window = ChangeMasterPasswordWindow(self, self.master_password_service, self.worker)
+
+    def resume_master_password_change(self):
+        """Resumes an interrupted master password change after the login (with the old master password)."""
+        from ui.change_master_password_ui import ChangeMasterPasswordWindow
+
+        session = user_session.get_session()
+        if not session.is_logged_in() or not self.master_password_service.is_pending(session.get_user_id()):
+            return
+
+        self.change_master_password_window = ChangeMasterPasswordWindow(self, self.master_password_service, self.worker, resume=True)
+
+    def relogin(self):
+        """Logs out and shows the login window again (e.g. after the master password was changed)."""
+        self.worker.cancel("migration")
+        user_session.get_session().logout()
+
+        self.password_overview_ui.load_passwords() # Empties the list
+        self.password_details_ui.show_placeholder()
+        self.withdraw()
+        LoginWindow(self, self.get_auth_service)
 
     def on_resize(self, event):
         """Handles window resize events to adjust layout dynamically."""
@@ -236,13 +376,44 @@ class App(ctk.CTk):
             )
 
     def start(self):
-        self.create_title_bar()
+        """Shows the login window; the main window is built after the login."""
         self.bind("<Configure>", self.on_resize)
 
-        login_window = LoginWindow(self, self.auth_service)
+        with profile.phase("login window"):
+            login_window = LoginWindow(self, self.get_auth_service)
+        login_window.after_idle(lambda: profile.mark("login window shown"))
+
+        if profile.exit_when_ready:
+            self._exit_when_ready()
+
+    def _exit_when_ready(self):
+        """Startup profile mode: builds the main window once the setup is done, then quits."""
+        if not self.services_ready.is_set():
+            self.after(20, self._exit_when_ready)
+            return
+
+        self.build_main_window()
+        self.update_idletasks()
+        profile.mark("main window built")
+        self.quit()
+
+    def shutdown(self):
+        """Stops the background work and closes the database (called on application exit)."""
+        self.services_ready.wait() # The setup may still be running
+
+        if self.main_window_built:
+            self.worker.shutdown() # Cancel running background tasks
+        if self.services_error is None:
+            self.password_service.close() # Stop the key derivation workers
+            self.database.close() # Close the SQLite connections of all threads
 
 
 if __name__ == "__main__":
     app_instance = App()
     app_instance.start()
-    app_instance.mainloop()
\ No newline at end of file
+    try:
+        app_instance.mainloop()
+    finally:
+        app_instance.shutdown()
+        if profile.enabled:
+            print(profile.report())
\ No newline at end of file
@@ -0,0 +1,136 @@
+#API
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
+
+#Models
+from models.password_entry import PasswordEntry
+
+
+class EntryCache:
+    """Bounded, thread-safe LRU cache of decrypted entries, keyed by row ID, with an idle TTL.
+
+    Entries that have not been read for ttl seconds expire. Evicted, expired and cleared
+    entries are wiped, so no reference to the plaintext is kept by the cache
+    (Python strings cannot be overwritten in place).
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 300):
+        """Initializes an empty cache holding at most max_size entries.
+
+        Args:
+            max_size: Maximum number of cached entries.
+            ttl: Seconds an entry may stay unread before it expires (0 disables expiry).
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[int, PasswordEntry, float]]" = OrderedDict() # Row ID -> (user ID, entry, last access)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, password_id: int, user_id: int) -> Optional[PasswordEntry]:
+        """Returns a copy of the cached entry, or None if it is not cached, expired or of another user."""
+
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            cached = self._entries.get(password_id)
+            if cached is None or cached[0] != user_id:
+                self.misses += 1
+                return None
+
+            self._entries[password_id] = (user_id, cached[1], now)
+            self._entries.move_to_end(password_id) #Mark as most recently used
+            self.hits += 1
+            return cached[1].copy() #Callers must not change the cached entry
+
+    def put(self, password_id: int, user_id: int, entry: PasswordEntry):
+        """Stores a copy of a decrypted entry and evicts the least recently used entries if full."""
+
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._wipe(password_id)
+
+            self._entries[password_id] = (user_id, entry.copy(), now)
+            while len(self._entries) > self.max_size:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                evicted.wipe()
+                self.evictions += 1
+
+    def invalidate(self, password_id: int):
+        """Drops the entry of a saved or deleted row."""
+
+        with self._lock:
+            self._wipe(password_id)
+
+    def invalidate_user(self, user_id: int):
+        """Wipes every cached entry of one user (e.g. when one of several sessions ends)."""
+
+        with self._lock:
+            for password_id in [password_id for password_id, cached in self._entries.items() if cached[0] == user_id]:
+                self._wipe(password_id)
+
+    def clear(self):
+        """Wipes every cached entry and resets the counters (called on login and logout)."""
+
+        with self._lock:
+            for _, entry, _ in self._entries.values():
+                entry.wipe()
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the counters, the hit rate and the current number of cached entries."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _wipe(self, password_id: int):
+        """Removes and wipes one entry (caller holds the lock)."""
+
+        cached = self._entries.pop(password_id, None)
+        if cached is not None:
+            cached[1].wipe()
+
+    def _expire(self, now: float):
+        """Wipes the entries that have been idle longer than the TTL (caller holds the lock).
+
+        The LRU order is the access order, so the idle entries are at the front.
+        """
+
+        if self.ttl <= 0:
+            return
+
+        while self._entries:
+            password_id, (_, entry, last_access) = next(iter(self._entries.items()))
+            if now - last_access < self.ttl:
+                break
+            del self._entries[password_id]
+            entry.wipe()
+            self.expirations += 1
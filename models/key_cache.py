@@ -0,0 +1,78 @@
+#API
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict
+
+from cryptography.fernet import Fernet
+
+
+class KeyCache:
+    """Bounded, thread-safe LRU cache of derived Fernet keys, keyed by salt.
+
+    The cache lives inside the user session so every view shares it and a
+    salt is only run through PBKDF2 once per login.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        """Initializes an empty cache holding at most max_size Fernet instances."""
+
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Fernet]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, salt: bytes) -> Optional[Fernet]:
+        """Returns the cached Fernet for the salt, or None if it has not been derived yet."""
+
+        with self._lock:
+            fernet = self._entries.get(salt)
+            if fernet is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(salt) #Mark as most recently used
+            self.hits += 1
+            return fernet
+
+    def contains(self, salt: bytes) -> bool:
+        """Checks if a key for the salt is cached, without touching the counters or the LRU order."""
+
+        with self._lock:
+            return salt in self._entries
+
+    def put(self, salt: bytes, fernet: Fernet):
+        """Stores a Fernet for the salt and evicts the least recently used entries if full."""
+
+        with self._lock:
+            self._entries[salt] = fernet
+            self._entries.move_to_end(salt)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every cached key and resets the counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters and the current number of cached keys."""
+
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,74 @@
+#API
+from typing import Tuple
+
+
+class PasswordEntry:
+    """A decrypted password entry.
+
+    Uses __slots__ instead of a per-instance dict, which is what dominates the memory of
+    large vaults when every entry is a seven-key dict.
+    """
+
+    __slots__ = ("id", "title", "username", "password", "two_fa_key", "website", "notes")
+
+    def __init__(self, id: int, title: str, username: str, password: str, two_fa_key: str = "", website: str = "", notes: str = ""):
+        self.id = id
+        self.title = title
+        self.username = username
+        self.password = password
+        self.two_fa_key = two_fa_key
+        self.website = website
+        self.notes = notes
+
+    def fields(self) -> Tuple[str, str, str, str, str, str]:
+        """Returns the six entry fields in storage order (see ENTRY_FIELDS)."""
+
+        return (self.title, self.username, self.password, self.two_fa_key, self.website, self.notes)
+
+    def to_dict(self) -> dict:
+        """Returns the entry as a dict (e.g. for JSON export)."""
+
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def copy(self) -> "PasswordEntry":
+        """Returns a shallow copy, so cached entries cannot be changed by callers."""
+
+        return PasswordEntry(self.id, *self.fields())
+
+    def wipe(self):
+        """Drops the references to the plaintext fields (strings cannot be overwritten in place)."""
+
+        self.title = self.username = self.password = self.two_fa_key = self.website = self.notes = ""
+
+    def overview(self) -> "OverviewRow":
+        """Returns the overview row of this entry."""
+
+        return OverviewRow(self.id, self.title, self.username, self.website)
+
+    def __eq__(self, other):
+        if not isinstance(other, PasswordEntry):
+            return NotImplemented
+        return self.id == other.id and self.fields() == other.fields()
+
+    def __repr__(self):
+        return f"PasswordEntry(id={self.id!r}, title={self.title!r})" #Never print secrets
+
+
+class OverviewRow:
+    """The decrypted columns shown in the overview and used by the search: ID, title, username and website."""
+
+    __slots__ = ("id", "title", "username", "website")
+
+    def __init__(self, id: int, title: str, username: str, website: str = ""):
+        self.id = id
+        self.title = title
+        self.username = username
+        self.website = website
+
+    def __eq__(self, other):
+        if not isinstance(other, OverviewRow):
+            return NotImplemented
+        return (self.id, self.title, self.username, self.website) == (other.id, other.title, other.username, other.website)
+
+    def __repr__(self):
+        return f"OverviewRow(id={self.id!r}, title={self.title!r}, username={self.username!r})"
@@ -0,0 +1,355 @@
+#API
+import bisect
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+#Models
+from models.password_entry import OverviewRow
+
+# Match kinds, better matches rank first
+EXACT = 0
+PREFIX = 1
+SUBSTRING = 2
+FUZZY = 3
+
+TOKEN_PATTERN = re.compile(r"\w+")
+SHORT_PREFIX_LIMIT = 500 # A prefix of one or two letters stops collecting entries after this many (it matches most of the vault)
+
+
+def normalize(text: str) -> str:
+    """Lower-cases text and strips accents, so "Müller" is found as "muller" and "müller"."""
+
+    if text.isascii():
+        return text.lower() #Fast path, nothing to strip
+
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits normalized text into words (e-mail addresses and URLs are split at their punctuation)."""
+
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def trigrams(token: str) -> Set[str]:
+    """Returns the trigrams of a token padded with spaces, so the first and last letters count as well."""
+
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance of a and b, or limit + 1 as soon as it exceeds limit."""
+
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit: #The distance can only grow from here
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SearchIndex:
+    """Thread-safe in-memory search index over the decrypted titles, usernames and websites.
+
+    Instead of scanning every entry, the index works on the vocabulary: a sorted word list
+    answers prefix queries with bisect, a trigram index over the words answers substring
+    and typo-tolerant queries, and each word maps to the entries containing it. A query
+    therefore only touches the words that can match, independent of the vault size.
+
+    The index lives inside the user session and only ever holds plaintext in memory.
+    """
+
+    def __init__(self, max_typos: int = 2):
+        """Initializes an empty index.
+
+        Args:
+            max_typos: Largest edit distance accepted by fuzzy matching (words up to six
+                letters tolerate one typo, longer words up to max_typos).
+        """
+
+        self.max_typos = max_typos
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {} # Entry ID -> (title words, other words)
+        self._title_postings: Dict[str, Set[int]] = {} # Word -> entries with the word in their title
+        self._other_postings: Dict[str, Set[int]] = {} # Word -> entries with the word in username or website
+        self._words: List[str] = [] # Sorted vocabulary, for prefix queries
+        self._word_trigrams: Dict[str, Set[str]] = {} # Trigram -> words containing it
+
+    def add(self, password_id: int, title: str, username: str = "", website: str = ""):
+        """Adds an entry, or replaces it if the ID is already indexed."""
+
+        with self._lock:
+            self._add(password_id, title, username, website)
+
+    def add_many(self, rows: Iterable[OverviewRow]):
+        """Adds overview rows, e.g. a freshly decrypted overview batch."""
+
+        with self._lock:
+            for row in rows:
+                self._add(row.id, row.title, row.username, row.website)
+
+    def remove(self, password_id: int):
+        """Removes an entry from the index (does nothing if it is not indexed)."""
+
+        with self._lock:
+            self._remove(password_id)
+
+    def clear(self):
+        """Drops every indexed entry (called on login and logout)."""
+
+        with self._lock:
+            self._entries.clear()
+            self._title_postings.clear()
+            self._other_postings.clear()
+            self._words.clear()
+            self._word_trigrams.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, password_id: int) -> bool:
+        return password_id in self._entries
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Returns the IDs of the entries matching every word of the query, best matches first.
+
+        A query word matches an indexed word exactly, as a prefix, as a substring (three letters
+        or more) or within a few typos (four letters or more). Matches in the title rank above
+        matches in the username or website of the same kind; ties keep the order of the IDs.
+
+        Prefixes of one or two letters match most of a large vault, so on their own they only
+        collect the entries of the first matching words (about SHORT_PREFIX_LIMIT, exact matches
+        first). Next to a longer word they filter its matches instead, which finds every entry.
+
+        Args:
+            limit (optional): Maximum number of IDs to return.
+        """
+
+        query_words = tokenize(query)
+        if not query_words:
+            return []
+
+        long_words = [word for word in query_words if len(word) >= 3]
+        short_words = [word for word in query_words if len(word) < 3]
+        if not long_words: #Only short prefixes, each is capped
+            long_words, short_words = short_words, []
+
+        with self._lock:
+            ranked = [self._match_word(word) for word in long_words]
+
+            if len(ranked) == 1 and not short_words:
+                return self._order_tiers(ranked[0], limit)
+
+            #Several words: an entry must match all of them and is ranked by the sum of its best tiers
+            candidates = None
+            for tiers in ranked:
+                matched = set().union(*tiers.values()) if tiers else set()
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    return []
+
+            for word in short_words: #Only looked up among the candidates, never collected from the whole vault
+                tiers = self._match_word(word, within=candidates)
+                candidates = set().union(*tiers.values()) if tiers else set()
+                if not candidates:
+                    return []
+                ranked.append(tiers)
+
+        #Entries grouped by score with set operations, a per-entry score would cost a Python step per match
+        buckets: Dict[int, Set[int]] = {0: candidates}
+        for tiers in ranked:
+            if len(tiers) == 1: #Every candidate matches this word in the same tier, all scores move alike
+                (tier,) = tiers
+                buckets = {score + tier: ids for score, ids in buckets.items()}
+                continue
+
+            best = [] # (tier, IDs whose best match of this word is the tier)
+            seen = set()
+            for tier in sorted(tiers):
+                ids = tiers[tier] & candidates - seen
+                if ids:
+                    seen |= ids
+                    best.append((tier, ids))
+
+            scored: Dict[int, Set[int]] = {}
+            for score, ids in buckets.items():
+                for tier, tier_ids in best:
+                    both = ids & tier_ids
+                    if both:
+                        scored.setdefault(score + tier, set()).update(both)
+            buckets = scored
+
+        return self._order_tiers(buckets, limit)
+
+    def _order_tiers(self, tiers: Dict[int, Set[int]], limit: Optional[int]) -> List[int]:
+        """Flattens tier (or score) -> IDs into one list, best tier first, every ID only once."""
+
+        result = []
+        seen = set()
+        for tier in sorted(tiers):
+            ids = tiers[tier] - seen
+            seen |= ids
+            result.extend(sorted(ids))
+            if limit is not None and len(result) >= limit:
+                return result[:limit]
+        return result
+
+    def _match_word(self, query_word: str, within: Optional[Set[int]] = None) -> Dict[int, Set[int]]:
+        """Returns tier -> IDs of the entries containing a word that matches query_word.
+
+        The tier is match kind * 2 + field (0 for the title, 1 for username and website).
+
+        Args:
+            within (optional): Only return these entries (short prefixes are then not capped).
+        """
+
+        kinds: Dict[str, int] = {} # Indexed word -> best match kind
+
+        if len(query_word) < 3:
+            #Too short for trigrams (and substrings of one or two letters are noise), prefixes only.
+            #The exact word sorts first; collecting stops after SHORT_PREFIX_LIMIT entries.
+            start = bisect.bisect_left(self._words, query_word)
+            end = bisect.bisect_left(self._words, query_word[:-1] + chr(ord(query_word[-1]) + 1), start) #First word after the prefix
+            collected = 0
+            for index in range(start, end):
+                word = self._words[index]
+                kinds[word] = EXACT if word == query_word else PREFIX
+                if within is None:
+                    collected += len(self._title_postings.get(word, ())) + len(self._other_postings.get(word, ()))
+                    if collected >= SHORT_PREFIX_LIMIT:
+                        break
+        else:
+            for word in self._substring_words(query_word):
+                if word == query_word:
+                    kinds[word] = EXACT
+                elif word.startswith(query_word):
+                    kinds[word] = PREFIX
+                else:
+                    kinds[word] = SUBSTRING
+
+            if len(query_word) >= 4:
+                for word in self._fuzzy_words(query_word):
+                    kinds.setdefault(word, FUZZY)
+
+        tiers: Dict[int, Set[int]] = {}
+        for word, kind in kinds.items():
+            for tier, postings in ((kind * 2, self._title_postings), (kind * 2 + 1, self._other_postings)):
+                ids = postings.get(word)
+                if ids is None:
+                    continue
+                if within is not None:
+                    ids = ids & within
+                    if not ids:
+                        continue
+                tiers.setdefault(tier, set()).update(ids)
+        return tiers
+
+    def _substring_words(self, query_word: str) -> List[str]:
+        """Returns the indexed words containing query_word (at least three letters long)."""
+
+        grams = [query_word[i:i + 3] for i in range(len(query_word) - 2)]
+        postings = []
+        for gram in set(grams):
+            words = self._word_trigrams.get(gram)
+            if not words:
+                return []
+            postings.append(words)
+
+        postings.sort(key=len) #Intersect starting with the rarest trigram
+        candidates = set(postings[0])
+        for words in postings[1:]:
+            candidates &= words
+            if not candidates:
+                return []
+
+        if len(query_word) == 3:
+            return list(candidates) #A single trigram already is the substring
+        return [word for word in candidates if query_word in word]
+
+    def _fuzzy_words(self, query_word: str) -> List[str]:
+        """Returns the indexed words within the typo limit of query_word.
+
+        An edit changes at most three padded trigrams, so candidates must share enough trigrams
+        with the query word before the (expensive) edit distance is computed.
+        """
+
+        limit = 1 if len(query_word) <= 6 else self.max_typos
+        grams = trigrams(query_word)
+        required = max(1, len(grams) - 3 * limit)
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._word_trigrams.get(gram, ()))
+
+        return [
+            word for word, count in shared.items()
+            if count >= required and bounded_edit_distance(query_word, word, limit) <= limit
+        ]
+
+    def _add(self, password_id: int, title: str, username: str, website: str):
+        """Adds an entry (caller holds the lock)."""
+
+        if password_id in self._entries:
+            self._remove(password_id)
+
+        title_words = tuple(set(tokenize(title)))
+        other_words = tuple(set(tokenize(username) + tokenize(website)))
+        self._entries[password_id] = (title_words, other_words) #Tuples, a set per entry would double the memory
+
+        for words, postings in ((title_words, self._title_postings), (other_words, self._other_postings)):
+            for word in words:
+                if word not in self._title_postings and word not in self._other_postings:
+                    self._add_word(word)
+                postings.setdefault(word, set()).add(password_id)
+
+    def _remove(self, password_id: int):
+        """Removes an entry (caller holds the lock)."""
+
+        entry = self._entries.pop(password_id, None)
+        if entry is None:
+            return
+
+        for words, postings in zip(entry, (self._title_postings, self._other_postings)):
+            for word in words:
+                ids = postings[word]
+                ids.discard(password_id)
+                if not ids:
+                    del postings[word]
+                    if word not in self._title_postings and word not in self._other_postings:
+                        self._remove_word(word)
+
+    def _add_word(self, word: str):
+        """Adds a new word to the vocabulary and the trigram index."""
+
+        bisect.insort(self._words, word)
+        for gram in trigrams(word):
+            self._word_trigrams.setdefault(gram, set()).add(word)
+
+    def _remove_word(self, word: str):
+        """Removes a word no entry contains anymore."""
+
+        index = bisect.bisect_left(self._words, word)
+        if index < len(self._words) and self._words[index] == word:
+            del self._words[index]
+
+        for gram in trigrams(word):
+            words = self._word_trigrams.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._word_trigrams[gram]
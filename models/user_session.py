@@ -1,26 +1,27 @@
-class UserSession:
-    """Singleton class to manage user session data and authentication state."""
+#API
+import hmac
+import threading
 
-    _instance = None
+#Models
+from models.key_cache import KeyCache
+from models.search_index import SearchIndex
 
-    def __new__(cls):
-        """Ensures only one instance exists (Singleton pattern). Creates a new instance if none exists."""
+class UserSession:
+    """Manages the session data and authentication state of one user.
 
-        if cls._instance is None:
-            cls._instance = super(UserSession, cls).__new__(cls)
-            cls._instance._initialized = False # To prevent re-initialization
-        return cls._instance
+    The app shares one session (see get_session); the API server keeps one per session token.
+    """
 
     def __init__(self):
-        """Initializes user session attributes if not already done (prevents re-initialization)."""
+        """Initializes an empty (logged out) session."""
 
-        if self._initialized:
-            return
-        self._initialized = True
         self.user_id = None
         self.master_password = None
         self.username = None
         self.email = None
+        self.key_cache = KeyCache() # Derived Fernet keys, keyed by salt
+        self.search_index = SearchIndex() # Decrypted titles, usernames and websites for the search bar
+        self.clear_listeners = [] # Callbacks that wipe other caches of decrypted data
 
     def login(self, user_id, master_password, username=None, email=None):
         """
@@ -37,14 +38,32 @@ class UserSession:
         self.master_password = master_password
         self.username = username
         self.email = email
+        self.key_cache.clear() # Keys of a previous login must never be reused
+        self.reset_search_index()
+        self._notify_clear_listeners()
 
     def logout(self):
-        """Clear user session data upon logout."""
+        """Clear user session data, all cached keys and the search index upon logout."""
 
         self.user_id = None
         self.master_password = None
         self.username = None
         self.email = None
+        self.key_cache.clear()
+        self.reset_search_index()
+        self._notify_clear_listeners()
+
+    def add_clear_listener(self, callback):
+        """Registers a callback that wipes decrypted data held outside the session, called on login and logout."""
+
+        if callback not in self.clear_listeners:
+            self.clear_listeners.append(callback)
+
+    def _notify_clear_listeners(self):
+        """Calls every registered clear listener."""
+
+        for callback in self.clear_listeners:
+            callback()
 
     def is_logged_in(self):
         """Check if a user is currently logged in.
@@ -86,7 +105,46 @@ class UserSession:
 
         return self.email
 
-def get_session():
-    """Returns the singleton UserSession instance (creates it if necessary)."""
+    def get_key_cache(self):
+        """Get the session-scoped cache of derived Fernet keys."""
+
+        return self.key_cache
+
+    def get_search_index(self):
+        """Get the session-scoped search index over the decrypted overview."""
+
+        return self.search_index
 
-    return UserSession()
\ No newline at end of file
+    def reset_search_index(self):
+        """Wipes the search index and replaces it with a new, empty one, which is returned.
+
+        A background load that still holds the old index can then only fill that (detached)
+        object, never the index of the new session or the new load.
+        """
+
+        self.search_index.clear()
+        self.search_index = SearchIndex()
+        return self.search_index
+
+    def matches_master_password(self, master_password: str) -> bool:
+        """Check if the given password is the one this session was unlocked with.
+
+        Cached keys may only be handed out for the session's own master password.
+        """
+
+        if not self.is_logged_in() or master_password is None:
+            return False
+        return hmac.compare_digest(self.master_password.encode(), master_password.encode())
+
+_session = None # Shared session of the app, created on first use
+_session_lock = threading.Lock()
+
+def get_session():
+    """Returns the app's shared UserSession instance (creates it if necessary)."""
+
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = UserSession()
+    return _session
\ No newline at end of file
@@ -0,0 +1,465 @@
+"""Eura Pass als lokaler HTTP/JSON-Dienst, damit andere Werkzeuge den Tresor ohne Oberfläche nutzen können.
+
+Stdlib only (http.server, json); binds to 127.0.0.1, so only programs on this machine can connect.
+Every login gets a session token of its own, with its own key cache, instead of the app's shared
+session. Requests are handled (including the key derivation and decryption) by a bounded pool of
+worker threads that share a bounded pool of database connections.
+
+Usage:
+    python server.py --db passwords.db --port 8765 --workers 8
+
+Endpoints (JSON bodies, "Authorization: Bearer <token>" after the login):
+    POST   /login              {"username": ..., "master_password": ...} -> {"token": ..., "user_id": ...}
+    POST   /logout
+    GET    /passwords          ?after_id=0&limit=200 -> {"entries": [...], "next_after_id": ...}
+    GET    /passwords/<id>
+    POST   /passwords          {"title": ..., "password": ..., "username": ..., ...} -> {"id": ...}
+    DELETE /passwords/<id>
+    GET    /health
+"""
+
+#API
+import argparse
+import json
+import re
+import secrets
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from cryptography.fernet import InvalidToken
+
+# Services
+from services.database import Database
+from services.auth_service import AuthService
+from services.password_service import PasswordService, ENTRY_FIELDS
+
+# Models
+from models.user_session import UserSession
+
+HOST = "127.0.0.1" # Never reachable from other machines
+MAX_BODY_BYTES = 64 * 1024
+MAX_PAGE_SIZE = 1000
+DIGITS = re.compile(r"[0-9]+") # str.isdigit() also accepts digits such as "²" that int() rejects
+
+
+class ApiError(Exception):
+    """Raised for errors that are answered with an HTTP status and a JSON error message."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SessionStore:
+    def __init__(self, ttl: float = 900, max_sessions: int = 1000):
+        """Keeps one UserSession per session token and the session of the request handled by each thread.
+
+        Args:
+            ttl: Seconds a session may stay unused before it expires (its keys are wiped).
+            max_sessions: Maximum number of open sessions; the least recently used one is ended for a new login.
+        """
+
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, Tuple[UserSession, float]] = {} # Token -> (session, last use)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.end_listeners = [] # Called with the user ID when the last open session of that user ends
+
+    def create(self, user_id: int, master_password: str, username: str, email: str) -> Tuple[str, UserSession]:
+        """Starts a session and returns its new token."""
+
+        session = UserSession()
+        session.login(user_id=user_id, master_password=master_password, username=username, email=email)
+        token = secrets.token_urlsafe(32)
+
+        ended = []
+        with self._lock:
+            ended.extend(self._expire(time.monotonic()))
+            while len(self._sessions) >= self.max_sessions: #Dicts keep insertion order, refreshed sessions are re-inserted
+                ended.append(self._sessions.pop(next(iter(self._sessions)))[0])
+            self._sessions[token] = (session, time.monotonic())
+
+        for old_session in ended:
+            self._end(old_session)
+        return token, session
+
+    def get(self, token: Optional[str]) -> UserSession:
+        """Returns the session of a token and marks it as used.
+
+        Raises:
+            ApiError: 401 if the token is unknown or expired.
+        """
+
+        ended = []
+        with self._lock:
+            ended.extend(self._expire(time.monotonic()))
+            found = self._sessions.pop(token, None) if token else None
+            if found is not None:
+                self._sessions[token] = (found[0], time.monotonic()) #Move to the end (most recently used)
+
+        for old_session in ended:
+            self._end(old_session)
+        if found is None:
+            raise ApiError(401, "Nicht angemeldet oder Sitzung abgelaufen.")
+        return found[0]
+
+    def remove(self, token: str):
+        """Ends the session of a token (logout)."""
+
+        with self._lock:
+            found = self._sessions.pop(token, None)
+        if found is not None:
+            self._end(found[0])
+
+    def clear(self):
+        """Ends every session (server shutdown)."""
+
+        with self._lock:
+            sessions, self._sessions = [session for session, _ in self._sessions.values()], {}
+        for session in sessions:
+            self._end(session)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @contextmanager
+    def bind(self, session: UserSession):
+        """Makes session the current session of the calling thread for the enclosed block."""
+
+        self._local.session = session
+        try:
+            yield session
+        finally:
+            self._local.session = None
+
+    def current(self) -> UserSession:
+        """Returns the session bound to the calling thread, or an empty one (used as PasswordService session provider)."""
+
+        session = getattr(self._local, 'session', None)
+        return session if session is not None else UserSession()
+
+    def _expire(self, now: float):
+        """Removes and returns the sessions unused for longer than the TTL (caller holds the lock).
+
+        Used sessions are moved to the end, so the idle ones are at the front.
+        """
+
+        expired = []
+        while self._sessions:
+            token, (session, last_use) = next(iter(self._sessions.items()))
+            if now - last_use <= self.ttl:
+                break
+            del self._sessions[token]
+            expired.append(session)
+        return expired
+
+    def _end(self, session: UserSession):
+        """Wipes the keys of an ended session and notifies the listeners if it was the user's last one.
+
+        Other sessions of the same user keep using the shared caches (e.g. the entry cache),
+        so those are only wiped once no session of the user is left.
+        """
+
+        user_id = session.user_id
+        session.logout()
+        with self._lock:
+            still_open = any(other.user_id == user_id for other, _ in self._sessions.values())
+        if still_open:
+            return
+        for callback in self.end_listeners:
+            callback(user_id)
+
+
+class Api:
+    def __init__(self, database: Database, session_ttl: float = 900):
+        """Answers the API requests on the services layer, one session per token."""
+
+        self.db = database
+        self.sessions = SessionStore(ttl=session_ttl)
+        self.auth_service = AuthService(database)
+        self.password_service = PasswordService(
+            database,
+            kdf_workers=1, # The request workers already bound the parallel key derivations
+            session_provider=self.sessions.current,
+        )
+        self.sessions.end_listeners.append(self.password_service.entry_cache.invalidate_user)
+        self.started = time.time()
+
+    def close(self):
+        """Ends all sessions and stops the key derivation workers."""
+
+        self.sessions.clear()
+        self.password_service.close()
+
+    def dispatch(self, method: str, path: str, token: Optional[str], body: Optional[dict]) -> Tuple[int, dict]:
+        """Runs the handler of a request and returns (HTTP status, JSON response).
+
+        Raises:
+            ApiError: For invalid requests (answered with their status).
+        """
+
+        url = urlsplit(path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if url.path == "/health" and method == "GET":
+            return 200, {"status": "ok", "sessions": len(self.sessions), "uptime_s": round(time.time() - self.started)}
+        if url.path == "/login" and method == "POST":
+            return self.login(body or {})
+
+        session = self.sessions.get(token)
+        with self.sessions.bind(session):
+            if url.path == "/logout" and method == "POST":
+                self.sessions.remove(token)
+                return 200, {"logged_out": True}
+
+            if url.path == "/passwords":
+                if method == "GET":
+                    return self.overview(session, query)
+                if method == "POST":
+                    return self.add(session, body or {})
+                raise ApiError(405, "Methode nicht erlaubt.")
+
+            match = re.fullmatch(r"/passwords/(\d+)", url.path)
+            if match:
+                password_id = int(match.group(1))
+                if method == "GET":
+                    return self.get(session, password_id)
+                if method == "DELETE":
+                    return self.delete(session, password_id)
+                raise ApiError(405, "Methode nicht erlaubt.")
+
+        raise ApiError(404, "Unbekannter Pfad.")
+
+    def login(self, body: dict) -> Tuple[int, dict]:
+        username, master_password = body.get("username"), body.get("master_password")
+        if not isinstance(username, str) or not isinstance(master_password, str):
+            raise ApiError(400, "username und master_password fehlen.")
+
+        user = self.auth_service.authenticate_user(username, master_password)
+        if not user:
+            raise ApiError(401, "Ungültiger Benutzername/E-Mail oder Passwort.")
+
+        user_id, email, username_db = user
+        token, session = self.sessions.create(user_id, master_password, username_db, email)
+        with self.sessions.bind(session):
+            try:
+                self.password_service.unlock_vault(user_id, master_password) #Derives the key once, cached in this session
+            except InvalidToken:
+                self.sessions.remove(token)
+                raise ApiError(401, "Der Tresor konnte nicht entsperrt werden.")
+
+        return 200, {"token": token, "user_id": user_id, "username": username_db, "expires_in": self.sessions.ttl}
+
+    def overview(self, session: UserSession, query: Dict[str, str]) -> Tuple[int, dict]:
+        after_id = self._int_param(query, "after_id", 0)
+        limit = min(max(self._int_param(query, "limit", 200), 1), MAX_PAGE_SIZE)
+
+        pages = self.password_service.iter_password_overview(
+            session.get_user_id(), session.get_master_password(), page_size=limit, after_id=after_id
+        )
+        rows = next(pages, [])
+        pages.close()
+
+        return 200, {
+            "entries": [{"id": row.id, "title": row.title, "username": row.username, "website": row.website} for row in rows],
+            "next_after_id": rows[-1].id if rows else None, #Keep paging until a page is empty
+        }
+
+    def get(self, session: UserSession, password_id: int) -> Tuple[int, dict]:
+        entry = self.password_service.load_password(session.get_user_id(), password_id, session.get_master_password())
+        if entry is None:
+            raise ApiError(404, f"Kein Passwort mit der ID {password_id} gefunden.")
+        return 200, entry.to_dict()
+
+    def add(self, session: UserSession, body: dict) -> Tuple[int, dict]:
+        fields = {field: body.get(field) or "" for field in ENTRY_FIELDS}
+        if not all(isinstance(value, str) for value in fields.values()):
+            raise ApiError(400, "Alle Felder müssen Text sein.")
+
+        is_valid, error_msg = self.password_service.validate_password_data(fields["title"], fields["password"])
+        if not is_valid:
+            raise ApiError(400, error_msg)
+
+        password_id = self.password_service.save_password(
+            session.get_user_id(), fields["title"], fields["username"], fields["password"], session.get_master_password(),
+            two_fa_key=fields["two_fa_key"], website=fields["website"], notes=fields["notes"]
+        )
+        return 201, {"id": password_id}
+
+    def delete(self, session: UserSession, password_id: int) -> Tuple[int, dict]:
+        if self.db.get_password_by_id(session.get_user_id(), password_id) is None: #Never delete entries of other users
+            raise ApiError(404, f"Kein Passwort mit der ID {password_id} gefunden.")
+
+        self.password_service.delete_password(password_id)
+        return 200, {"id": password_id, "deleted": True}
+
+    def _int_param(self, query: Dict[str, str], name: str, default: int) -> int:
+        """Returns a non-negative integer query parameter."""
+
+        value = query.get(name)
+        if value is None:
+            return default
+        if not DIGITS.fullmatch(value):
+            raise ApiError(400, f"{name} muss eine nicht-negative Zahl sein.")
+        return int(value)
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Parses a request, passes it to the Api and writes the JSON response (one request per connection)."""
+
+    server_version = "EuraPass"
+    timeout = 10 # Seconds a slow client may block a worker
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method: str):
+        try:
+            status, payload = self.server.api.dispatch(method, self.path, self._token(), self._body())
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception: #Never leak details of internal errors to the client
+            traceback.print_exc()
+            status, payload = 500, {"error": "Interner Fehler."}
+
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store") #Responses may contain passwords
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _token(self) -> Optional[str]:
+        header = self.headers.get("Authorization", "")
+        return header[len("Bearer "):].strip() if header.startswith("Bearer ") else None
+
+    def _body(self) -> Optional[dict]:
+        """Reads the JSON body of the request, if it has one.
+
+        Raises:
+            ApiError: 411 if a body is sent without Content-Length, 400 if the Content-Length is
+                invalid or the body is no JSON object, 413 if the body is too large.
+        """
+
+        header = self.headers.get("Content-Length")
+        if header is None:
+            if self.headers.get("Transfer-Encoding"): #A chunked body would be left unread
+                raise ApiError(411, "Content-Length fehlt.")
+            return None
+        if not DIGITS.fullmatch(header.strip()):
+            raise ApiError(400, "Ungültige Content-Length.")
+
+        length = int(header)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, "Anfrage zu groß.")
+        if not length:
+            return None
+
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError(400, "Ungültiges JSON.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Ein JSON-Objekt wird erwartet.")
+        return body
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ApiServer(HTTPServer):
+    request_queue_size = 128 # Connections waiting in the listen backlog
+
+    def __init__(self, api: Api, port: int = 8765, workers: int = 8, verbose: bool = False):
+        """HTTP server that handles the requests on a bounded pool of worker threads.
+
+        The accepting thread only hands connections to the pool; at most workers requests are
+        handled (key derivation, decryption, queries) at the same time, and at most 4 * workers
+        accepted connections wait for a worker before the accepting thread blocks.
+        """
+
+        super().__init__((HOST, port), ApiRequestHandler)
+        self.api = api
+        self.verbose = verbose
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._pending = threading.BoundedSemaphore(workers * 5)
+
+    def process_request(self, request, client_address):
+        self._pending.acquire()
+        self.executor.submit(self._process_request_in_worker, request, client_address)
+
+    def _process_request_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._pending.release()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def create_server(db_path: str, port: int = 8765, workers: int = 8, pool_size: Optional[int] = None, session_ttl: float = 900, verbose: bool = False) -> ApiServer:
+    """Opens the database with a shared connection pool and returns the (not yet running) server.
+
+    Args:
+        port: TCP port on 127.0.0.1 (0 picks a free one, see server.server_address).
+        pool_size: Database connections shared by the workers (defaults to workers).
+    """
+
+    database = Database(db_path, pool_size=pool_size or workers)
+    return ApiServer(Api(database, session_ttl=session_ttl), port=port, workers=workers, verbose=verbose)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Returns the argument parser of the server."""
+
+    parser = argparse.ArgumentParser(prog="eura-pass-server", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="passwords.db", help="Pfad der Datenbank (Standard: passwords.db)")
+    parser.add_argument("--port", type=int, default=8765, help="Port auf 127.0.0.1 (Standard: 8765)")
+    parser.add_argument("--workers", type=int, default=8, help="Threads für Anfragen (Schlüsselableitung und Entschlüsselung)")
+    parser.add_argument("--pool-size", type=int, help="Datenbankverbindungen (Standard: wie --workers)")
+    parser.add_argument("--session-ttl", type=float, default=900, help="Sekunden, bis eine unbenutzte Sitzung abläuft")
+    parser.add_argument("--verbose", action="store_true", help="Jede Anfrage protokollieren")
+    return parser
+
+
+def main(argv=None) -> int:
+    """Runs the server until it is interrupted (Ctrl+C)."""
+
+    args = build_parser().parse_args(argv)
+    server = create_server(args.db, args.port, args.workers, args.pool_size, args.session_ttl, args.verbose)
+    print(f"Eura Pass API auf http://{HOST}:{server.server_address[1]} ({args.workers} Worker)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.api.close()
+        server.api.db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
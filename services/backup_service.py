@@ -0,0 +1,217 @@
+# API
+import json
+import os
+import secrets
+import struct
+import threading
+from cryptography.fernet import Fernet, InvalidToken
+from typing import Dict, Iterator, List, Optional, Callable, BinaryIO, Tuple
+
+# Services
+from services.password_service import PasswordService, ENTRY_FIELDS
+from services.key_derivation import derive_key
+
+# Archive layout:
+#   header: MAGIC | backup ID (16 bytes) | salt (16 bytes) | PBKDF2 iterations (uint32)
+#   chunks: token length (uint32) | Fernet token
+# Every token decrypts to: backup ID | sequence number (uint64) | final flag (1 byte) | JSON lines.
+# The backup ID and the sequence number stop chunks from being mixed between archives or reordered,
+# the final flag reveals a truncated archive.
+MAGIC = b"EURAPASS-BACKUP1"
+HEADER = struct.Struct(">16s16s16sI")
+CHUNK_LENGTH = struct.Struct(">I")
+CHUNK_PREFIX = struct.Struct(">16sQ?")
+MAX_CHUNK_SIZE = 64 * 1024 * 1024 # Refuse absurd lengths from corrupted files
+
+
+class BackupError(Exception):
+    """Raised when an archive is corrupted, truncated, tampered with or encrypted with another password."""
+
+
+class BackupCancelled(Exception):
+    """Raised when an export or restore is cancelled."""
+
+
+class BackupService:
+    def __init__(self, password_service: PasswordService, entries_per_chunk: int = 100):
+        """Exports the vault into an encrypted, chunk-authenticated archive and restores it again.
+
+        Args:
+            password_service (PasswordService): Service that decrypts and stores the entries.
+            entries_per_chunk: Number of entries sealed in one authenticated chunk.
+        """
+
+        self.password_service = password_service
+        self.entries_per_chunk = entries_per_chunk
+
+    def export_vault(self, user_id: int, master_password: str, path: str, progress_callback: Optional[Callable[[int], None]] = None, cancel_event: Optional[threading.Event] = None) -> Dict[str, int]:
+        """Streams all entries of the user into an encrypted archive file.
+
+        Entries are decrypted and sealed one chunk at a time, so the memory use does not depend on the
+        vault size. The archive is written to a temporary file that replaces path only when complete.
+        Safe to run in a background thread.
+
+        Args:
+            progress_callback: Called with the number of exported entries after every chunk.
+            cancel_event (optional): Cancels the export when set (path is left untouched).
+
+        Returns:
+            dict: Counts of "exported" entries and of "skipped" entries that could not be decrypted
+                (those are missing from the archive, the caller must tell the user).
+
+        Raises:
+            BackupCancelled: If cancel_event was set.
+        """
+
+        backup_id = secrets.token_bytes(16)
+        salt = secrets.token_bytes(16)
+        iterations = self.password_service.get_kdf_policy().iterations #Stored in the header, so any machine can restore it
+        f = Fernet(derive_key(master_password, salt, iterations)) #One KDF run for the whole archive
+
+        temp_path = f"{path}.part"
+        exported = 0
+        sequence = 0
+        skipped = [] # IDs of entries that could not be decrypted
+
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(HEADER.pack(MAGIC, backup_id, salt, iterations))
+
+                chunk = []
+                for entry in self.password_service.iter_passwords(user_id, master_password, skipped=skipped):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise BackupCancelled()
+
+                    chunk.append(dict(zip(ENTRY_FIELDS, entry.fields())))
+                    if len(chunk) >= self.entries_per_chunk:
+                        self._write_chunk(file, f, backup_id, sequence, False, chunk)
+                        exported += len(chunk)
+                        sequence += 1
+                        chunk = []
+                        if progress_callback:
+                            progress_callback(exported)
+
+                self._write_chunk(file, f, backup_id, sequence, True, chunk) #The final chunk may be empty
+                exported += len(chunk)
+
+            os.replace(temp_path, path)
+
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if progress_callback:
+            progress_callback(exported)
+        return {"exported": exported, "skipped": len(skipped)}
+
+    def restore_vault(self, user_id: int, master_password: str, path: str, progress_callback: Optional[Callable[[int], None]] = None, cancel_event: Optional[threading.Event] = None) -> Dict[str, int]:
+        """Restores an archive into the user's vault.
+
+        The archive is streamed twice: the first pass authenticates every chunk, the second one
+        saves the entries chunk by chunk. Nothing is written unless the whole archive is intact.
+        Entries whose (title, username) pair already exists in the vault are skipped.
+
+        Args:
+            progress_callback: Called with the number of restored entries after every chunk.
+            cancel_event (optional): Cancels the restore when set (chunks already saved stay saved).
+
+        Returns:
+            dict: Counts of "restored" and "duplicates" entries.
+
+        Raises:
+            BackupError: If the archive is damaged or was created with another master password.
+            BackupCancelled: If cancel_event was set.
+        """
+
+        for _ in self._read_chunks(path, master_password, cancel_event):
+            pass #Authenticate the whole archive before writing anything
+
+        seen = {
+            (row.title, row.username)
+            for row in self.password_service.get_password_overview(user_id, master_password)
+        }
+        result = {"restored": 0, "duplicates": 0}
+
+        for entries in self._read_chunks(path, master_password, cancel_event):
+            new_entries = []
+            for entry in entries:
+                key = (entry["title"], entry["username"])
+                if key in seen:
+                    result["duplicates"] += 1
+                    continue
+                seen.add(key)
+                new_entries.append(entry)
+
+            if new_entries:
+                result["restored"] += self.password_service.save_passwords_many(user_id, new_entries, master_password)
+            if progress_callback:
+                progress_callback(result["restored"])
+
+        return result
+
+    def _write_chunk(self, file: BinaryIO, f: Fernet, backup_id: bytes, sequence: int, final: bool, entries: List[Dict]):
+        """Seals one chunk of entries and appends it to the archive."""
+
+        payload = "\n".join(json.dumps(entry, ensure_ascii=False) for entry in entries).encode()
+        token = f.encrypt(CHUNK_PREFIX.pack(backup_id, sequence, final) + payload)
+        file.write(CHUNK_LENGTH.pack(len(token)))
+        file.write(token)
+
+    def _read_chunks(self, path: str, master_password: str, cancel_event: Optional[threading.Event] = None) -> Iterator[List[Dict]]:
+        """Yields the entries of each authenticated chunk of an archive, in order.
+
+        Raises:
+            BackupError: If a chunk fails authentication, is out of order or the archive is truncated.
+        """
+
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise BackupError("Die Datei ist kein Eura-Pass-Backup.")
+
+            magic, backup_id, salt, iterations = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise BackupError("Die Datei ist kein Eura-Pass-Backup.")
+
+            f = Fernet(derive_key(master_password, salt, iterations))
+            expected_sequence = 0
+
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise BackupCancelled()
+
+                chunk_id, sequence, final, payload = self._read_chunk(file, f)
+                if chunk_id != backup_id or sequence != expected_sequence:
+                    raise BackupError("Das Backup wurde verändert (Abschnitte vertauscht oder ersetzt).")
+
+                yield [json.loads(line) for line in payload.decode().split("\n") if line]
+
+                if final:
+                    if file.read(1):
+                        raise BackupError("Das Backup enthält Daten nach dem letzten Abschnitt.")
+                    return
+                expected_sequence += 1
+
+    def _read_chunk(self, file: BinaryIO, f: Fernet) -> Tuple[bytes, int, bool, bytes]:
+        """Reads and decrypts the next chunk of an archive."""
+
+        length_bytes = file.read(CHUNK_LENGTH.size)
+        if len(length_bytes) != CHUNK_LENGTH.size:
+            raise BackupError("Das Backup ist unvollständig.")
+
+        (length,) = CHUNK_LENGTH.unpack(length_bytes)
+        if length > MAX_CHUNK_SIZE:
+            raise BackupError("Das Backup ist beschädigt.")
+
+        token = file.read(length)
+        if len(token) != length:
+            raise BackupError("Das Backup ist unvollständig.")
+
+        try:
+            plaintext = f.decrypt(token)
+        except InvalidToken:
+            raise BackupError("Falsches Master-Passwort oder beschädigtes Backup.") from None
+
+        chunk_id, sequence, final = CHUNK_PREFIX.unpack_from(plaintext)
+        return chunk_id, sequence, final, plaintext[CHUNK_PREFIX.size:]
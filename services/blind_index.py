@@ -0,0 +1,84 @@
+# API
+import base64
+import hmac
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from typing import List, Set
+
+# Models
+from models.search_index import tokenize
+
+# Searchable fields of an entry; the other fields are never indexed
+INDEXED_FIELDS = ("title", "username", "website")
+TOKEN_SIZE = 16 # Bytes of the HMAC kept per token, false positives are filtered after decryption
+
+
+def derive_index_key(data_key: bytes) -> bytes:
+    """Derives the HMAC key of the blind index from the user's data key (the urlsafe base64 Fernet key).
+
+    HKDF with its own context string keeps the index key independent of the encryption key,
+    so the tokens reveal nothing about the Fernet key.
+    """
+
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"eura-pass blind index v1",
+    ).derive(base64.urlsafe_b64decode(data_key))
+
+
+def _token(index_key: bytes, kind: bytes, value: str) -> bytes:
+    """Returns the keyed token of one word ("w") or trigram ("g")."""
+
+    return hmac.digest(index_key, kind + value.encode(), "sha256")[:TOKEN_SIZE]
+
+
+def index_check(index_key: bytes) -> bytes:
+    """Returns a value identifying the index key, stored to detect an index built with another key."""
+
+    return _token(index_key, b"c", "check")
+
+
+def entry_tokens(index_key: bytes, title: str, username: str, website: str) -> Set[bytes]:
+    """Returns the tokens of an entry: one per word and one per trigram of every word of three letters or more."""
+
+    tokens = set()
+    for text in (title, username, website):
+        for word in tokenize(text or ""):
+            tokens.add(_token(index_key, b"w", word))
+            for i in range(len(word) - 2):
+                tokens.add(_token(index_key, b"g", word[i:i + 3]))
+    return tokens
+
+
+def query_tokens(index_key: bytes, query: str) -> List[bytes]:
+    """Returns the tokens an entry must have to match every word of the query.
+
+    Words of three letters or more match as substrings (through their trigrams),
+    shorter words only as whole words.
+    """
+
+    tokens = set()
+    for word in tokenize(query):
+        if len(word) < 3:
+            tokens.add(_token(index_key, b"w", word))
+        else:
+            tokens.update(_token(index_key, b"g", word[i:i + 3]) for i in range(len(word) - 2))
+    return sorted(tokens)
+
+
+def matches(query: str, title: str, username: str, website: str) -> bool:
+    """Checks a decrypted candidate against the query (the tokens alone allow false positives)."""
+
+    words = set()
+    for text in (title, username, website):
+        words.update(tokenize(text or ""))
+
+    for query_word in tokenize(query):
+        if len(query_word) < 3:
+            if query_word not in words:
+                return False
+        elif not any(query_word in word for word in words):
+            return False
+    return True
@@ -1,93 +1,864 @@
 #API
 import sqlite3
-from typing import Optional, List, Tuple
+import threading
+from contextlib import contextmanager
+from typing import Optional, List, Tuple, Iterable, Iterator, Sequence
 
+# Services
+from services import tracing
+
+class ConnectionManager:
+    def __init__(self, db_name: str, cache_size_kib: int = 16384, mmap_size: int = 268435456, busy_timeout_ms: int = 5000, cached_statements: int = 256):
+        """Keeps one long-lived, tuned SQLite connection per thread.
+
+        Args:
+            db_name: Path of the database file.
+            cache_size_kib: Page cache size per connection in KiB.
+            mmap_size: Bytes of the database file that are memory-mapped (0 disables mmap).
+            busy_timeout_ms: How long a connection waits for a lock held by another connection.
+            cached_statements: Number of prepared statements kept per connection.
+        """
+
+        self.db_name = db_name
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._connections = [] # Every open connection, so they can be closed on exit
+        self._lock = threading.Lock()
+        self._generation = 0 # Bumped by close_all() to invalidate the per-thread connections
+
+    def _open(self) -> sqlite3.Connection:
+        """Opens a new connection and applies the pragmas."""
+
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            check_same_thread=False, #Each thread uses its own connection, close_all() may run on another one
+        )
+        conn.execute('PRAGMA journal_mode = WAL') #Readers never block the writer and vice versa
+        conn.execute('PRAGMA synchronous = NORMAL') #Safe with WAL, skips an fsync per commit
+        conn.execute(f'PRAGMA cache_size = -{int(self.cache_size_kib)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def _thread_connection(self) -> sqlite3.Connection:
+        """Returns the calling thread's connection, opening it on first use."""
+
+        local = self._local
+        if getattr(local, 'conn', None) is None or local.generation != self._generation:
+            conn = self._open()
+            with self._lock:
+                self._connections.append(conn)
+                local.generation = self._generation
+            local.conn = conn
+            local.depth = 0
+        return local.conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Returns the connection for the calling thread's next connection() block."""
+
+        return self._thread_connection()
+
+    def _release(self, conn: sqlite3.Connection):
+        """Called when the calling thread's outermost connection() block ends (the connection stays with the thread)."""
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Yields the calling thread's connection.
+
+        The outermost block commits an open transaction on success and rolls it back on error,
+        so a failed query never leaves the long-lived connection inside a transaction.
+        """
+
+        conn = self._acquire()
+        local = self._local
+        local.depth += 1
+
+        try:
+            yield conn
+        except BaseException:
+            if local.depth == 1 and conn.in_transaction:
+                conn.rollback()
+            raise
+        else:
+            if local.depth == 1 and conn.in_transaction:
+                conn.commit()
+        finally:
+            local.depth -= 1
+            if local.depth == 0:
+                self._release(conn)
+
+    def close_all(self):
+        """Closes the connections of all threads."""
+
+        with self._lock:
+            self._generation += 1
+            connections, self._connections = self._connections, []
+
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+class ConnectionPool(ConnectionManager):
+    def __init__(self, db_name: str, max_connections: int = 8, **tuning):
+        """Shares at most max_connections tuned SQLite connections between any number of threads.
+
+        A thread borrows a connection for its outermost connection() block and hands it back
+        afterwards, so servers with many short-lived or pooled threads do not open one connection
+        per thread. Nested blocks of the same thread reuse the borrowed connection.
+
+        Args:
+            max_connections: Upper bound of open connections; further threads wait for a free one.
+            tuning: cache_size_kib, mmap_size, busy_timeout_ms and cached_statements, see ConnectionManager.
+        """
+
+        super().__init__(db_name, **tuning)
+        self.max_connections = max(1, max_connections)
+        self._idle: List[sqlite3.Connection] = []
+        self._available = threading.BoundedSemaphore(self.max_connections)
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Borrows an idle connection (or opens one) unless the thread already holds one."""
+
+        local = self._local
+        if getattr(local, 'depth', 0) > 0:
+            return local.conn
+
+        self._available.acquire()
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open()
+                with self._lock:
+                    self._connections.append(conn)
+        except BaseException:
+            self._available.release()
+            raise
+
+        local.conn = conn
+        local.depth = 0
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        """Hands the connection back to the pool (a connection closed by close_all() meanwhile is dropped)."""
+
+        self._local.conn = None
+        with self._lock:
+            if any(open_conn is conn for open_conn in self._connections):
+                self._idle.append(conn)
+        self._available.release()
+
+    def close_all(self):
+        """Closes every connection of the pool, borrowed ones are dropped when they are handed back."""
+
+        with self._lock:
+            self._idle = []
+        super().close_all()
+
+
+# Indexes every current database must have, by name
+EXPECTED_INDEXES = {
+    # Used by every query that selects the entries of one user
+    'idx_passwords_user_id': 'CREATE INDEX IF NOT EXISTS idx_passwords_user_id ON passwords (user_id)',
+    # Covers the overview query (including the website for search), so it is answered from the index without touching the table
+    'idx_passwords_overview_website': 'CREATE INDEX IF NOT EXISTS idx_passwords_overview_website ON passwords (user_id, id, title, username, website, salt, version)',
+    # Removes the blind index tokens of a deleted entry without scanning the table
+    'idx_search_tokens_password_id': 'CREATE INDEX IF NOT EXISTS idx_search_tokens_password_id ON password_search_tokens (password_id)',
+}
+
+MAX_QUERY_PARAMETERS = 500 # IDs or tokens bound per IN (...) query
+
+
+def _migration_1_base_tables(cur: sqlite3.Cursor):
+    """Creates the base tables (or completes databases created before migrations existed)."""
+
+    # Passwords Tabelle for storing user passwords
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS passwords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            title TEXT NOT NULL,
+            username TEXT NOT NULL,
+            password BLOB NOT NULL,
+            two_fa_key BLOB,
+            website TEXT,
+            notes TEXT,
+            salt BLOB NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+
+    # Vaults created before format v2 have no version column (all their rows are v1)
+    columns = [row[1] for row in cur.execute('PRAGMA table_info(passwords)')]
+    if 'version' not in columns:
+        cur.execute('ALTER TABLE passwords ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+
+    # User Tabelle for login credentials
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS user (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    ''')
+
+    # User keys Tabelle for the wrapped per-user data key (vault format v2)
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS user_keys (
+            user_id INTEGER PRIMARY KEY,
+            kek_salt BLOB NOT NULL,
+            wrapped_key BLOB NOT NULL,
+            migration_last_id INTEGER NOT NULL DEFAULT 0,
+            migrated_rows INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def _migration_2_user_id_index(cur: sqlite3.Cursor):
+    """Adds an index on passwords(user_id), so per-user queries no longer scan every user's rows."""
+
+    cur.execute(EXPECTED_INDEXES['idx_passwords_user_id'])
+
+
+def _migration_3_overview_index(cur: sqlite3.Cursor):
+    """Adds a covering index for the overview columns."""
+
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_passwords_overview ON passwords (user_id, id, title, username, salt, version)')
+
+
+def _migration_4_overview_website_index(cur: sqlite3.Cursor):
+    """Replaces the overview index by one that also covers the website, which the search needs."""
+
+    cur.execute('DROP INDEX IF EXISTS idx_passwords_overview')
+    cur.execute(EXPECTED_INDEXES['idx_passwords_overview_website'])
+
+
+def _migration_5_blind_index(cur: sqlite3.Cursor):
+    """Adds the blind index: keyed search tokens per entry and the check value of the key they were built with."""
+
+    # Search tokens Tabelle, the primary key answers "entries with token X" with one index lookup
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS password_search_tokens (
+            user_id INTEGER NOT NULL,
+            token BLOB NOT NULL,
+            password_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, token, password_id)
+        ) WITHOUT ROWID
+    ''')
+    cur.execute(EXPECTED_INDEXES['idx_search_tokens_password_id'])
+
+    columns = [row[1] for row in cur.execute('PRAGMA table_info(user_keys)')]
+    if 'blind_index_check' not in columns:
+        cur.execute('ALTER TABLE user_keys ADD COLUMN blind_index_check BLOB')
+
+
+def _migration_6_key_rotations(cur: sqlite3.Cursor):
+    """Adds the checkpoint table of master password changes, so an interrupted change can be resumed."""
+
+    # Key rotations Tabelle, one row per user while a master password change is running
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS key_rotations (
+            user_id INTEGER PRIMARY KEY,
+            kek_salt BLOB NOT NULL,
+            wrapped_key BLOB NOT NULL,
+            rotation_key BLOB NOT NULL,
+            password_hash TEXT NOT NULL,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            rotated_rows INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def _migration_7_kdf_params(cur: sqlite3.Cursor):
+    """Records the KDF parameters next to every KEK salt and adds the settings table for the calibrated KDF policy."""
+
+    # NULL means the parameters used before they were recorded (see key_derivation.LEGACY_KDF)
+    for table in ('user_keys', 'key_rotations'):
+        columns = [row[1] for row in cur.execute(f'PRAGMA table_info({table})')]
+        if 'kdf_params' not in columns:
+            cur.execute(f'ALTER TABLE {table} ADD COLUMN kdf_params TEXT')
+
+    # Settings Tabelle for app-wide values of this vault file
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+
+
+# Ordered schema migrations, the schema version after a step is its position in the list (starting at 1)
+MIGRATIONS = [
+    _migration_1_base_tables,
+    _migration_2_user_id_index,
+    _migration_3_overview_index,
+    _migration_4_overview_website_index,
+    _migration_5_blind_index,
+    _migration_6_key_rotations,
+    _migration_7_kdf_params,
+]
+
+
+@tracing.traced_methods("db") # Every query is a span while tracing is enabled
 class Database:
-    def __init__(self, db_name="passwords.db"):
-        """Initializes the database connection and creates necessary tables if they don't exist."""
+    def __init__(self, db_name="passwords.db", cache_size_kib: int = 16384, mmap_size: int = 268435456, busy_timeout_ms: int = 5000, pool_size: int = 0):
+        """Initializes the database connection and creates necessary tables if they don't exist.
+
+        Args:
+            db_name: Path of the database file.
+            cache_size_kib, mmap_size, busy_timeout_ms: SQLite tuning, see ConnectionManager.
+            pool_size: With 0, every thread keeps a connection of its own (the app); otherwise all threads
+                share a ConnectionPool of at most pool_size connections (the API server).
+        """
 
         self.db_name = db_name
+        tuning = dict(cache_size_kib=cache_size_kib, mmap_size=mmap_size, busy_timeout_ms=busy_timeout_ms)
+        if pool_size > 0:
+            self.connections = ConnectionPool(db_name, max_connections=pool_size, **tuning)
+        else:
+            self.connections = ConnectionManager(db_name, **tuning)
         self.init_tables() # Initialize database tables
 
+    def close(self):
+        """Closes all database connections (called on application exit)."""
+
+        self.connections.close_all()
+
     def init_tables(self):
-        """Creates the necessary tables in the database if they do not already exist."""
-
-        conn = sqlite3.connect(self.db_name)
-        cur = conn.cursor()
-
-        # Passwords Tabelle for storing user passwords
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS passwords (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                title TEXT NOT NULL,
-                username TEXT NOT NULL,
-                password BLOB NOT NULL,
-                two_fa_key BLOB,
-                website TEXT,
-                notes TEXT,
-                salt BLOB NOT NULL
-            )
-        ''')
-
-        # User Tabelle for login credentials
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS user (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
-            )
-        ''')
-
-        conn.commit()
-        conn.close()
-
-    def save_password(self, user_id: int, title: str, username: str, encrypted_password: bytes, two_fa_key: str, website: str, notes: str, salt: bytes):
-        """Saves a new password entry to the database."""
-
-        with sqlite3.connect(self.db_name) as conn:
-            cur = conn.cursor()
-            cur.execute('''
-                INSERT INTO passwords (user_id, title, username, password, two_fa_key, website, notes, salt)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, title, username, encrypted_password, two_fa_key, website, notes, salt))
+        """Creates the tables or upgrades them to the current schema, then checks the indexes."""
+
+        self.migrate()
+        self.verify_indexes()
+
+    def get_schema_version(self) -> int:
+        """Returns the schema version stored in the database file (PRAGMA user_version)."""
+
+        with self.connections.connection() as conn:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def migrate(self) -> int:
+        """Applies all pending schema migrations in order, each in its own transaction.
+
+        Returns:
+            int: The schema version after migrating.
+
+        Raises:
+            RuntimeError: If the database was created by a newer version of the app.
+        """
+
+        with self.connections.connection() as conn:
+            current = conn.execute('PRAGMA user_version').fetchone()[0]
+            if current > len(MIGRATIONS):
+                raise RuntimeError(f"Database schema version {current} is newer than this app ({len(MIGRATIONS)}).")
+
+            for version, migration in enumerate(MIGRATIONS, start=1):
+                if version <= current:
+                    continue
+
+                conn.execute('BEGIN IMMEDIATE') #Take the write lock, then re-check in case another process migrated
+                try:
+                    current = conn.execute('PRAGMA user_version').fetchone()[0]
+                    if version <= current:
+                        conn.rollback()
+                        continue
+
+                    migration(conn.cursor())
+                    conn.execute(f'PRAGMA user_version = {version}')
+                    conn.commit()
+                    current = version
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+
+            return current
+
+    def verify_indexes(self) -> List[str]:
+        """Checks that every expected index exists and recreates missing ones.
+
+        Returns:
+            list: Names of the indexes that had to be recreated.
+        """
+
+        with self.connections.connection() as conn:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            missing = [name for name in EXPECTED_INDEXES if name not in existing]
+
+            for name in missing:
+                conn.execute(EXPECTED_INDEXES[name])
+            return missing
+
+    def save_password(self, user_id: int, title: str, username: str, encrypted_password: bytes, two_fa_key: str, website: str, notes: str, salt: bytes, version: int = 1, search_tokens: Optional[Iterable[bytes]] = None) -> int:
+        """Saves a new password entry to the database and returns its ID.
+
+        Args:
+            search_tokens (optional): Blind index tokens of the entry, saved in the same transaction.
+                Without them the user's blind index is marked as incomplete.
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT INTO passwords (user_id, title, username, password, two_fa_key, website, notes, salt, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, title, username, encrypted_password, two_fa_key, website, notes, salt, version))
+            password_id = cur.lastrowid
+
+            if search_tokens is None:
+                self._invalidate_blind_index(cur, user_id)
+            else:
+                self._insert_search_tokens(cur, user_id, ((token, password_id) for token in search_tokens))
+            conn.commit()
+            return password_id
+
+    def save_passwords_many(self, user_id: int, rows: Iterable[Tuple], search_tokens: Optional[List[Iterable[bytes]]] = None) -> int:
+        """Saves many password entries with executemany inside a single transaction.
+
+        Args:
+            rows: (title, username, password, two_fa_key, website, notes, salt, version) tuples.
+                May be a generator; if it raises, nothing is saved.
+            search_tokens (optional): Blind index tokens per row, in row order. The list may be filled
+                by the rows generator while it runs. Without it the user's blind index is marked as incomplete.
+
+        Returns:
+            int: Number of saved entries.
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            if not conn.in_transaction:
+                cur.execute('BEGIN IMMEDIATE') #No other writer may insert rows between ours, their IDs must be consecutive
+            cur.execute('SELECT COALESCE(MAX(id), 0) FROM passwords')
+            first_id = cur.fetchone()[0]
+
+            cur.executemany('''
+                INSERT INTO passwords (user_id, title, username, password, two_fa_key, website, notes, salt, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', ((user_id,) + tuple(row) for row in rows))
+            saved = cur.rowcount
+
+            if search_tokens is None:
+                self._invalidate_blind_index(cur, user_id)
+            elif saved:
+                cur.execute(
+                    'SELECT id FROM passwords WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?',
+                    (user_id, first_id, saved)
+                )
+                password_ids = [row[0] for row in cur.fetchall()]
+                self._insert_search_tokens(cur, user_id, (
+                    (token, password_id)
+                    for password_id, tokens in zip(password_ids, search_tokens)
+                    for token in tokens
+                ))
+
             conn.commit()
+            return saved
 
     def get_passwords_by_user(self, user_id: int) -> List[Tuple]:
         """Retrieves all password entries for a specific user."""
 
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.connection() as conn:
             cur = conn.cursor()
             cur.execute('''
-                SELECT id, title, username, password, two_fa_key, website, notes, salt 
+                SELECT id, title, username, password, two_fa_key, website, notes, salt, version
                 FROM passwords WHERE user_id = ?
             ''', (user_id,))
             return cur.fetchall()
 
-    def get_password_titles_by_user(self, user_id: int) -> List[Tuple]:
-        """Retrieves the titles, usernames, and salts of all password entries for a specific user."""
+    def iter_passwords_by_user(self, user_id: int, batch_size: int = 500) -> Iterator[Tuple]:
+        """Yields all password entries of a user in ID order, fetching batch_size rows per query.
+
+        No cursor is held open between batches, so the caller may write to the database meanwhile.
+        """
 
-        conn = sqlite3.connect(self.db_name)
-        cur = conn.cursor()
+        last_id = 0
+        while True:
+            rows = self.get_passwords_page(user_id, last_id, batch_size)
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+
+    def get_passwords_page(self, user_id: int, after_id: int = 0, limit: int = 500) -> List[Tuple]:
+        """Retrieves the next limit full entries of a user after after_id, in ID order (keyset pagination)."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                SELECT id, title, username, password, two_fa_key, website, notes, salt, version
+                FROM passwords WHERE user_id = ? AND id > ?
+                ORDER BY id LIMIT ?
+            ''', (user_id, after_id, limit))
+            return cur.fetchall()
+
+    def count_passwords(self, user_id: int, after_id: int = 0) -> int:
+        """Counts the entries of a user with an ID above after_id."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT COUNT(*) FROM passwords WHERE user_id = ? AND id > ?', (user_id, after_id))
+            return cur.fetchone()[0]
+
+    def get_password_by_id(self, user_id: int, password_id: int) -> Optional[Tuple]:
+        """Retrieves a single password entry of a user by its ID."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                SELECT id, title, username, password, two_fa_key, website, notes, salt, version
+                FROM passwords WHERE id = ? AND user_id = ?
+            ''', (password_id, user_id))
+            return cur.fetchone()
+
+    def get_password_titles_by_user(self, user_id: int) -> List[Tuple]:
+        """Retrieves the titles, usernames, websites, salts and format versions of all password entries for a specific user."""
 
         query = """
-        SELECT id, title, username, salt
+        SELECT id, title, username, website, salt, version
         FROM passwords
         WHERE user_id = ?
         """
 
-        cur.execute(query, (user_id,))
-        result = cur.fetchall()
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(query, (user_id,))
+            return cur.fetchall()
+
+    def get_password_titles_page(self, user_id: int, after_id: int = 0, limit: int = 200) -> List[Tuple]:
+        """Retrieves the overview columns (like get_password_titles_by_user) of the next limit entries after after_id, in ID order.
+
+        Keyset pagination: every page is a range scan of the covering overview index, so a page
+        costs the same on every position and in every vault size (unlike LIMIT with OFFSET).
+        Pass the last ID of a page as after_id to get the next one.
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                SELECT id, title, username, website, salt, version
+                FROM passwords
+                WHERE user_id = ? AND id > ?
+                ORDER BY id LIMIT ?
+            ''', (user_id, after_id, limit))
+            return cur.fetchall()
+
+    def get_password_titles_by_ids(self, user_id: int, password_ids: Sequence[int]) -> List[Tuple]:
+        """Retrieves the overview columns (like get_password_titles_by_user) of the given entries, in ID order."""
+
+        rows = []
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            for start in range(0, len(password_ids), MAX_QUERY_PARAMETERS):
+                chunk = password_ids[start:start + MAX_QUERY_PARAMETERS]
+                cur.execute(f"""
+                    SELECT id, title, username, website, salt, version
+                    FROM passwords
+                    WHERE user_id = ? AND id IN ({', '.join('?' * len(chunk))})
+                """, (user_id, *chunk))
+                rows.extend(cur.fetchall())
+
+        rows.sort()
+        return rows
+
+    def find_passwords_by_tokens(self, user_id: int, tokens: Sequence[bytes]) -> List[int]:
+        """Returns the IDs of the user's entries that have every one of the given blind index tokens.
+
+        Answered from the primary key of password_search_tokens with a single query.
+        """
+
+        if not tokens:
+            return []
+        tokens = tokens[:MAX_QUERY_PARAMETERS] #Fewer tokens only add candidates, which the caller filters anyway
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT password_id
+                FROM password_search_tokens
+                WHERE user_id = ? AND token IN ({', '.join('?' * len(tokens))})
+                GROUP BY password_id
+                HAVING COUNT(*) = ?
+                ORDER BY password_id
+            """, (user_id, *tokens, len(tokens)))
+            return [row[0] for row in cur.fetchall()]
+
+    def get_blind_index_check(self, user_id: int) -> Optional[bytes]:
+        """Returns the check value of the key the user's blind index was built with (None if incomplete)."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT blind_index_check FROM user_keys WHERE user_id = ?', (user_id,))
+            row = cur.fetchone()
+            return row[0] if row else None
+
+    def clear_search_tokens(self, user_id: int):
+        """Deletes the user's blind index and marks it as incomplete (first step of a rebuild)."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('DELETE FROM password_search_tokens WHERE user_id = ?', (user_id,))
+            self._invalidate_blind_index(cur, user_id)
+            conn.commit()
+
+    def save_search_tokens(self, user_id: int, tokens: Iterable[Tuple[bytes, int]]):
+        """Saves a batch of (token, password ID) pairs of the blind index in one transaction."""
+
+        with self.connections.connection() as conn:
+            self._insert_search_tokens(conn.cursor(), user_id, tokens)
+            conn.commit()
+
+    def set_blind_index_check(self, user_id: int, check: bytes):
+        """Marks the user's blind index as complete for the key with the given check value."""
+
+        with self.connections.connection() as conn:
+            conn.execute('UPDATE user_keys SET blind_index_check = ? WHERE user_id = ?', (check, user_id))
+            conn.commit()
+
+    def _insert_search_tokens(self, cur: sqlite3.Cursor, user_id: int, tokens: Iterable[Tuple[bytes, int]]):
+        """Inserts (token, password ID) pairs of the blind index."""
+
+        cur.executemany(
+            'INSERT OR IGNORE INTO password_search_tokens (user_id, token, password_id) VALUES (?, ?, ?)',
+            ((user_id, token, password_id) for token, password_id in tokens)
+        )
+
+    def _invalidate_blind_index(self, cur: sqlite3.Cursor, user_id: int):
+        """Marks the user's blind index as incomplete, an entry was saved without tokens."""
+
+        cur.execute(
+            'UPDATE user_keys SET blind_index_check = NULL WHERE user_id = ? AND blind_index_check IS NOT NULL',
+            (user_id,)
+        )
+
+    def get_legacy_passwords_by_user(self, user_id: int, after_id: int, limit: int) -> List[Tuple]:
+        """Retrieves the next batch of format v1 (per-row salt) entries with an ID greater than after_id."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                SELECT id, title, username, password, two_fa_key, website, notes, salt
+                FROM passwords WHERE user_id = ? AND version = 1 AND id > ?
+                ORDER BY id LIMIT ?
+            ''', (user_id, after_id, limit))
+            return cur.fetchall()
+
+    def count_legacy_passwords(self, user_id: int) -> int:
+        """Counts the format v1 (per-row salt) entries of a user."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT COUNT(*) FROM passwords WHERE user_id = ? AND version = 1', (user_id,))
+            return cur.fetchone()[0]
+
+    def update_migrated_passwords(self, user_id: int, rows: Iterable[Tuple], last_id: int):
+        """Rewrites a batch of re-encrypted legacy entries and records the migration progress in one transaction.
+
+        Only rows that are still legacy v1 are overwritten, so a master password change that has
+        re-encrypted a row meanwhile is never undone.
+
+        Args:
+            rows: (title, username, password, two_fa_key, website, notes, salt, version, id) tuples.
+            last_id: Highest entry ID handled by this batch.
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.executemany('''
+                UPDATE passwords
+                SET title = ?, username = ?, password = ?, two_fa_key = ?, website = ?, notes = ?, salt = ?, version = ?
+                WHERE id = ? AND user_id = ? AND version = 1
+            ''', (row + (user_id,) for row in rows))
+            cur.execute('''
+                UPDATE user_keys
+                SET migration_last_id = ?, migrated_rows = migrated_rows + ?
+                WHERE user_id = ?
+            ''', (last_id, max(cur.rowcount, 0), user_id))
+            conn.commit()
 
-        conn.close()
+    def get_key_rotation(self, user_id: int) -> Optional[Tuple]:
+        """Retrieves the running master password change of a user, or None.
 
-        return result
+        Returns:
+            tuple: (new KEK salt, new wrapped data key, new data key encrypted with the old one,
+                new password hash, highest re-encrypted entry ID, number of re-encrypted entries,
+                KDF parameters of the new KEK salt)
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                SELECT kek_salt, wrapped_key, rotation_key, password_hash, last_id, rotated_rows, kdf_params
+                FROM key_rotations WHERE user_id = ?
+            ''', (user_id,))
+            return cur.fetchone()
+
+    def start_key_rotation(self, user_id: int, kek_salt: bytes, wrapped_key: bytes, rotation_key: bytes, password_hash: str, kdf_params: str) -> bool:
+        """Records the start of a master password change.
+
+        Returns:
+            bool: False if a change is already running (it is never overwritten).
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT OR IGNORE INTO key_rotations (user_id, kek_salt, wrapped_key, rotation_key, password_hash, kdf_params)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (user_id, kek_salt, wrapped_key, rotation_key, password_hash, kdf_params))
+            conn.commit()
+            return cur.rowcount == 1
+
+    def update_rotated_passwords(self, user_id: int, rows: Iterable[Tuple], last_id: int, rotated_rows: int):
+        """Rewrites a batch of re-encrypted entries and moves the rotation checkpoint in one transaction.
+
+        Args:
+            rows: (title, username, password, two_fa_key, website, notes, salt, version, id) tuples.
+            last_id: Highest entry ID handled by this batch.
+            rotated_rows: Number of entries re-encrypted by this batch.
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.executemany('''
+                UPDATE passwords
+                SET title = ?, username = ?, password = ?, two_fa_key = ?, website = ?, notes = ?, salt = ?, version = ?
+                WHERE id = ? AND user_id = ?
+            ''', (row + (user_id,) for row in rows))
+            cur.execute('''
+                UPDATE key_rotations
+                SET last_id = ?, rotated_rows = rotated_rows + ?
+                WHERE user_id = ?
+            ''', (last_id, rotated_rows, user_id))
+            conn.commit()
+
+    def finish_key_rotation(self, user_id: int):
+        """Completes a master password change in one transaction.
+
+        The new wrapped data key and password hash replace the old ones. The blind index is dropped,
+        because its tokens were made with the old key. The checkpoint is deleted.
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                UPDATE user_keys
+                SET (kek_salt, wrapped_key, kdf_params, blind_index_check) = (
+                    SELECT kek_salt, wrapped_key, kdf_params, NULL FROM key_rotations WHERE user_id = ?
+                )
+                WHERE user_id = ?
+            ''', (user_id, user_id))
+            cur.execute('''
+                UPDATE user
+                SET password = (SELECT password_hash FROM key_rotations WHERE user_id = ?)
+                WHERE id = ?
+            ''', (user_id, user_id))
+            cur.execute('DELETE FROM password_search_tokens WHERE user_id = ?', (user_id,))
+            cur.execute('DELETE FROM key_rotations WHERE user_id = ?', (user_id,))
+            conn.commit()
+
+    def get_user_key(self, user_id: int) -> Optional[Tuple]:
+        """Retrieves the KEK salt, the wrapped data key, the migration progress and the KDF parameters of the KEK salt of a user."""
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                SELECT kek_salt, wrapped_key, migration_last_id, migrated_rows, kdf_params
+                FROM user_keys WHERE user_id = ?
+            ''', (user_id,))
+            return cur.fetchone()
+
+    def save_user_key(self, user_id: int, kek_salt: bytes, wrapped_key: bytes, kdf_params: str) -> bool:
+        """Stores the wrapped data key of a user.
+
+        Returns:
+            bool: False if the user already has a data key (it is never overwritten).
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT OR IGNORE INTO user_keys (user_id, kek_salt, wrapped_key, kdf_params)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, kek_salt, wrapped_key, kdf_params))
+            conn.commit()
+            return cur.rowcount == 1
+
+    def rewrap_user_key(self, user_id: int, old_kek_salt: bytes, kek_salt: bytes, wrapped_key: bytes, kdf_params: str) -> bool:
+        """Replaces the KEK salt, wrapped data key and KDF parameters of a user, if the KEK salt is still old_kek_salt.
+
+        Returns:
+            bool: False if the key was changed meanwhile (e.g. by a finished master password change).
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                UPDATE user_keys SET kek_salt = ?, wrapped_key = ?, kdf_params = ?
+                WHERE user_id = ? AND kek_salt = ?
+            ''', (kek_salt, wrapped_key, kdf_params, user_id, old_kek_salt))
+            conn.commit()
+            return cur.rowcount == 1
+
+    def upgrade_legacy_passwords(self, user_id: int, rows: Iterable[Tuple]) -> int:
+        """Rewrites legacy entries that were re-encrypted when they were read, and counts them as migrated.
+
+        Unlike update_migrated_passwords, the migration checkpoint is left alone (the entries may lie
+        anywhere in the vault); only rows that are still legacy v1 are overwritten.
+
+        Args:
+            rows: (title, username, password, two_fa_key, website, notes, salt, version, id) tuples.
+
+        Returns:
+            int: Number of rewritten entries.
+        """
+
+        with self.connections.connection() as conn:
+            cur = conn.cursor()
+            cur.executemany('''
+                UPDATE passwords
+                SET title = ?, username = ?, password = ?, two_fa_key = ?, website = ?, notes = ?, salt = ?, version = ?
+                WHERE id = ? AND user_id = ? AND version = 1
+            ''', (row + (user_id,) for row in rows))
+            upgraded = max(cur.rowcount, 0)
+            cur.execute('UPDATE user_keys SET migrated_rows = migrated_rows + ? WHERE user_id = ?', (upgraded, user_id))
+            conn.commit()
+            return upgraded
+
+    def get_setting(self, key: str) -> Optional[str]:
+        """Retrieves a value of the settings table, or None if it is not set."""
+
+        with self.connections.connection() as conn:
+            row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_setting(self, key: str, value: str, overwrite: bool = True) -> str:
+        """Stores a value in the settings table and returns the stored value.
+
+        With overwrite=False an existing value is kept (and returned), so two processes that
+        set a default at the same time end up with the same value.
+        """
+
+        with self.connections.connection() as conn:
+            verb = 'INSERT OR REPLACE' if overwrite else 'INSERT OR IGNORE'
+            conn.execute(f'{verb} INTO settings (key, value) VALUES (?, ?)', (key, value))
+            conn.commit()
+            return conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()[0]
 
     def create_user(self, email: str, username: str, password_hash: str):
         """Creates a new user in the database after registration."""
 
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.connection() as conn:
             cur = conn.cursor()
             cur.execute('''
                 INSERT INTO user (email, username, password)
@@ -98,7 +869,7 @@ class Database:
     def get_user_by_credentials(self, username_or_email: str, password_hash: str) -> Optional[Tuple]:
         """Retrieves a user by their username or email and password hash for login."""
 
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.connection() as conn:
             cur = conn.cursor()
             cur.execute('''
                 SELECT id, email, username FROM user 
@@ -109,12 +880,13 @@ class Database:
     def delete_password(self, password_id: int) -> bool:
         """Deletes a password entry from the database by its ID."""
 
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.connection() as conn:
             cur = conn.cursor()
             cur.execute('SELECT id FROM passwords WHERE id = ?', (password_id,))
             if not cur.fetchone():
                 return False # Password ID does not exist
 
             cur.execute('DELETE FROM passwords WHERE id = ?', (password_id,))
+            cur.execute('DELETE FROM password_search_tokens WHERE password_id = ?', (password_id,))
             conn.commit()
             return True # Password successfully deleted
\ No newline at end of file
@@ -0,0 +1,168 @@
+# API
+import csv
+from typing import Dict, Iterator, Iterable, List, Optional, Callable, Set, Tuple
+
+# Services
+from services.password_service import PasswordService, ENTRY_FIELDS
+
+# Header names (lower case) that map onto each entry field, per export format
+COLUMN_ALIASES = {
+    "generic": {
+        "title": ("title", "titel", "name"),
+        "username": ("username", "benutzername", "user", "login", "email", "e-mail"),
+        "password": ("password", "passwort"),
+        "two_fa_key": ("two_fa_key", "totp", "otp", "2fa"),
+        "website": ("website", "webseite", "url", "uri"),
+        "notes": ("notes", "notizen", "notiz", "note", "comments"),
+    },
+    "bitwarden": {
+        "title": ("name",),
+        "username": ("login_username",),
+        "password": ("login_password",),
+        "two_fa_key": ("login_totp",),
+        "website": ("login_uri",),
+        "notes": ("notes",),
+    },
+    "keepass": { # KeePassXC and KeePass 2.x CSV exports
+        "title": ("title", "account"),
+        "username": ("username", "login name", "user name"),
+        "password": ("password",),
+        "two_fa_key": ("totp", "otp"),
+        "website": ("url", "web site"),
+        "notes": ("notes", "comments"),
+    },
+}
+
+IMPORT_FORMATS = ("auto",) + tuple(COLUMN_ALIASES)
+
+
+def detect_format(header: Iterable[str]) -> str:
+    """Guesses the export format from the CSV header."""
+
+    columns = {column.strip().lower() for column in header}
+
+    if {"login_username", "login_password"} <= columns:
+        return "bitwarden"
+    if {"group", "title"} <= columns or {"account", "login name"} <= columns:
+        return "keepass"
+    return "generic"
+
+
+def read_csv(path: str, fmt: str = "auto") -> Iterator[Dict[str, str]]:
+    """Reads a CSV export row by row and yields entry dicts with the keys of ENTRY_FIELDS.
+
+    Rows are streamed, so memory does not grow with the file size.
+
+    Raises:
+        ValueError: If the format is unknown or the file has no password column.
+    """
+
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unbekanntes Importformat: {fmt}")
+
+    with open(path, newline="", encoding="utf-8-sig") as file: #utf-8-sig drops a byte order mark
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        if fmt == "auto":
+            fmt = detect_format(header)
+
+        positions = {column.strip().lower(): i for i, column in enumerate(header)}
+        field_positions = {}
+        for field, aliases in COLUMN_ALIASES[fmt].items():
+            field_positions[field] = next((positions[alias] for alias in aliases if alias in positions), None)
+
+        if field_positions["password"] is None:
+            raise ValueError("Die CSV-Datei enthält keine Passwort-Spalte.")
+
+        type_position = positions.get("type") if fmt == "bitwarden" else None
+
+        for row in reader:
+            if not any(row):
+                continue #Blank line
+
+            if type_position is not None and type_position < len(row) and row[type_position] not in ("", "login", "1"):
+                continue #Bitwarden cards, identities and secure notes have no login
+
+            entry = {
+                field: (row[position].strip() if position is not None and position < len(row) else "")
+                for field, position in field_positions.items()
+            }
+            entry["password"] = row[field_positions["password"]] if field_positions["password"] < len(row) else "" #Keep whitespace in passwords
+            entry["title"] = entry["title"] or entry["website"] #Exports often leave the title empty
+            yield entry
+
+
+class ImportService:
+    def __init__(self, password_service: PasswordService):
+        """Imports entries from the CSV exports of other password managers."""
+
+        self.password_service = password_service
+
+    def import_csv(self, user_id: int, path: str, master_password: str, fmt: str = "auto", chunk_size: int = 500, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """Streams a CSV export into the vault.
+
+        Entries whose (title, username) pair already exists in the vault or earlier in the file
+        are skipped, as are rows without title or password. The remaining entries are encrypted
+        and committed in chunks of chunk_size, each chunk in its own transaction.
+
+        Args:
+            fmt: "auto", "generic", "bitwarden" or "keepass".
+            progress_callback: Called as progress_callback(rows_read, rows_imported) after every chunk.
+
+        Returns:
+            dict: Counts of "imported", "duplicates" and "invalid" rows.
+        """
+
+        seen = self._existing_keys(user_id, master_password)
+        result = {"imported": 0, "duplicates": 0, "invalid": 0}
+        rows_read = 0
+        chunk = []
+
+        for entry in read_csv(path, fmt):
+            rows_read += 1
+
+            is_valid, _ = self.password_service.validate_password_data(entry["title"], entry["password"])
+            if not is_valid:
+                result["invalid"] += 1
+                continue
+
+            key = (entry["title"], entry["username"])
+            if key in seen:
+                result["duplicates"] += 1
+                continue
+            seen.add(key)
+
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                result["imported"] += self._save_chunk(user_id, chunk, master_password)
+                chunk = []
+                if progress_callback:
+                    progress_callback(rows_read, result["imported"])
+
+        if chunk:
+            result["imported"] += self._save_chunk(user_id, chunk, master_password)
+        if progress_callback:
+            progress_callback(rows_read, result["imported"])
+
+        return result
+
+    def _existing_keys(self, user_id: int, master_password: str) -> Set[Tuple[str, str]]:
+        """Returns the (title, username) pairs that are already in the vault."""
+
+        return {(row.title, row.username) for row in self.password_service.get_password_overview(user_id, master_password)}
+
+    def _save_chunk(self, user_id: int, chunk: List[Dict[str, str]], master_password: str) -> int:
+        """Encrypts and commits one chunk of entries in a single transaction.
+
+        Raises:
+            BulkSaveError: If the chunk could not be saved (earlier chunks stay committed).
+        """
+
+        return self.password_service.save_passwords_many(
+            user_id,
+            ({field: entry[field] for field in ENTRY_FIELDS} for entry in chunk),
+            master_password
+        )
@@ -0,0 +1,212 @@
+# API
+import base64
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, NamedTuple, Tuple, Optional, Callable, Sequence
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+ITERATIONS = 480000 # Password gets hashed 480000 times (fixed cost before calibration, still used by legacy v1 rows)
+ALGORITHM = "pbkdf2-sha256"
+MIN_ITERATIONS = 310000 # Security floor, calibration never goes below it
+MAX_ITERATIONS = 2000000 # Upper bound, so a fast machine does not make the vault unbearable on slower ones
+TARGET_SECONDS = 0.5 # Default unlock time the calibration aims for
+
+
+class KeyDerivationCancelled(Exception):
+    """Raised when a running parallel key derivation is cancelled."""
+
+
+class KdfParams(NamedTuple):
+    """Parameters of a key derivation, stored next to the salt they were used with."""
+
+    algorithm: str
+    iterations: int
+
+    def encode(self) -> str:
+        """Returns the parameters as stored in the database, e.g. "pbkdf2-sha256:480000"."""
+
+        return f"{self.algorithm}:{self.iterations}"
+
+    @classmethod
+    def decode(cls, value: Optional[str]) -> "KdfParams":
+        """Parses stored parameters; None (salts stored before the parameters were recorded) means LEGACY_KDF.
+
+        Raises:
+            ValueError: If the algorithm is unknown or the value is malformed.
+        """
+
+        if value is None:
+            return LEGACY_KDF
+
+        algorithm, _, iterations = value.partition(":")
+        if algorithm != ALGORITHM or not iterations.isdigit():
+            raise ValueError(f"Unbekannte KDF-Parameter: {value}")
+        return cls(algorithm, int(iterations))
+
+
+LEGACY_KDF = KdfParams(ALGORITHM, ITERATIONS) # Every salt stored before calibration existed
+
+
+def derive_key(password: str, salt: bytes, iterations: int = ITERATIONS) -> bytes:
+    """Derives a URL-safe base64 encoded Fernet key from the password and salt with PBKDF2HMAC."""
+
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(), #Use SHA256 hash algorithm
+        length=32, #Lenght of the key in bytes (32 bytes = 256 bits)
+        salt=salt, #Use provided salt
+        iterations=iterations,
+    )
+    key_raw = kdf.derive(password.encode()) #Derive the key
+    return base64.urlsafe_b64encode(key_raw) #Encode the key in a URL-safe base64 format
+
+
+def calibrate_iterations(target_seconds: float = TARGET_SECONDS, minimum: int = MIN_ITERATIONS, maximum: int = MAX_ITERATIONS, sample_iterations: int = 20000, rounds: int = 3) -> int:
+    """Measures this machine and returns the PBKDF2 iteration count for one derivation of about target_seconds.
+
+    The fastest of a few short sample runs is scaled up linearly (PBKDF2 is linear in the
+    iterations), rounded to 10000 and clamped to [minimum, maximum].
+    """
+
+    salt = os.urandom(16)
+    fastest = float("inf")
+    for _ in range(max(1, rounds)):
+        start = time.perf_counter()
+        derive_key("calibration", salt, sample_iterations)
+        fastest = min(fastest, time.perf_counter() - start)
+
+    iterations = int(target_seconds / max(fastest, 1e-9) * sample_iterations)
+    iterations = round(iterations, -4)
+    return max(minimum, min(maximum, iterations))
+
+
+def _derive_chunk(password: str, salts: List[bytes], iterations: int) -> List[Tuple[bytes, bytes]]:
+    """Worker entry point: derives the keys for one chunk of salts in a child process."""
+
+    return [(salt, derive_key(password, salt, iterations)) for salt in salts]
+
+
+class ParallelKeyDeriver:
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 4):
+        """Derives many PBKDF2 keys at once on a pool of worker processes.
+
+        Args:
+            max_workers: Number of worker processes (defaults to the number of CPU cores).
+            chunk_size: Number of salts sent to a worker per task.
+        """
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self._executor = None # Created on first use, worker startup is not free
+        self._lock = threading.Lock()
+        self._running_events = set() # Cancel events of the derivations currently running (one per call)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Returns the worker pool, starting it if necessary.
+
+        Workers are never forked from the (multithreaded) app itself, a fork taken while another
+        thread holds a lock can deadlock the child. With forkserver they are forked from a clean
+        server process. Like with spawn, the main module is imported there (for the app main.py and
+        with it customtkinter, once per server); the window is only created under __main__.
+        """
+
+        with self._lock:
+            if self._executor is None:
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(method))
+            return self._executor
+
+    def derive(self, password: str, salts: Sequence[bytes], iterations: int = ITERATIONS,
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               cancel_event: Optional[threading.Event] = None) -> Dict[bytes, bytes]:
+        """Derives the keys for all distinct salts in parallel.
+
+        Args:
+            progress_callback: Called as progress_callback(done, total) after each finished chunk.
+            cancel_event (optional): Caller-owned event that cancels this derivation when set,
+                in addition to cancel().
+
+        Returns:
+            dict: Maps each salt to its Fernet key.
+
+        Raises:
+            KeyDerivationCancelled: If cancelled before all keys were derived.
+        """
+
+        unique_salts = list(dict.fromkeys(salts)) #Drop duplicates, keep order
+        keys = {}
+        if not unique_salts:
+            return keys
+
+        own_event = threading.Event() #Set by cancel(), never shared with other calls
+        with self._lock:
+            self._running_events.add(own_event)
+        try:
+            return self._derive(password, unique_salts, iterations, progress_callback, own_event, cancel_event)
+        finally:
+            with self._lock:
+                self._running_events.discard(own_event)
+
+    def _derive(self, password: str, unique_salts: List[bytes], iterations: int,
+                progress_callback: Optional[Callable[[int, int], None]],
+                own_event: threading.Event, cancel_event: Optional[threading.Event]) -> Dict[bytes, bytes]:
+        """Derives the keys of one derive() call (see there)."""
+
+        keys = {}
+
+        def cancelled():
+            return own_event.is_set() or (cancel_event is not None and cancel_event.is_set())
+
+        # A single worker gains nothing from the process round trip
+        if self.max_workers == 1:
+            for salt in unique_salts:
+                if cancelled():
+                    raise KeyDerivationCancelled()
+                keys[salt] = derive_key(password, salt, iterations)
+                if progress_callback:
+                    progress_callback(len(keys), len(unique_salts))
+            return keys
+
+        executor = self._get_executor()
+        pending = {
+            executor.submit(_derive_chunk, password, unique_salts[i:i + self.chunk_size], iterations)
+            for i in range(0, len(unique_salts), self.chunk_size)
+        }
+
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+
+            if cancelled():
+                for future in pending:
+                    future.cancel() #Chunks already running finish in the background
+                raise KeyDerivationCancelled()
+
+            for future in done:
+                keys.update(future.result())
+
+            if done and progress_callback:
+                progress_callback(len(keys), len(unique_salts))
+
+        return keys
+
+    def cancel(self):
+        """Cancels every derivation that is currently running, on any thread (later calls are not affected).
+
+        To cancel one particular derivation, pass a cancel_event to derive() instead.
+        """
+
+        with self._lock:
+            for event in self._running_events:
+                event.set()
+
+    def shutdown(self):
+        """Stops the worker processes."""
+
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
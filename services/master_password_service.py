@@ -0,0 +1,107 @@
+# API
+import threading
+from typing import Callable, Optional, Tuple
+
+# Services
+from services.auth_service import AuthService
+from services.password_service import PasswordService
+from services.key_derivation import KeyDerivationCancelled
+
+
+class MasterPasswordService:
+    def __init__(self, password_service: PasswordService, auth_service: AuthService):
+        """Changes the master password of a user.
+
+        Every entry is re-encrypted with a new data key, batch by batch, each batch in its own
+        transaction together with a checkpoint. An interrupted change (closed app, crash) is resumed
+        with the old master password, which stays the login password until the change is finished.
+        """
+
+        self.password_service = password_service
+        self.auth_service = auth_service
+
+    def validate_change(self, username: str, master_password: str, new_password_1: str, new_password_2: str) -> Tuple[bool, str]:
+        """Validates the input of a master password change."""
+
+        # Checks if all fields are filled
+        if not master_password or not new_password_1 or not new_password_2:
+            return False, "Bitte füllen Sie alle Felder aus."
+
+        # Checks if the new passwords match
+        if new_password_1 != new_password_2:
+            return False, "Beide neuen Passwörter müssen gleich sein."
+
+        if new_password_1 == master_password:
+            return False, "Das neue Master-Passwort muss sich vom aktuellen unterscheiden."
+
+        # Checks the current master password
+        if not self.auth_service.authenticate_user(username, master_password):
+            return False, "Das aktuelle Master-Passwort ist falsch."
+
+        # If no issues, return True
+        return True, ""
+
+    def is_pending(self, user_id: int) -> bool:
+        """Checks if an interrupted master password change has to be resumed."""
+
+        return self.password_service.get_master_password_change_progress(user_id) is not None
+
+    def change_master_password(self, user_id: int, master_password: str, new_master_password: str, progress_callback: Optional[Callable[[int, int], None]] = None, cancel_event: Optional[threading.Event] = None, batch_size: int = 500) -> int:
+        """Changes the master password and re-encrypts the vault (run validate_change first).
+
+        Returns:
+            int: Number of re-encrypted entries.
+
+        Raises:
+            ValueError: If another change is still running (resume it first).
+            KeyDerivationCancelled: If cancel_event is set; the change is resumed later (see resume).
+        """
+
+        started = self.password_service.begin_master_password_change(
+            user_id, master_password, new_master_password,
+            self.auth_service.hash_password(new_master_password)
+        )
+        if not started:
+            raise ValueError("Eine Änderung des Master-Passworts läuft bereits.")
+
+        return self.resume(user_id, master_password, progress_callback, cancel_event, batch_size)
+
+    def resume(self, user_id: int, master_password: str, progress_callback: Optional[Callable[[int, int], None]] = None, cancel_event: Optional[threading.Event] = None, batch_size: int = 500) -> int:
+        """Re-encrypts the remaining entries of a running change and finishes it.
+
+        Args:
+            master_password: The old master password.
+            progress_callback: Called as progress_callback(done, total) after every batch.
+
+        Returns:
+            int: Number of re-encrypted entries of the whole change.
+
+        Raises:
+            cryptography.fernet.InvalidToken: If the master password is wrong.
+            KeyDerivationCancelled: If cancel_event is set (the checkpoint is kept).
+        """
+
+        progress = self.password_service.get_master_password_change_progress(user_id)
+        if progress is None:
+            return 0
+
+        self.password_service.unlock_vault(user_id, master_password) #Fails early on a wrong password
+        done, total = progress
+        if progress_callback:
+            progress_callback(done, total)
+
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise KeyDerivationCancelled()
+
+            handled = self.password_service.rotate_key_batch(user_id, master_password, batch_size)
+            if not handled:
+                break
+
+            done += handled
+            total = max(total, done) #Entries added meanwhile
+            if progress_callback:
+                progress_callback(done, total)
+
+        self.password_service.finish_master_password_change(user_id)
+        return done
@@ -1,76 +1,348 @@
 # API
 import secrets
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import base64
-from typing import List, Dict, Tuple, Optional
+import threading
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Callable
 
 # Services
 from services.database import Database
+from services.key_derivation import derive_key, calibrate_iterations, ParallelKeyDeriver, KeyDerivationCancelled, KdfParams, ALGORITHM, LEGACY_KDF, TARGET_SECONDS
+from services import blind_index
+from services import record_format
+from services import tracing
+
+# Models
+from models import user_session
+from models.entry_cache import EntryCache
+from models.search_index import SearchIndex
+from models.password_entry import PasswordEntry, OverviewRow
+
+LEGACY_VERSION = 1 # Every row has its own salt and PBKDF2-derived key
+VAULT_VERSION = 2 # Rows are encrypted with the user's data key, which is wrapped by one PBKDF2-derived key
+RECORD_VERSION = 3 # Like v2, but one token for the overview fields and one for the secret fields (see services/record_format.py)
+
+ENTRY_FIELDS = ("title", "username", "password", "two_fa_key", "website", "notes") # Fields of an entry, in storage order
+KDF_POLICY_SETTING = "kdf_policy" # Settings key of the calibrated KDF parameters for new KEK salts
+BLIND_INDEX_SETTING = "blind_index.{user_id}" # Settings key of a user's blind index choice ("1" on, anything else off)
+
+
+class BulkSaveError(Exception):
+    """Raised when a bulk save is rejected; nothing of the batch has been saved.
+
+    Attributes:
+        errors: (entry index, message) pairs for every rejected entry.
+    """
+
+    def __init__(self, message: str, errors: Optional[List[Tuple[int, str]]] = None):
+        super().__init__(message)
+        self.errors = errors or []
 
 class PasswordService:
-    def __init__(self, database: Database):
-        """Handles encryption, decryption, and storage of password data using Fernet and PBKDF2HMAC."""
+    def __init__(self, database: Database, kdf_workers: Optional[int] = None, entry_cache_size: int = 256, entry_cache_ttl: float = 300, session_provider: Optional[Callable[[], user_session.UserSession]] = None):
+        """Handles encryption, decryption, and storage of password data using Fernet and PBKDF2HMAC.
+
+        Args:
+            database (Database): Storage for the encrypted entries.
+            kdf_workers (optional): Number of processes used to derive legacy row keys in parallel
+                (defaults to the number of CPU cores, 1 disables the process pool).
+            entry_cache_size: Maximum number of decrypted entries kept for load_password (0 disables the cache).
+            entry_cache_ttl: Seconds a cached entry may stay unread before it is wiped.
+            session_provider (optional): Returns the session of the current caller, whose key cache is used
+                (defaults to the app's shared session). The owner of the sessions then also wipes the
+                entry cache when a session ends.
+        """
 
         self.db = database
-
-    def generate_key(self, password: str, salt: bytes) -> bytes:
+        self.key_deriver = ParallelKeyDeriver(max_workers=kdf_workers)
+        self.entry_cache = EntryCache(max_size=entry_cache_size, ttl=entry_cache_ttl)
+        self.get_session = session_provider or user_session.get_session
+        if session_provider is None:
+            user_session.get_session().add_clear_listener(self.entry_cache.clear) # Wiped on login and logout
+        self._kdf_policy = None # Read from the settings (or calibrated) on first use
+        self._kdf_lock = threading.Lock()
+
+    @tracing.traced("kdf.generate_key", "kdf")
+    def generate_key(self, password: str, salt: bytes, params: KdfParams = LEGACY_KDF) -> bytes:
         """Generates a Fernet key from the given password and salt."""
 
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(), #Use SHA256 hash algorithm
-            length=32, #Lenght of the key in bytes (32 bytes = 256 bits)
-            salt=salt, #Use provided salt
-            iterations=480000, #Password gets hashed 480000 times
+        return derive_key(password, salt, params.iterations)
+
+    def get_kdf_policy(self) -> KdfParams:
+        """Returns the KDF parameters for new KEK salts.
+
+        The iteration count is calibrated on this machine the first time it is needed (see
+        key_derivation.calibrate_iterations) and stored in the settings, so every later start uses
+        the same value. Salts stored with other parameters are rewrapped when they are next unlocked.
+        """
+
+        with self._kdf_lock:
+            if self._kdf_policy is None:
+                stored = self.db.get_setting(KDF_POLICY_SETTING)
+                if stored is None:
+                    calibrated = KdfParams(ALGORITHM, calibrate_iterations())
+                    stored = self.db.set_setting(KDF_POLICY_SETTING, calibrated.encode(), overwrite=False) #Another process may have calibrated first
+                self._kdf_policy = KdfParams.decode(stored)
+            return self._kdf_policy
+
+    def calibrate_kdf(self, target_seconds: float = TARGET_SECONDS) -> KdfParams:
+        """Measures this machine again and stores the iteration count for an unlock of about target_seconds as the new policy."""
+
+        policy = KdfParams(ALGORITHM, calibrate_iterations(target_seconds))
+        self.db.set_setting(KDF_POLICY_SETTING, policy.encode())
+        with self._kdf_lock:
+            self._kdf_policy = policy
+        return policy
+
+    def get_cipher(self, master_password: str, salt: bytes, params: KdfParams = LEGACY_KDF) -> Fernet:
+        """Returns a Fernet for the master password and salt (derived with the salt's KDF parameters).
+
+        Keys derived for the logged-in user's master password are kept in the session's
+        key cache, so each salt only runs through PBKDF2 once per login.
+        """
+
+        session = self.get_session()
+        use_cache = session.matches_master_password(master_password)
+
+        if use_cache:
+            cached = session.get_key_cache().get(salt)
+            if cached is not None:
+                return cached
+
+        f = Fernet(self.generate_key(master_password, salt, params)) #Derive the key (expensive)
+
+        if use_cache:
+            session.get_key_cache().put(salt, f)
+        return f
+
+    @tracing.traced("kdf.prefetch_keys", "kdf")
+    def prefetch_keys(self, master_password: str, salts: Iterable[bytes], progress_callback: Optional[Callable[[int, int], None]] = None, cancel_event: Optional[threading.Event] = None):
+        """Derives the keys of all salts missing from the session's key cache in parallel.
+
+        Used for legacy v1 rows, which each need their own PBKDF2 run until the vault is migrated.
+
+        Raises:
+            KeyDerivationCancelled: If cancel_event is set or cancel_key_derivation() is called meanwhile.
+        """
+
+        session = self.get_session()
+        if not session.matches_master_password(master_password):
+            return
+
+        cache = session.get_key_cache()
+        missing = [salt for salt in dict.fromkeys(salts) if salt and not cache.contains(salt)]
+
+        if len(missing) < 2: #Nothing to parallelize
+            return
+
+        keys = self.key_deriver.derive(master_password, missing, progress_callback=progress_callback, cancel_event=cancel_event)
+        for salt, key in keys.items():
+            cache.put(salt, Fernet(key))
+
+    def cancel_key_derivation(self):
+        """Cancels a running parallel key derivation (the waiting call raises KeyDerivationCancelled)."""
+
+        self.key_deriver.cancel()
+
+    def close(self):
+        """Stops the key derivation worker processes."""
+
+        self.key_deriver.shutdown()
+
+    def unlock_vault(self, user_id: int, master_password: str) -> Fernet:
+        """Returns a Fernet for the user's data key (vault formats v2 and v3).
+
+        The data key is random and stored wrapped by a key-encryption key derived from the
+        master password, so unlocking costs one PBKDF2 run regardless of the vault size.
+        A data key is created on first use.
+
+        While a master password change is running, entries are encrypted with the old or the new
+        data key; a MultiFernet is returned then, which decrypts with both and encrypts with the new one.
+
+        Raises:
+            cryptography.fernet.InvalidToken: If the master password is wrong.
+        """
+
+        keys = self._unlock_data_keys(user_id, master_password)
+        if len(keys) == 1:
+            return Fernet(keys[0])
+        return MultiFernet([Fernet(key) for key in keys])
+
+    def _unlock_data_key(self, user_id: int, master_password: str) -> bytes:
+        """Returns the data key that new entries are encrypted with (the new one during a master password change)."""
+
+        return self._unlock_data_keys(user_id, master_password)[0]
+
+    @tracing.traced("vault.unlock_data_key", "crypto")
+    def _unlock_data_keys(self, user_id: int, master_password: str) -> List[bytes]:
+        """Returns the user's data keys, the current one first: [new, old] during a master password change.
+
+        The new data key is stored encrypted with the old one, so a change can be resumed with the
+        old master password alone (it stays the login password until the change is finished).
+        """
+
+        data_key = self._unwrap_data_key(user_id, master_password)
+
+        rotation = self.db.get_key_rotation(user_id)
+        if rotation is None:
+            return [data_key]
+        return [Fernet(data_key).decrypt(rotation[2]), data_key]
+
+    def _unwrap_data_key(self, user_id: int, master_password: str) -> bytes:
+        """Returns the user's unwrapped data key (see unlock_vault), creating it on first use.
+
+        A data key wrapped with other KDF parameters than the current policy is rewrapped right
+        away; the data key itself stays the same, so no entry has to be re-encrypted.
+        """
+
+        record = self.db.get_user_key(user_id)
+        policy = self.get_kdf_policy()
+
+        if record is None:
+            self._verify_legacy_password(user_id, master_password) #Never wrap a new data key with a wrong password
+
+            kek_salt = secrets.token_bytes(16) #Generate a random 16-byte salt for the key-encryption key
+            data_key = Fernet.generate_key() #Random data key for all entries of this user
+            wrapped_key = self.get_cipher(master_password, kek_salt, policy).encrypt(data_key)
+
+            if self.db.save_user_key(user_id, kek_salt, wrapped_key, policy.encode()):
+                return data_key
+            record = self.db.get_user_key(user_id) #Another caller created the key first
+
+        kek_salt, wrapped_key, params = record[0], record[1], KdfParams.decode(record[4])
+        kek = self.get_cipher(master_password, kek_salt, params) #Cached for the session after the first unlock
+        data_key = kek.decrypt(wrapped_key)
+
+        if params != policy:
+            new_salt = secrets.token_bytes(16)
+            new_wrapped_key = self.get_cipher(master_password, new_salt, policy).encrypt(data_key)
+            self.db.rewrap_user_key(user_id, kek_salt, new_salt, new_wrapped_key, policy.encode()) #Lost to a concurrent change otherwise, which is fine
+
+        return data_key
+
+    def _verify_legacy_password(self, user_id: int, master_password: str):
+        """Checks the master password against an existing v1 entry, if there is one.
+
+        Raises:
+            cryptography.fernet.InvalidToken: If the entry cannot be decrypted with the password.
+        """
+
+        rows = self.db.get_legacy_passwords_by_user(user_id, 0, 1)
+        if rows:
+            encrypted_title, salt = rows[0][1], rows[0][7]
+            self.get_cipher(master_password, salt).decrypt(encrypted_title)
+
+    def _row_cipher(self, vault: Fernet, master_password: str, salt: bytes, version: int) -> Fernet:
+        """Returns the Fernet that decrypts a row of the given format version."""
+
+        if version >= VAULT_VERSION:
+            return vault
+        return self.get_cipher(master_password, salt) #Legacy row with its own derived key (always LEGACY_KDF)
+
+    def _upgraded_row(self, vault: Fernet, entry: PasswordEntry) -> Tuple:
+        """Re-encrypts a legacy v1 entry that has just been read as a v3 record (a row for Database.upgrade_legacy_passwords).
+
+        Legacy rows carry a salt of their own with the fixed LEGACY_KDF cost instead of the
+        calibrated policy; once they have been decrypted, upgrading them costs no further KDF run.
+        """
+
+        return self.encrypt_record(vault, *entry.fields()) + (b"", RECORD_VERSION, entry.id)
+
+    @tracing.traced("crypto.encrypt_fields", "crypto")
+    def encrypt_fields(self, f: Fernet, title: str, username: str, password: str, two_fa_key: str, website: str, notes: str) -> Tuple[bytes, bytes, bytes, bytes, bytes, bytes]:
+        """Encrypts each field of an entry with the given Fernet."""
+
+        return (
+            f.encrypt(title.encode()), #Encrypt title
+            f.encrypt(username.encode()), #Encrypt username
+            f.encrypt(password.encode()), #Encrypt password
+            f.encrypt(two_fa_key.encode()), #Encrypt 2FA key
+            f.encrypt(website.encode()), #Encrypt website
+            f.encrypt(notes.encode()), #Encrypt notes
+        )
+
+    @tracing.traced("crypto.decrypt_fields", "crypto")
+    def decrypt_fields(self, f: Fernet, encrypted_title: bytes, encrypted_username: bytes, encrypted_password: bytes, encrypted_two_fa_key: bytes, encrypted_website: bytes, encrypted_notes: bytes) -> Tuple[str, str, str, str, str, str]:
+        """Decrypts each field of an entry with the given Fernet.
+
+        Raises:
+            cryptography.fernet.InvalidToken: If decryption fails (wrong key or corrupted data).
+        """
+
+        return (
+            f.decrypt(encrypted_title).decode(), #Decrypt title
+            f.decrypt(encrypted_username).decode(), #Decrypt username
+            f.decrypt(encrypted_password).decode(), #Decrypt password
+            f.decrypt(encrypted_two_fa_key).decode(), #Decrypt 2FA key
+            f.decrypt(encrypted_website).decode(), #Decrypt website
+            f.decrypt(encrypted_notes).decode(), #Decrypt notes
         )
-        password_bytes = password.encode() #Convert password to bytes
-        key_raw = kdf.derive(password_bytes) #Derive the key
-        return base64.urlsafe_b64encode(key_raw) #Encode the key in a URL-safe base64 format
+
+    @tracing.traced("crypto.encrypt_record", "crypto")
+    def encrypt_record(self, f: Fernet, title: str, username: str, password: str, two_fa_key: str, website: str, notes: str) -> Tuple[bytes, bytes, bytes, bytes, bytes, bytes]:
+        """Encrypts an entry in record format v3, as values of the six field columns.
+
+        The overview fields are sealed in the title column and the secret fields in the password
+        column, so the overview never decrypts passwords; the other columns stay empty.
+        """
+
+        return (
+            record_format.seal(f, (title, username, website)), #Overview token
+            b"",
+            record_format.seal(f, (password, two_fa_key, notes), compress=False), #Secret token, never compressed (length would leak)
+            b"",
+            b"",
+            b"",
+        )
+
+    @tracing.traced("crypto.decrypt_record", "crypto")
+    def decrypt_record(self, f: Fernet, overview_token: bytes, secret_token: bytes) -> Tuple[str, str, str, str, str, str]:
+        """Decrypts an entry in record format v3 into its six fields (in ENTRY_FIELDS order).
+
+        Raises:
+            cryptography.fernet.InvalidToken: If decryption fails (wrong key or corrupted data).
+        """
+
+        title, username, website = record_format.open_sealed(f, overview_token)
+        password, two_fa_key, notes = record_format.open_sealed(f, secret_token)
+        return (title, username, password, two_fa_key, website, notes)
 
     def encrypt_data(self, title: str, username: str, password: str, two_fa_key: str, website: str, notes: str, master_password: str) -> Tuple[bytes, bytes, bytes, bytes, bytes, bytes, bytes]:
-        """Encrypts the provided data using the master password."""
+        """Encrypts the provided data using the master password (legacy format v1 with a per-row salt)."""
 
         salt = secrets.token_bytes(16) #Generate a random 16-byte salt
-        key = self.generate_key(master_password, salt) #Generate key from master password and salt
-        f = Fernet(key) #Create Fernet object with the generated key
+        f = self.get_cipher(master_password, salt) #Derive the key and remember it for this session
 
-        encrypted_title = f.encrypt(title.encode()) #Encrypt title
-        encrypted_username = f.encrypt(username.encode()) #Encrypt username
-        encrypted_password = f.encrypt(password.encode()) #Encrypt password
-        encrypted_two_fa_key = f.encrypt(two_fa_key.encode()) #Encrypt 2FA key
-        encrypted_website = f.encrypt(website.encode()) #Encrypt website
-        encrypted_notes = f.encrypt(notes.encode()) #Encrypt notes
-        return encrypted_title, encrypted_username, encrypted_password, encrypted_two_fa_key, encrypted_website, encrypted_notes, salt #Return encrypted data and salt
+        return self.encrypt_fields(f, title, username, password, two_fa_key, website, notes) + (salt,) #Return encrypted data and salt
 
     def decrypt_data(self, encrypted_title: bytes, encrypted_username: bytes, encrypted_password: bytes, encrypted_two_fa_key: bytes, encrypted_website: bytes, encrypted_notes: bytes, master_password: str,salt: bytes) -> Tuple[str, str, str, str, str, str]:
-        """Decrypts the provided encrypted data using the master password.
+        """Decrypts the provided encrypted data using the master password (legacy format v1).
 
         Raises:
             cryptography.fernet.InvalidToken: If decryption fails (wrong key or corrupted data).
         """
 
-        key = self.generate_key(master_password, salt) #Generate key from master password and salt
-        f = Fernet(key) #Create Fernet object with the generated key
+        f = self.get_cipher(master_password, salt) #Cached key for this salt, derived on first use
 
-        title = f.decrypt(encrypted_title).decode() #Decrypt title
-        username = f.decrypt(encrypted_username).decode() #Decrypt username
-        password = f.decrypt(encrypted_password).decode() #Decrypt password
-        two_fa_key = f.decrypt(encrypted_two_fa_key).decode() #Decrypt 2FA key
-        website = f.decrypt(encrypted_website).decode() #Decrypt website
-        notes = f.decrypt(encrypted_notes).decode() #Decrypt notes
-
-        return title, username, password, two_fa_key, website, notes #Return decrypted data
+        return self.decrypt_fields(
+            f, encrypted_title, encrypted_username, encrypted_password,
+            encrypted_two_fa_key, encrypted_website, encrypted_notes
+        )
 
-    def save_password(self,user_id: int,title: str,username: str,password: str,master_password: str,two_fa_key: str = "",website: str = "",notes: str = ""):
-        """Saves the encrypted password data to the database."""
+    def save_password(self,user_id: int,title: str,username: str,password: str,master_password: str,two_fa_key: str = "",website: str = "",notes: str = "") -> int:
+        """Saves the encrypted password data to the database and returns the new entry ID."""
 
-        encrypted_title, encrypted_username, encrypted_password, encrypted_two_fa_key, encrypted_website, encrypted_notes, salt = self.encrypt_data(
-            title, username, password, two_fa_key, website, notes, master_password
+        data_key = self._unlock_data_key(user_id, master_password)
+        encrypted_title, encrypted_username, encrypted_password, encrypted_two_fa_key, encrypted_website, encrypted_notes = self.encrypt_record(
+            Fernet(data_key), title, username, password, two_fa_key, website, notes
         )
 
-        # Save encrypted data to the database
-        self.db.save_password(
+        search_tokens = None
+        index_key = self._blind_index_key(user_id, data_key)
+        if index_key is not None:
+            search_tokens = blind_index.entry_tokens(index_key, title, username, website)
+
+        # Save encrypted data to the database (v3 rows carry no salt of their own)
+        password_id = self.db.save_password(
             user_id=user_id,
             title=encrypted_title,
             username=encrypted_username,
@@ -78,61 +350,483 @@ class PasswordService:
             two_fa_key=encrypted_two_fa_key,
             website=encrypted_website,
             notes=encrypted_notes,
-            salt=salt
+            salt=b"",
+            version=RECORD_VERSION,
+            search_tokens=search_tokens
         )
+        self.entry_cache.invalidate(password_id)
+        return password_id
+
+    def save_passwords_many(self, user_id: int, entries: Iterable[Dict], master_password: str, progress_callback: Optional[Callable[[int, int], None]] = None, batch_size: int = 500) -> int:
+        """Saves many entries at once, all or nothing.
 
-    def load_passwords(self, user_id: int, master_password: str) -> List[Dict]:
+        Every entry is validated first, then all entries are encrypted with the user's data key
+        (one unlock for the whole batch) and written with executemany in a single transaction.
+
+        Args:
+            entries: Dicts with the keys of ENTRY_FIELDS (only title and password are required).
+            progress_callback: Called as progress_callback(done, total) after every encrypted batch.
+            batch_size: Number of entries encrypted between two progress reports.
+
+        Returns:
+            int: Number of saved entries.
+
+        Raises:
+            BulkSaveError: If any entry is invalid or the write fails (nothing is saved).
+        """
+
+        entries = list(entries)
+        total = len(entries)
+
+        errors = []
+        for index, entry in enumerate(entries):
+            is_valid, error_msg = self.validate_password_data(entry.get("title"), entry.get("password"))
+            if not is_valid:
+                errors.append((index, error_msg))
+
+        if errors:
+            raise BulkSaveError(f"{len(errors)} von {total} Einträgen sind ungültig.", errors)
+
+        data_key = self._unlock_data_key(user_id, master_password)
+        vault = Fernet(data_key)
+        index_key = self._blind_index_key(user_id, data_key)
+        search_tokens = [] if index_key is not None else None # Filled by encrypted_rows() while the rows are inserted
+
+        def encrypted_rows():
+            for index, entry in enumerate(entries, start=1):
+                fields = [entry.get(field) or "" for field in ENTRY_FIELDS]
+                if index_key is not None:
+                    search_tokens.append(blind_index.entry_tokens(index_key, fields[0], fields[1], fields[4]))
+                yield self.encrypt_record(vault, *fields) + (b"", RECORD_VERSION)
+
+                if progress_callback and (index % batch_size == 0 or index == total):
+                    progress_callback(index, total)
+
+        try:
+            return self.db.save_passwords_many(user_id, encrypted_rows(), search_tokens=search_tokens)
+        except Exception as e: #The transaction has been rolled back
+            raise BulkSaveError(f"Speichern fehlgeschlagen, es wurde nichts gespeichert: {e}") from e
+
+    def load_passwords(self, user_id: int, master_password: str) -> List[PasswordEntry]:
         """Loads and decrypts all passwords for the given user.
             All data is only safed in th RAM and never stored unencrypted on disk.
         """
 
-        passwords = [] #Empty list to store decrypted passwords
-        rows = self.db.get_passwords_by_user(user_id)
+        return list(self.iter_passwords(user_id, master_password))
+
+    def iter_passwords(self, user_id: int, master_password: str, batch_size: int = 500, skipped: Optional[List[int]] = None) -> Iterator[PasswordEntry]:
+        """Decrypts the passwords of the given user one at a time, in ID order.
+
+        Only one batch of encrypted rows is held in memory, so the memory use does not depend
+        on the vault size. Entries that cannot be decrypted are skipped.
+
+        Args:
+            skipped (optional): Receives the IDs of the skipped entries (e.g. to report them after an export).
+        """
+
+        try:
+            vault = self.unlock_vault(user_id, master_password)
+        except InvalidToken: #Wrong master password, nothing can be decrypted
+            return
+
+        batch = []
+        for row in self.db.iter_passwords_by_user(user_id, batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield from self._decrypt_rows(user_id, vault, master_password, batch, skipped)
+                batch = []
+
+        yield from self._decrypt_rows(user_id, vault, master_password, batch, skipped)
+
+    def _decrypt_rows(self, user_id: int, vault: Fernet, master_password: str, rows: List[Tuple], skipped: Optional[List[int]] = None) -> Iterator[PasswordEntry]:
+        """Decrypts a batch of full rows, deriving the keys of its legacy rows in parallel first.
+
+        The legacy rows of the batch are upgraded to v3 records after the batch has been read.
+        """
+
+        self.prefetch_keys(master_password, (row[7] for row in rows if row[8] == LEGACY_VERSION))
 
-        # Decrypt each password and add to the list
+        upgraded = []
+        # Decrypt each password
         for row in rows:
-            password_id, encrypted_title, encrypted_username, encrypted_password, encrypted_two_fa_key, encrypted_website, encrypted_notes, salt = row
             try:
-                title, username, password, two_fa_key, website, notes = self.decrypt_data(
-                    encrypted_title, encrypted_username, encrypted_password,
-                    encrypted_two_fa_key, encrypted_website, encrypted_notes,
-                    master_password, salt
-                )
-                passwords.append({
-                    "id": password_id,
-                    "title": title,
-                    "username": username,
-                    "password": password,
-                    "two_fa_key": two_fa_key,
-                    "website": website,
-                    "notes": notes,
-                })
+                entry = self._decrypt_row(vault, master_password, row)
             except Exception: #If decryption fails (e.g., wrong master password), skip this entry
+                if skipped is not None:
+                    skipped.append(row[0])
                 continue
 
-        return passwords
+            if row[8] == LEGACY_VERSION:
+                upgraded.append(self._upgraded_row(vault, entry)) #Before the caller may wipe the entry
+            yield entry
+
+        if upgraded:
+            self.db.upgrade_legacy_passwords(user_id, upgraded)
+
+    def load_password(self, user_id: int, password_id: int, master_password: str) -> Optional[PasswordEntry]:
+        """Loads and decrypts a single password entry of the given user by its ID.
+
+        Entries decrypted with the logged-in user's master password are kept in the entry cache,
+        so opening the same entry again needs neither a query nor a decryption.
+
+        Returns:
+            PasswordEntry: The decrypted entry, or None if it does not exist or cannot be decrypted.
+        """
+
+        use_cache = self.get_session().matches_master_password(master_password)
+        if use_cache:
+            cached = self.entry_cache.get(password_id, user_id)
+            if cached is not None:
+                return cached
+
+        row = self.db.get_password_by_id(user_id, password_id)
+        if row is None:
+            return None
+
+        try:
+            vault = self.unlock_vault(user_id, master_password)
+            entry = self._decrypt_row(vault, master_password, row)
+        except Exception: #If decryption fails (e.g., wrong master password)
+            return None
+
+        if row[8] == LEGACY_VERSION:
+            self.db.upgrade_legacy_passwords(user_id, [self._upgraded_row(vault, entry)])
+
+        if use_cache:
+            self.entry_cache.put(password_id, user_id, entry)
+        return entry
+
+    def _decrypt_row(self, vault: Fernet, master_password: str, row: Tuple) -> PasswordEntry:
+        """Decrypts a full database row (id, six encrypted fields, salt, version) into an entry.
+
+        Raises:
+            cryptography.fernet.InvalidToken: If decryption fails (wrong key or corrupted data).
+        """
+
+        password_id, encrypted_title, encrypted_username, encrypted_password, encrypted_two_fa_key, encrypted_website, encrypted_notes, salt, version = row
+
+        if version == RECORD_VERSION:
+            return PasswordEntry(password_id, *self.decrypt_record(vault, encrypted_title, encrypted_password))
+
+        fields = self.decrypt_fields(
+            self._row_cipher(vault, master_password, salt, version),
+            encrypted_title, encrypted_username, encrypted_password,
+            encrypted_two_fa_key, encrypted_website, encrypted_notes
+        )
 
-    def get_password_overview(self, user_id: int, master_password: str) -> List[Tuple[str, str]]:
-        """Retrieves an overview of titles and usernames for the given user (without decrypting full entries)."""
+        return PasswordEntry(password_id, *fields)
+
+    def get_password_overview(self, user_id: int, master_password: str) -> List[OverviewRow]:
+        """Retrieves an overview of IDs, titles, usernames and websites for the given user (without decrypting full entries)."""
 
         overview = [] #Empty list to store overview
-        rows = self.db.get_password_titles_by_user(user_id)
+        for rows in self.iter_password_overview(user_id, master_password):
+            overview.extend(rows) #Add to overview list
+
+        return overview
+
+    def iter_password_overview(self, user_id: int, master_password: str, page_size: int = 200, cancel_event: Optional[threading.Event] = None, first_page_size: Optional[int] = None, after_id: int = 0) -> Iterator[List[OverviewRow]]:
+        """Yields the overview page by page, in ID order, as lists of OverviewRow objects.
 
-        for password_id, encrypted_title, encrypted_username, salt in rows:
+        Every page is fetched with one keyset query (see Database.get_password_titles_page) and
+        decrypted before the next one is read, so the first page is ready after the same time in
+        every vault size and only one page of encrypted rows is held in memory.
+
+        Args:
+            page_size: Entries per page.
+            first_page_size (optional): Entries of the first page, e.g. just enough to fill the screen.
+            after_id: Start after this entry ID (the last ID of an earlier page).
+
+        Raises:
+            KeyDerivationCancelled: If cancel_event is set while legacy keys are being derived.
+        """
+
+        try:
+            vault = self.unlock_vault(user_id, master_password)
+        except InvalidToken: #Wrong master password, nothing can be decrypted
+            return
+
+        limit = first_page_size or page_size
+        while cancel_event is None or not cancel_event.is_set():
+            rows = self.db.get_password_titles_page(user_id, after_id, limit)
+            if not rows:
+                return
+
+            self.prefetch_keys(master_password, (row[4] for row in rows if row[5] == LEGACY_VERSION), cancel_event=cancel_event)
+            yield self._decrypt_overview_rows(vault, master_password, rows)
+
+            if len(rows) < limit: #Last page
+                return
+            after_id = rows[-1][0] #Also past entries that could not be decrypted
+            limit = page_size
+
+    @tracing.traced("crypto.decrypt_overview_rows", "crypto")
+    def _decrypt_overview_rows(self, vault: Fernet, master_password: str, rows: List[Tuple]) -> List[OverviewRow]:
+        """Decrypts (id, title, username, website, salt, version) rows into overview rows, skipping broken ones."""
+
+        overview = []
+        for password_id, encrypted_title, encrypted_username, encrypted_website, salt, version in rows:
             try:
-                key = self.generate_key(master_password, salt)
-                f = Fernet(key)
+                f = self._row_cipher(vault, master_password, salt, version)
+
+                if version == RECORD_VERSION: #One token holds all overview fields
+                    overview.append(OverviewRow(password_id, *record_format.open_sealed(f, encrypted_title)))
+                    continue
 
                 title = f.decrypt(encrypted_title).decode() #Decrypt title
                 username = f.decrypt(encrypted_username).decode() #Decrypt username
-                overview.append((title, username)) #Add to overview list
+                website = f.decrypt(encrypted_website).decode() if encrypted_website else "" #Decrypt website (needed by the search)
+                overview.append(OverviewRow(password_id, title, username, website))
 
             except Exception: #If decryption fails, skip this entry
                 continue
 
+        tracing.count("crypto.decrypted_overview_rows", len(overview))
         return overview
 
-    def find_password(self, passwords: List[Dict], title: str, username: str) -> Optional[Dict]:
+    def search_passwords(self, user_id: int, master_password: str, query: str) -> List[OverviewRow]:
+        """Searches titles, usernames and websites.
+
+        With the user's blind index enabled (see set_blind_index_enabled), one indexed query returns
+        the entries that have all tokens of the query; only those are decrypted and checked against
+        the query. If the index is missing or was built with another key (e.g. after a master password
+        change), it is rebuilt first. Otherwise the overview is decrypted and searched in memory and
+        no tokens are written.
+
+        Returns:
+            list: Matching overview rows in ID order.
+        """
+
+        if not self.is_blind_index_enabled(user_id):
+            return self._search_overview(user_id, master_password, query)
+
+        try:
+            data_key = self._unlock_data_key(user_id, master_password)
+        except InvalidToken: #Wrong master password, nothing can be found
+            return []
+
+        index_key = blind_index.derive_index_key(data_key)
+        if self.db.get_blind_index_check(user_id) != blind_index.index_check(index_key):
+            self.rebuild_blind_index(user_id, master_password)
+
+        tokens = blind_index.query_tokens(index_key, query)
+        if not tokens:
+            return []
+
+        candidates = self.db.find_passwords_by_tokens(user_id, tokens)
+        rows = self.db.get_password_titles_by_ids(user_id, candidates)
+        self.prefetch_keys(master_password, (row[4] for row in rows if row[5] == LEGACY_VERSION))
+
+        return [
+            row for row in self._decrypt_overview_rows(Fernet(data_key), master_password, rows)
+            if blind_index.matches(query, row.title, row.username, row.website)
+        ]
+
+    def _search_overview(self, user_id: int, master_password: str, query: str) -> List[OverviewRow]:
+        """Searches the decrypted overview with a temporary SearchIndex (the search without blind index)."""
+
+        index = SearchIndex()
+        rows = {}
+        for page in self.iter_password_overview(user_id, master_password):
+            index.add_many(page)
+            rows.update((row.id, row) for row in page)
+
+        return [rows[password_id] for password_id in sorted(index.search(query))]
+
+    def _blind_index_key(self, user_id: int, data_key: bytes) -> Optional[bytes]:
+        """Returns the blind index key if saved entries must carry search tokens, None otherwise.
+
+        The choice is stored per user, so the app, the CLI and the API server all keep the same index.
+        """
+
+        if self.is_blind_index_enabled(user_id):
+            return blind_index.derive_index_key(data_key)
+        return None
+
+    def is_blind_index_enabled(self, user_id: int) -> bool:
+        """Checks whether the user opted into the blind index (off by default)."""
+
+        return self.db.get_setting(BLIND_INDEX_SETTING.format(user_id=user_id)) == "1"
+
+    def set_blind_index_enabled(self, user_id: int, master_password: str, enabled: bool, cancel_event: Optional[threading.Event] = None) -> int:
+        """Turns the user's blind index on (and builds it) or off (and deletes its tokens).
+
+        The tokens reveal which entries share words to anyone with the database file, so the
+        index is only kept for users who turn it on.
+
+        Returns:
+            int: Number of indexed entries (0 when turned off).
+
+        Raises:
+            InvalidToken: If the master password is wrong (nothing is changed).
+            KeyDerivationCancelled: If cancel_event is set while the index is built (it is completed on the next search).
+        """
+
+        self._unlock_data_key(user_id, master_password)
+        self.db.set_setting(BLIND_INDEX_SETTING.format(user_id=user_id), "1" if enabled else "0")
+        if not enabled:
+            self.db.clear_search_tokens(user_id)
+            return 0
+        return self.rebuild_blind_index(user_id, master_password, cancel_event)
+
+    def rebuild_blind_index(self, user_id: int, master_password: str, cancel_event: Optional[threading.Event] = None) -> int:
+        """Rebuilds the user's blind index from the decrypted overview.
+
+        Needed when the index is turned on, when the index key changes (a new data key after a
+        master password change) or when entries were saved while it was off. The tokens are written batch by batch, so
+        other writers are never blocked for long; the index only counts as complete at the end.
+
+        Returns:
+            int: Number of indexed entries.
+
+        Raises:
+            KeyDerivationCancelled: If cancel_event is set (the index stays incomplete and is rebuilt on the next search).
+        """
+
+        index_key = blind_index.derive_index_key(self._unlock_data_key(user_id, master_password))
+        indexed = 0
+
+        self.db.clear_search_tokens(user_id)
+        for rows in self.iter_password_overview(user_id, master_password, cancel_event=cancel_event):
+            self.db.save_search_tokens(user_id, (
+                (token, row.id)
+                for row in rows
+                for token in blind_index.entry_tokens(index_key, row.title, row.username, row.website)
+            ))
+            indexed += len(rows)
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise KeyDerivationCancelled()
+
+        self.db.set_blind_index_check(user_id, blind_index.index_check(index_key))
+        return indexed
+
+    def migrate_vault_batch(self, user_id: int, master_password: str, batch_size: int = 50) -> int:
+        """Re-encrypts the next batch of legacy v1 entries with the user's data key (as v3 records).
+
+        The vault stays usable while it is migrated, because all formats are read side by side.
+        Each batch is written in one transaction together with the migration progress.
+
+        Returns:
+            int: Number of entries handled by this batch (0 when the vault is fully migrated).
+        """
+
+        vault = self.unlock_vault(user_id, master_password)
+        last_id = self.db.get_user_key(user_id)[2] #Highest entry ID handled so far
+
+        rows = self.db.get_legacy_passwords_by_user(user_id, last_id, batch_size)
+        if not rows:
+            return 0
+
+        migrated = []
+        for password_id, encrypted_title, encrypted_username, encrypted_password, encrypted_two_fa_key, encrypted_website, encrypted_notes, salt in rows:
+            try:
+                fields = self.decrypt_data(
+                    encrypted_title, encrypted_username, encrypted_password,
+                    encrypted_two_fa_key, encrypted_website, encrypted_notes,
+                    master_password, salt
+                )
+            except InvalidToken: #Undecryptable entries are left untouched
+                continue
+
+            migrated.append(self.encrypt_record(vault, *fields) + (b"", RECORD_VERSION, password_id))
+
+        self.db.update_migrated_passwords(user_id, migrated, last_id=rows[-1][0])
+        return len(rows)
+
+    def begin_master_password_change(self, user_id: int, master_password: str, new_master_password: str, new_password_hash: str) -> bool:
+        """Starts a master password change.
+
+        A new data key is created and stored wrapped by a key derived from the new master password,
+        together with the new password hash, in the checkpoint of the change. The entries are then
+        re-encrypted by rotate_key_batch; the old master password stays valid until
+        finish_master_password_change.
+
+        Returns:
+            bool: False if a change is already running (it has to be finished first).
+
+        Raises:
+            cryptography.fernet.InvalidToken: If the master password is wrong.
+        """
+
+        if self.db.get_key_rotation(user_id) is not None:
+            return False
+
+        data_key = self._unlock_data_key(user_id, master_password)
+
+        new_data_key = Fernet.generate_key() #Random data key, nothing of the old one is reused
+        kek_salt = secrets.token_bytes(16)
+        policy = self.get_kdf_policy()
+        wrapped_key = Fernet(self.generate_key(new_master_password, kek_salt, policy)).encrypt(new_data_key)
+        rotation_key = Fernet(data_key).encrypt(new_data_key) #Lets an interrupted change resume with the old password
+
+        return self.db.start_key_rotation(user_id, kek_salt, wrapped_key, rotation_key, new_password_hash, policy.encode())
+
+    def rotate_key_batch(self, user_id: int, master_password: str, batch_size: int = 500) -> int:
+        """Re-encrypts the next batch of entries with the new data key of a running master password change.
+
+        Every entry, including legacy v1 rows, is rewritten as a v3 record. Each batch is written in
+        one transaction together with the checkpoint, so only one batch is held in memory and an
+        interrupted change continues after the last written batch.
+
+        Args:
+            master_password: The old master password (valid until the change is finished).
+
+        Returns:
+            int: Number of entries handled by this batch (0 when every entry is re-encrypted).
+        """
+
+        rotation = self.db.get_key_rotation(user_id)
+        if rotation is None:
+            return 0
+
+        rows = self.db.get_passwords_page(user_id, rotation[4], batch_size)
+        if not rows:
+            return 0
+
+        vault = self.unlock_vault(user_id, master_password) #Decrypts with both keys, encrypts with the new one
+        self.prefetch_keys(master_password, (row[7] for row in rows if row[8] == LEGACY_VERSION))
+
+        rotated = []
+        for row in rows:
+            try:
+                entry = self._decrypt_row(vault, master_password, row)
+            except Exception: #Undecryptable entries are left untouched
+                continue
+
+            rotated.append(self.encrypt_record(vault, *entry.fields()) + (b"", RECORD_VERSION, entry.id))
+            entry.wipe()
+
+        self.db.update_rotated_passwords(user_id, rotated, last_id=rows[-1][0], rotated_rows=len(rotated))
+        return len(rows)
+
+    def finish_master_password_change(self, user_id: int):
+        """Replaces the wrapped data key and the password hash by the new ones (after the last rotate_key_batch).
+
+        From now on only the new master password unlocks the vault, the session has to log in again.
+        The blind index was built with the old key; it is dropped and rebuilt on the next search.
+        """
+
+        self.db.finish_key_rotation(user_id)
+
+    def get_master_password_change_progress(self, user_id: int) -> Optional[Tuple[int, int]]:
+        """Returns (re-encrypted entries, total entries) of a running master password change, or None if none is running."""
+
+        rotation = self.db.get_key_rotation(user_id)
+        if rotation is None:
+            return None
+
+        last_id, rotated_rows = rotation[4], rotation[5]
+        return rotated_rows, rotated_rows + self.db.count_passwords(user_id, last_id)
+
+    def get_migration_progress(self, user_id: int) -> Tuple[int, int]:
+        """Returns how many entries have been migrated to the data key and how many legacy entries remain."""
+
+        record = self.db.get_user_key(user_id)
+        migrated_rows = record[3] if record else 0
+        return migrated_rows, self.db.count_legacy_passwords(user_id)
+
+    def find_password(self, passwords: List[PasswordEntry], title: str, username: str) -> Optional[PasswordEntry]:
         """Finds a password entry by title and username.
 
         Example:
@@ -140,7 +834,7 @@ class PasswordService:
         """
 
         return next(
-            (item for item in passwords if item["title"] == title and item["username"] == username),
+            (item for item in passwords if item.title == title and item.username == username),
             None
         )
 
@@ -158,6 +852,11 @@ class PasswordService:
 
         return True, ""
 
+    def get_entry_cache_stats(self) -> Dict[str, float]:
+        """Returns the hit rate and counters of the decrypted-entry cache (for tuning its size and TTL)."""
+
+        return self.entry_cache.stats()
+
     def delete_password(self, password_id: int) -> bool:
         """Deletes a password entry by its ID.
 
@@ -165,4 +864,5 @@ class PasswordService:
             bool: True if deletion was successful, False otherwise.
         """
 
+        self.entry_cache.invalidate(password_id)
         return self.db.delete_password(password_id) #Return True if deletion was successful
\ No newline at end of file
@@ -0,0 +1,83 @@
+# API
+import base64
+import struct
+import zlib
+from cryptography.fernet import Fernet
+from typing import Sequence, Tuple
+
+# Record format (vault format v3): the fields of an entry are packed into one binary payload that is
+# encrypted as a single Fernet token, instead of one token per field. Every token carries its own
+# version, timestamp, IV and HMAC and is base64 encoded; one token saves that overhead for all but one
+# field, and decrypting needs one HMAC check and one AES run.
+#
+# Payload: flag byte, then (4-byte big-endian length, UTF-8 bytes) per field; with FLAG_ZLIB the
+# part after the flag byte is zlib compressed. Tokens are stored raw (not base64) in BLOB columns.
+#
+# Payloads holding secrets are never compressed: compressed together with user-supplied or imported
+# text (notes), the ciphertext length would tell something about the secret (CRIME/BREACH style).
+
+FLAG_PLAIN = 0
+FLAG_ZLIB = 1
+COMPRESS_MIN_SIZE = 256 # Shorter payloads are never compressed (long overview fields are the usual case)
+_LENGTH = struct.Struct(">I")
+
+
+def pack_fields(fields: Sequence[str], compress: bool = True) -> bytes:
+    """Packs the fields into a payload, compressing it if allowed and if that makes it smaller."""
+
+    body = b"".join(_LENGTH.pack(len(data)) + data for data in (field.encode() for field in fields))
+
+    if compress and len(body) >= COMPRESS_MIN_SIZE:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) < len(body):
+            return bytes((FLAG_ZLIB,)) + compressed
+    return bytes((FLAG_PLAIN,)) + body
+
+
+def unpack_fields(payload: bytes) -> Tuple[str, ...]:
+    """Unpacks the fields of a payload created by pack_fields.
+
+    Raises:
+        ValueError: If the payload is malformed.
+    """
+
+    if not payload:
+        raise ValueError("Leerer Datensatz")
+
+    flag, body = payload[0], payload[1:]
+    if flag == FLAG_ZLIB:
+        body = zlib.decompress(body)
+    elif flag != FLAG_PLAIN:
+        raise ValueError(f"Unbekanntes Datensatzformat {flag}")
+
+    fields = []
+    position = 0
+    while position < len(body):
+        (length,) = _LENGTH.unpack_from(body, position)
+        position += _LENGTH.size
+        if position + length > len(body):
+            raise ValueError("Abgeschnittener Datensatz")
+        fields.append(body[position:position + length].decode())
+        position += length
+
+    return tuple(fields)
+
+
+def seal(f: Fernet, fields: Sequence[str], compress: bool = True) -> bytes:
+    """Encrypts the fields as one Fernet token and returns it raw (without the base64 encoding).
+
+    Args:
+        compress: False for fields that contain secrets (see above).
+    """
+
+    return base64.urlsafe_b64decode(f.encrypt(pack_fields(fields, compress)))
+
+
+def open_sealed(f: Fernet, token: bytes) -> Tuple[str, ...]:
+    """Decrypts a token created by seal and returns its fields.
+
+    Raises:
+        cryptography.fernet.InvalidToken: If the token was not created with this key or was changed.
+    """
+
+    return unpack_fields(f.decrypt(base64.urlsafe_b64encode(token)))
@@ -0,0 +1,62 @@
+# API
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+# Startup measurement, switched on by the environment:
+#   EURA_STARTUP_PROFILE=1      print the report on exit
+#   EURA_STARTUP_PROFILE=exit   print the report and quit as soon as the startup is complete
+# Run with "python -X importtime main.py" for a per-module breakdown of the imports.
+PROFILE_ENV = "EURA_STARTUP_PROFILE"
+
+
+class StartupProfile:
+    def __init__(self, start: float):
+        """Records the cost of the startup phases (imports, window construction, database setup).
+
+        Args:
+            start: time.perf_counter() value at the start of main.py, all times are relative to it.
+        """
+
+        self.start = start
+        setting = os.environ.get(PROFILE_ENV, "").strip()
+        self.enabled = bool(setting) and setting != "0"
+        self.exit_when_ready = setting == "exit"
+        self._records: List[Tuple[str, float, float, str]] = [] # (phase, start [ms], duration [ms], thread)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the enclosed block as one startup phase (no-op while disabled)."""
+
+        if not self.enabled:
+            yield
+            return
+
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._records.append((name, (begin - self.start) * 1000, (end - begin) * 1000, threading.current_thread().name))
+
+    def mark(self, name: str):
+        """Records a point in time (e.g. "login window shown")."""
+
+        if self.enabled:
+            with self._lock:
+                self._records.append((name, (time.perf_counter() - self.start) * 1000, 0.0, threading.current_thread().name))
+
+    def report(self) -> str:
+        """Returns the recorded phases and marks in start order."""
+
+        with self._lock:
+            records = sorted(self._records, key=lambda record: record[1])
+
+        lines = [f"{'phase':<36} {'start [ms]':>10} {'took [ms]':>10}  thread"]
+        for name, begin, duration, thread in records:
+            lines.append(f"{name:<36} {begin:>10.1f} {duration:>10.1f}  {thread}")
+        return "\n".join(lines)
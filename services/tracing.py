@@ -0,0 +1,287 @@
+# API
+import atexit
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Tracing is switched on by the environment, before the app starts:
+#   EURA_TRACE=1            trace to eura_trace.json in the working directory
+#   EURA_TRACE=path.json    trace to the given file
+# The summary table (count, p50, p99 per span) is printed on exit.
+TRACE_ENV = "EURA_TRACE"
+DEFAULT_TRACE_FILE = "eura_trace.json"
+MAX_EVENTS = 1_000_000 # Older events are dropped from the Chrome trace (the summary keeps counting)
+MAX_SAMPLES = 10_000 # Durations kept per span name for the percentiles (a uniform sample of all runs)
+
+
+class _NullSpan:
+    """Shared no-op context manager returned by span() while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class SpanStats:
+    """Running count and total of one span name, plus a bounded sample of its durations.
+
+    The sample is a reservoir (Algorithm R): every run has the same chance to be kept, so the
+    percentiles stay representative while the memory stays fixed however long the app runs.
+    """
+
+    __slots__ = ("count", "total_ms", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.samples: List[float] = []
+
+    def add(self, duration_ms: float, rng: random.Random):
+        self.count += 1
+        self.total_ms += duration_ms
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(duration_ms)
+        else:
+            slot = rng.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = duration_ms
+
+
+class Tracer:
+    """Collects timed spans and counters and exports them as Chrome trace JSON and a summary table."""
+
+    def __init__(self):
+        self.enabled = False
+        self.start_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.events: List[Dict] = [] # Chrome trace events ("X" spans and "C" counters)
+        self.span_stats: Dict[str, SpanStats] = defaultdict(SpanStats) # Span name -> count, total and sampled durations in ms
+        self._rng = random.Random()
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.breakdowns: Dict[str, Dict] = {} # Name of a breakdown span -> time spent in its child spans, last run
+
+    def enable(self):
+        """Starts recording."""
+
+        self.enabled = True
+
+    def reset(self):
+        """Drops everything recorded so far."""
+
+        with self._lock:
+            self.events.clear()
+            self.span_stats.clear()
+            self.counters.clear()
+            self.breakdowns.clear()
+            self.start_ns = time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name: str, category: str = "app", breakdown: bool = False, **args):
+        """Times the enclosed block.
+
+        Args:
+            category: Chrome trace category (e.g. "db", "crypto", "ui").
+            breakdown: Aggregate all spans nested in this one (same thread) by name, so the
+                latest run can be shown as a breakdown (e.g. the parts of an unlock).
+            args: Extra values shown with the event in the trace viewer.
+        """
+
+        stack = getattr(self._local, "breakdowns", None)
+        if stack is None:
+            stack = self._local.breakdowns = []
+
+        parts = defaultdict(lambda: [0, 0.0]) if breakdown else None
+        if breakdown:
+            stack.append(parts)
+
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            duration_ms = (end - start) / 1e6
+
+            if breakdown:
+                stack.pop()
+                self.breakdowns[name] = {
+                    "total_ms": duration_ms,
+                    "parts": {part: {"count": count, "ms": ms} for part, (count, ms) in parts.items()},
+                }
+            for outer in stack: #Every enclosing breakdown span counts this one
+                outer[name][0] += 1
+                outer[name][1] += duration_ms
+
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.start_ns) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = args
+
+            with self._lock:
+                self.span_stats[name].add(duration_ms, self._rng)
+                if len(self.events) < MAX_EVENTS:
+                    self.events.append(event)
+
+    def count(self, name: str, value: int = 1):
+        """Adds value to a counter (shown as a counter track in the trace)."""
+
+        with self._lock:
+            self.counters[name] += value
+            if len(self.events) < MAX_EVENTS:
+                self.events.append({
+                    "name": name,
+                    "ph": "C",
+                    "ts": (time.perf_counter_ns() - self.start_ns) / 1000,
+                    "pid": os.getpid(),
+                    "args": {name: self.counters[name]},
+                })
+
+    def summary(self) -> List[Dict]:
+        """Returns count, total, p50 and p99 (in ms) per span name, slowest total first.
+
+        Count and total cover every run; the percentiles come from the sample (exact up to MAX_SAMPLES runs).
+        """
+
+        with self._lock:
+            stats = {name: (entry.count, entry.total_ms, sorted(entry.samples)) for name, entry in self.span_stats.items()}
+
+        rows = []
+        for name, (count, total_ms, values) in stats.items():
+            rows.append({
+                "name": name,
+                "count": count,
+                "total_ms": total_ms,
+                "p50_ms": values[int(0.50 * (len(values) - 1))],
+                "p99_ms": values[int(0.99 * (len(values) - 1))],
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format_summary(self) -> str:
+        """Returns the summary and the counters as a text table."""
+
+        lines = [f"{'span':<40} {'count':>8} {'total [ms]':>11} {'p50 [ms]':>9} {'p99 [ms]':>9}"]
+        for row in self.summary():
+            lines.append(f"{row['name']:<40} {row['count']:>8} {row['total_ms']:>11.1f} {row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<40} {value:>8}")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str):
+        """Writes the events as Chrome trace JSON (open with chrome://tracing or ui.perfetto.dev)."""
+
+        with self._lock:
+            events = list(self.events)
+
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+tracer = Tracer()
+
+
+def is_enabled() -> bool:
+    """Checks if tracing is switched on."""
+
+    return tracer.enabled
+
+
+def span(name: str, category: str = "app", breakdown: bool = False, **args):
+    """Times the enclosed block (see Tracer.span); a shared no-op while tracing is disabled."""
+
+    if not tracer.enabled:
+        return NULL_SPAN
+    return tracer.span(name, category, breakdown, **args)
+
+
+def count(name: str, value: int = 1):
+    """Adds value to a counter; does nothing while tracing is disabled."""
+
+    if tracer.enabled:
+        tracer.count(name, value)
+
+
+def traced(name: Optional[str] = None, category: str = "app", breakdown: bool = False) -> Callable:
+    """Decorator that wraps every call of the function in a span.
+
+    While tracing is disabled the function is returned unchanged, so it costs nothing.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if not tracer.enabled:
+            return function
+
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, category, breakdown):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def traced_methods(category: str) -> Callable:
+    """Class decorator that traces every public method (e.g. every Database query) as "<category>.<method>".
+
+    Generator methods are skipped, a span around them would include the caller's work between
+    the yields; they trace their queries themselves. While tracing is disabled the class is
+    returned unchanged.
+    """
+
+    def decorator(cls):
+        if not tracer.enabled:
+            return cls
+
+        for attribute, value in list(vars(cls).items()):
+            if callable(value) and not attribute.startswith("_") and not inspect.isgeneratorfunction(value):
+                setattr(cls, attribute, traced(f"{category}.{attribute}", category)(value))
+        return cls
+
+    return decorator
+
+
+def _write_on_exit(path: str):
+    """Writes the trace file and prints the summary (registered with atexit)."""
+
+    try:
+        tracer.export_chrome_trace(path)
+        print(tracer.format_summary())
+        print(f"Trace written to {path}")
+    except Exception as e: #Never fail the shutdown because of the trace
+        print(f"Trace could not be written: {e}")
+
+
+def _configure_from_environment():
+    """Enables tracing if EURA_TRACE is set (at import time, before the traced modules are loaded)."""
+
+    setting = os.environ.get(TRACE_ENV, "").strip()
+    if not setting or setting == "0":
+        return
+
+    tracer.enable()
+    atexit.register(_write_on_exit, DEFAULT_TRACE_FILE if setting == "1" else setting)
+
+
+_configure_from_environment()
@@ -1,25 +1,33 @@
 #API
 import customtkinter as ctk
-from PIL import Image
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 
 #Config
 import config.colors as colors
 
 #Services
 from services.password_service import PasswordService
+from services.import_service import ImportService
+from services.backup_service import BackupService
+
+#UI
+from ui.background_worker import BackgroundWorker
+from ui.icon_cache import get_icon_cache
 
 #Models
 from models import user_session
 
 class AddPasswordWindow(ctk.CTkFrame):
-    def __init__(self, master, password_service: PasswordService):
+    def __init__(self, master, password_service: PasswordService, import_service: ImportService, backup_service: BackupService, worker: BackgroundWorker):
         """
         Initializes the add password sidebar.
 
         Args:
             master: Parent widget (main application window).
             password_service (PasswordService): Service for password validation and storage.
+            import_service (ImportService): Service for importing CSV exports of other password managers.
+            backup_service (BackupService): Service for encrypted backups of the vault.
+            worker (BackgroundWorker): Runs imports, exports and restores off the main loop.
         """
         super().__init__(
             master,
@@ -31,14 +39,14 @@ class AddPasswordWindow(ctk.CTkFrame):
         )
 
         self.password_service = password_service
+        self.import_service = import_service
+        self.backup_service = backup_service
+        self.worker = worker
         self.master = master
         self.grid_propagate(False) #Takes up a fixed amount of space and does not adapt to child objects
 
         # Close icon for the add password sidebar
-        self.add_window_close_icon = ctk.CTkImage(
-            light_image=Image.open("assets/close_icon.png"),
-            size=(15, 15)
-        )
+        self.add_window_close_icon = get_icon_cache().get_icon("close_icon.png", (15, 15))
 
         self.grid_columnconfigure(0, weight=1)
         self.entries = []
@@ -62,7 +70,7 @@ class AddPasswordWindow(ctk.CTkFrame):
         close_button.grid(row=0, column=0, padx=(0, 20), pady=(27, 20), sticky="e")
 
         # Save button for the add new password sidebar
-        save_button = ctk.CTkButton(
+        self.save_button = ctk.CTkButton(
             self,
             text="Login erstellen",
             font=("Manrope", 13),
@@ -74,7 +82,7 @@ class AddPasswordWindow(ctk.CTkFrame):
             bg_color="transparent",
             command=self.handle_save
         )
-        save_button.grid(row=0, column=0, padx=(25, 150), pady=(30, 20), sticky="w")
+        self.save_button.grid(row=0, column=0, padx=(25, 150), pady=(30, 20), sticky="w")
 
         # Input options for the add new password sidebar
         self.input_fields = [
@@ -102,6 +110,69 @@ class AddPasswordWindow(ctk.CTkFrame):
             entry.grid(row=i + 1, column=0, padx=20, pady=10, sticky="ew")
             self.entries.append(entry)
 
+        # Import, export and restore buttons
+        tools_frame = ctk.CTkFrame(self, fg_color="transparent")
+        tools_frame.grid(row=len(self.input_fields) + 1, column=0, padx=20, pady=(20, 10), sticky="w")
+
+        tools = [
+            ("CSV importieren", self.handle_import),
+            ("Backup exportieren", self.handle_export),
+            ("Backup wiederherstellen", self.handle_restore),
+        ]
+        for text, command in tools:
+            ctk.CTkButton(
+                tools_frame,
+                text=text,
+                font=("Manrope", 13),
+                fg_color=colors.second_button_color,
+                hover_color=colors.hover_color,
+                border_color=colors.border_color,
+                border_width=1,
+                corner_radius=40,
+                width=130,
+                height=25,
+                command=command
+            ).pack(side="left", padx=(0, 10))
+
+        self.status_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=("Manrope", 13),
+            text_color=colors.secondary_text_color
+        )
+        self.status_label.grid(row=len(self.input_fields) + 3, column=0, padx=20, sticky="w")
+
+        # Cancels a running export or restore, only shown while one runs
+        self.cancel_button = ctk.CTkButton(
+            self,
+            text="Abbrechen",
+            font=("Manrope", 13),
+            fg_color=colors.second_button_color,
+            hover_color=colors.hover_color,
+            border_color=colors.border_color,
+            border_width=1,
+            corner_radius=40,
+            width=130,
+            height=25,
+        )
+        self.cancel_button.grid(row=len(self.input_fields) + 4, column=0, padx=20, pady=(5, 0), sticky="w")
+        self.cancel_button.grid_remove()
+
+        # Master password change, opened by the main window
+        ctk.CTkButton(
+            self,
+            text="Master-Passwort ändern",
+            font=("Manrope", 13),
+            fg_color=colors.second_button_color,
+            hover_color=colors.hover_color,
+            border_color=colors.border_color,
+            border_width=1,
+            corner_radius=40,
+            width=130,
+            height=25,
+            command=self.handle_change_master_password
+        ).grid(row=len(self.input_fields) + 2, column=0, padx=20, pady=(0, 10), sticky="w")
+
 
     def get_input_values(self) -> dict:
         """Gets the input values from the entry fields."""
@@ -121,8 +192,8 @@ class AddPasswordWindow(ctk.CTkFrame):
             1. Retrieves input values from UI fields.
             2. Validates required fields (title, password).
             3. Checks user session (must be logged in).
-            4. Saves data via PasswordService.
-            5. Clears fields and refreshes the password overview.
+            4. Saves data via PasswordService on the background worker (unlocking may run the key derivation).
+            5. Clears fields and adds the entry to the password overview.
         """
 
         values = self.get_input_values() #Retrieves input data from the UI fields
@@ -142,32 +213,222 @@ class AddPasswordWindow(ctk.CTkFrame):
             messagebox.showerror("Fehler", "Sie sind nicht angemeldet!")
             return
 
-        #Saves the new data
-        try:
-            self.password_service.save_password(
-                user_id=session.get_user_id(),
+        user_id = session.get_user_id()
+        master_password = session.get_master_password()
+
+        def on_done(password_id):
+            self.save_button.configure(state="normal")
+            self.status_label.configure(text="")
+
+            #Info that the passwords have been saved
+            messagebox.showinfo("Erfolg", "Passwort erfolgreich gespeichert!")
+            self.clear_fields()
+            self.master.toggle_add_sidebar() #Closes the add password sidebar after saving the data
+
+            #Adds the new entry to the overview (no reload of the vault)
+            if hasattr(self.master, 'password_overview_ui'):
+                self.master.password_overview_ui.add_entry(
+                    password_id,
+                    values["Titel"],
+                    values["E-Mail-Adresse oder Benutzername"],
+                    values["Webseite"]
+                )
+
+        def on_error(error):
+            self.save_button.configure(state="normal")
+            self.status_label.configure(text="")
+            messagebox.showerror("Fehler", f"Fehler beim Speichern: {str(error)}")
+
+        #Saves the new data in the background, the button is locked so an entry is never saved twice
+        self.save_button.configure(state="disabled")
+        self.status_label.configure(text="Wird gespeichert …")
+        self.worker.submit(
+            lambda task: self.password_service.save_password(
+                user_id=user_id,
                 title=values["Titel"],
                 username=values["E-Mail-Adresse oder Benutzername"],
                 password=values["Passwort"],
-                master_password=session.get_master_password(),
+                master_password=master_password,
                 two_fa_key=values["Geheimer 2FA-Schlüssel (TOTP)"],
                 website=values["Webseite"],
                 notes=values["Notiz"]
+            ),
+            on_done=on_done,
+            on_error=on_error,
+        )
+
+    def clear_fields(self):
+        """Clears all input fields after saving"""
+        for entry in self.entries:
+            entry.delete(0, 'end')
+
+    def handle_import(self):
+        """
+        Imports entries from a CSV export (generic, Bitwarden or KeePass).
+        Entries that already exist in the vault are skipped.
+        """
+
+        session = user_session.get_session()
+        if not session.is_logged_in():
+            messagebox.showerror("Fehler", "Sie sind nicht angemeldet!")
+            return
+
+        path = filedialog.askopenfilename(
+            title="CSV-Export importieren",
+            filetypes=[("CSV-Dateien", "*.csv"), ("Alle Dateien", "*.*")]
+        )
+        if not path:
+            return
+
+        user_id = session.get_user_id()
+        master_password = session.get_master_password()
+
+        def on_done(result):
+            messagebox.showinfo(
+                "Import abgeschlossen",
+                f"{result['imported']} Einträge importiert, "
+                f"{result['duplicates']} Duplikate und {result['invalid']} ungültige Zeilen übersprungen."
             )
+            if hasattr(self.master, 'password_overview_ui'):
+                self.master.password_overview_ui.refresh_passwords()
 
-            #Info that the passwords have been saved
-            messagebox.showinfo("Erfolg", "Passwort erfolgreich gespeichert!")
-            self.clear_fields()
-            self.master.toggle_add_sidebar() #Closes the add password sidebar after saving the data
+        self._run_in_background(
+            lambda report, cancel_event: self.import_service.import_csv(
+                user_id=user_id,
+                path=path,
+                master_password=master_password,
+                progress_callback=lambda read, imported: report(f"{imported} Einträge importiert …")
+            ),
+            on_done,
+        )
+
+    def handle_export(self):
+        """Exports the vault into an encrypted backup file in the background."""
+
+        session = user_session.get_session()
+        if not session.is_logged_in():
+            messagebox.showerror("Fehler", "Sie sind nicht angemeldet!")
+            return
+
+        path = filedialog.asksaveasfilename(
+            title="Backup exportieren",
+            defaultextension=".eura",
+            filetypes=[("Eura-Pass-Backup", "*.eura")]
+        )
+        if not path:
+            return
+
+        user_id = session.get_user_id()
+        master_password = session.get_master_password()
+
+        def on_done(result):
+            if result["skipped"]:
+                messagebox.showwarning(
+                    "Backup unvollständig",
+                    f"{result['exported']} Einträge exportiert. {result['skipped']} Einträge konnten nicht "
+                    f"entschlüsselt werden und fehlen im Backup."
+                )
+            else:
+                messagebox.showinfo("Erfolg", f"{result['exported']} Einträge exportiert.")
 
-            #Updates the sidebar so that the newly added data is displayed.
+        self._run_in_background(
+            lambda report, cancel_event: self.backup_service.export_vault(
+                user_id, master_password, path,
+                progress_callback=lambda done: report(f"{done} Einträge exportiert …"),
+                cancel_event=cancel_event
+            ),
+            on_done,
+            on_cancelled=lambda: messagebox.showinfo("Abgebrochen", "Der Export wurde abgebrochen, es wurde keine Datei geschrieben."),
+        )
+
+    def handle_restore(self):
+        """Restores an encrypted backup file into the vault in the background."""
+
+        session = user_session.get_session()
+        if not session.is_logged_in():
+            messagebox.showerror("Fehler", "Sie sind nicht angemeldet!")
+            return
+
+        path = filedialog.askopenfilename(
+            title="Backup wiederherstellen",
+            filetypes=[("Eura-Pass-Backup", "*.eura"), ("Alle Dateien", "*.*")]
+        )
+        if not path:
+            return
+
+        user_id = session.get_user_id()
+        master_password = session.get_master_password()
+
+        def on_done(result):
+            messagebox.showinfo(
+                "Erfolg",
+                f"{result['restored']} Einträge wiederhergestellt, {result['duplicates']} Duplikate übersprungen."
+            )
             if hasattr(self.master, 'password_overview_ui'):
                 self.master.password_overview_ui.refresh_passwords()
 
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Speichern: {str(e)}")
+        def on_cancelled():
+            messagebox.showinfo("Abgebrochen", "Die Wiederherstellung wurde abgebrochen. Bereits wiederhergestellte Einträge bleiben gespeichert.")
+            if hasattr(self.master, 'password_overview_ui'):
+                self.master.password_overview_ui.refresh_passwords() #Shows the chunks saved before the cancel
+
+        self._run_in_background(
+            lambda report, cancel_event: self.backup_service.restore_vault(
+                user_id, master_password, path,
+                progress_callback=lambda done: report(f"{done} Einträge wiederhergestellt …"),
+                cancel_event=cancel_event
+            ),
+            on_done,
+            on_cancelled=on_cancelled,
+        )
 
-    def clear_fields(self):
-        """Clears all input fields after saving"""
-        for entry in self.entries:
-            entry.delete(0, 'end')
\ No newline at end of file
+    def handle_change_master_password(self):
+        """Opens the window to change the master password."""
+
+        if not user_session.get_session().is_logged_in():
+            messagebox.showerror("Fehler", "Sie sind nicht angemeldet!")
+            return
+
+        if hasattr(self.master, 'show_change_master_password'):
+            self.master.show_change_master_password()
+
+    def _run_in_background(self, task, on_done, on_cancelled=None):
+        """
+        Runs task(report, cancel_event) on the background worker so the window stays responsive.
+        report(text) shows progress in the status label, on_done(result) runs on the UI thread.
+        With on_cancelled, the cancel button is shown while the task runs; it sets cancel_event,
+        and on_cancelled() runs on the UI thread once the task has stopped.
+        """
+
+        def reset():
+            self.status_label.configure(text="")
+            self.cancel_button.grid_remove()
+
+        def finish(result):
+            reset()
+            on_done(result)
+
+        def fail(error):
+            reset()
+            messagebox.showerror("Fehler", str(error))
+
+        def cancelled():
+            reset()
+            on_cancelled()
+
+        worker_task = self.worker.submit(
+            lambda running: task(running.report, running.cancel_event),
+            on_progress=lambda text: self.status_label.configure(text=text),
+            on_done=finish,
+            on_error=fail,
+            on_cancelled=cancelled if on_cancelled else None,
+        )
+
+        if on_cancelled:
+            def cancel():
+                worker_task.cancel()
+                self.cancel_button.grid_remove()
+                self.status_label.configure(text="Wird abgebrochen …")
+
+            self.cancel_button.configure(command=cancel)
+            self.cancel_button.grid()
\ No newline at end of file
@@ -0,0 +1,156 @@
+# API
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class Task:
+    def __init__(self, worker: "BackgroundWorker", key: Optional[str], on_done: Optional[Callable], on_error: Optional[Callable], on_progress: Optional[Callable], on_cancelled: Optional[Callable] = None):
+        """Handle of a job submitted to the BackgroundWorker.
+
+        The job function receives the task and can call report() to send partial results
+        to the UI thread and check cancelled (or pass cancel_event to services).
+        """
+        self.worker = worker
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the task has been cancelled, its callbacks (except on_cancelled) will not be called anymore."""
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Cancels the task. A running job stops at its next cancellation check."""
+        self.cancel_event.set()
+
+    def report(self, value: Any):
+        """Sends a partial result to on_progress on the UI thread (callable from the worker thread)."""
+        self.worker.results.put((self, "progress", value))
+
+
+class BackgroundWorker:
+    def __init__(self, master, max_workers: int = 2, poll_interval_ms: int = 16, frame_budget_ms: float = 8):
+        """Runs crypto and database work on worker threads and delivers the results on the Tk main loop.
+
+        Results are put on a queue that is polled with after(), so Tk is only ever touched
+        from the main thread. Each poll handles results for at most frame_budget_ms, so even
+        a flood of progress messages never blocks the UI for longer than a frame.
+
+        Args:
+            master: Tk widget used for after() scheduling.
+            max_workers: Number of worker threads.
+            poll_interval_ms: Delay between two polls of the result queue.
+            frame_budget_ms: Maximum time one poll spends in callbacks.
+        """
+        self.master = master
+        self.poll_interval_ms = poll_interval_ms
+        self.frame_budget = frame_budget_ms / 1000
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eura-worker")
+        self.results = queue.Queue()
+        self.active_tasks = set() # Submitted tasks that have not finished yet
+        self.keyed_tasks: Dict[str, Task] = {} # Latest task per key
+        self.polling = False
+
+    def submit(self, job: Callable[[Task], Any], on_done: Optional[Callable[[Any], None]] = None, on_error: Optional[Callable[[Exception], None]] = None, on_progress: Optional[Callable[[Any], None]] = None, key: Optional[str] = None, on_cancelled: Optional[Callable[[], None]] = None) -> Task:
+        """Runs job(task) on a worker thread.
+
+        Args:
+            on_done: Called with the job's return value on the UI thread.
+            on_error: Called with the raised exception on the UI thread (defaults to printing it).
+            on_progress: Called with every value the job passes to task.report() on the UI thread.
+            key (optional): Submitting a task with the key of a running task cancels the older one
+                (e.g. the user clicks another card while details are still loading).
+            on_cancelled (optional): Called on the UI thread once a cancelled job has actually stopped
+                (e.g. to show what a cancelled restore has already saved).
+
+        Returns:
+            Task: Handle to cancel the job.
+        """
+        if key is not None and key in self.keyed_tasks:
+            self.keyed_tasks[key].cancel()
+
+        task = Task(self, key, on_done, on_error, on_progress, on_cancelled)
+        if key is not None:
+            self.keyed_tasks[key] = task
+        self.active_tasks.add(task)
+
+        self.executor.submit(self._run, task, job)
+        self._start_polling()
+        return task
+
+    def cancel(self, key: str):
+        """Cancels the running task with the given key (if any)."""
+        task = self.keyed_tasks.get(key)
+        if task is not None:
+            task.cancel()
+
+    def shutdown(self):
+        """Cancels all tasks and stops the worker threads (called on application exit)."""
+        for task in list(self.active_tasks):
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task: Task, job: Callable[[Task], Any]):
+        """Worker thread: runs the job and queues its result."""
+        if task.cancelled:
+            self.results.put((task, "cancelled", None))
+            return
+
+        try:
+            self.results.put((task, "done", job(task)))
+        except Exception as e:
+            self.results.put((task, "error", e))
+
+    def _start_polling(self):
+        """Starts polling the result queue on the main loop (if it is not running already)."""
+        if not self.polling:
+            self.polling = True
+            self.master.after(self.poll_interval_ms, self._poll)
+
+    def _poll(self):
+        """Main loop: delivers queued results within the frame budget and reschedules itself."""
+        deadline = time.perf_counter() + self.frame_budget
+
+        while time.perf_counter() < deadline:
+            try:
+                task, kind, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind != "progress":
+                self._finish(task)
+
+            try:
+                if task.cancelled: #Results of cancelled tasks are dropped
+                    if kind != "progress" and task.on_cancelled:
+                        task.on_cancelled()
+                elif kind == "progress" and task.on_progress:
+                    task.on_progress(value)
+                elif kind == "done" and task.on_done:
+                    task.on_done(value)
+                elif kind == "error":
+                    if task.on_error:
+                        task.on_error(value)
+                    else:
+                        print(f"Fehler im Hintergrund: {value}")
+            except Exception as e: #A failing callback must not stop the polling
+                print(f"Fehler beim Anzeigen eines Ergebnisses: {e}")
+
+        if self.active_tasks or not self.results.empty():
+            self.master.after(self.poll_interval_ms, self._poll)
+        else:
+            self.polling = False
+
+    def _finish(self, task: Task):
+        """Forgets a finished task."""
+        self.active_tasks.discard(task)
+        if task.key is not None and self.keyed_tasks.get(task.key) is task:
+            del self.keyed_tasks[task.key]
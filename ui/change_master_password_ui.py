@@ -0,0 +1,206 @@
+# API
+import customtkinter as ctk
+from tkinter import messagebox
+from typing import Optional
+
+# Config
+import config.colors as colors
+
+# Services
+from services.master_password_service import MasterPasswordService
+
+# UI
+from ui.background_worker import BackgroundWorker
+
+# Models
+from models import user_session
+
+
+class ChangeMasterPasswordWindow(ctk.CTkToplevel):
+    def __init__(self, master, master_password_service: MasterPasswordService, worker: BackgroundWorker, resume: bool = False):
+        """
+        Window to change the master password, with the progress of the re-encryption.
+
+        Args:
+            master: Parent widget (main application window).
+            master_password_service (MasterPasswordService): Changes the password and re-encrypts the vault.
+            worker (BackgroundWorker): Runs the re-encryption off the main loop.
+            resume: Continue an interrupted change with the session's (old) master password instead of asking for a new one.
+        """
+        super().__init__(master)
+        self.master = master
+        self.master_password_service = master_password_service
+        self.worker = worker
+        self.resume = resume
+        self.running = False
+
+        self.title("Eura Pass - Master-Passwort ändern")
+        self.geometry("400x420")
+        self.resizable(False, False)
+        self.configure(fg_color=colors.background_color)
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        self.create_ui()
+
+        if resume:
+            self.start_change()
+
+    def create_ui(self):
+        """All objects of the window."""
+
+        title_label = ctk.CTkLabel(
+            self,
+            text="Änderung fortsetzen" if self.resume else "Master-Passwort ändern",
+            font=("Manrope", 22, "bold"),
+            text_color=colors.text_color
+        )
+        title_label.pack(pady=(30, 20))
+
+        self.entries = []
+        if not self.resume:
+            for placeholder in ("Aktuelles Master-Passwort", "Neues Master-Passwort", "Neues Master-Passwort wiederholen"):
+                entry = ctk.CTkEntry(
+                    self,
+                    placeholder_text=placeholder,
+                    width=300, height=40,
+                    font=("Manrope", 16),
+                    fg_color=colors.second_button_color,
+                    text_color=colors.text_color,
+                    show="*",
+                    border_color=colors.border_color,
+                    border_width=1,
+                    corner_radius=40
+                )
+                entry.pack(pady=8)
+                self.entries.append(entry)
+
+            self.change_button = ctk.CTkButton(
+                self,
+                text="Ändern",
+                command=self.handle_change,
+                width=300, height=40,
+                font=("Manrope", 16, "bold"),
+                text_color=colors.text_color,
+                fg_color=colors.primary_color,
+                hover_color=colors.hover_color,
+                corner_radius=40
+            )
+            self.change_button.pack(pady=(15, 10))
+
+        self.progress_bar = ctk.CTkProgressBar(self, width=300, progress_color=colors.primary_color)
+        self.progress_bar.set(0)
+
+        self.status_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=("Manrope", 13),
+            text_color=colors.secondary_text_color,
+            wraplength=300
+        )
+        self.status_label.pack(side="bottom", pady=(0, 20))
+
+    def handle_change(self):
+        """Validates the input and starts the change."""
+
+        session = user_session.get_session()
+        if not session.is_logged_in():
+            messagebox.showerror("Fehler", "Sie sind nicht angemeldet!", parent=self)
+            return
+
+        master_password, new_password_1, new_password_2 = (entry.get() for entry in self.entries)
+
+        is_valid, error_msg = self.master_password_service.validate_change(
+            session.get_username(), master_password, new_password_1, new_password_2
+        )
+        if not is_valid:
+            messagebox.showwarning("Eingabe prüfen", error_msg, parent=self)
+            return
+
+        self.start_change(new_password_1)
+
+    def start_change(self, new_master_password: Optional[str] = None):
+        """Re-encrypts the vault in the background (a new change, or resumes the running one)."""
+
+        session = user_session.get_session()
+        user_id = session.get_user_id()
+        master_password = session.get_master_password()
+
+        for entry in self.entries:
+            entry.configure(state="disabled")
+        if not self.resume:
+            self.change_button.configure(state="disabled")
+
+        self.progress_bar.pack(pady=10)
+        self.status_label.configure(text="Tresor wird neu verschlüsselt …")
+        self.running = True
+
+        def job(task):
+            progress = lambda done, total: task.report((done, total))
+            if new_master_password is None:
+                return self.master_password_service.resume(user_id, master_password, progress, task.cancel_event)
+            return self.master_password_service.change_master_password(user_id, master_password, new_master_password, progress, task.cancel_event)
+
+        self.worker.submit(
+            job,
+            on_progress=self._show_progress,
+            on_done=lambda count: self._on_done(count, new_master_password),
+            on_error=self._on_error,
+            key="master_password",
+        )
+
+    def _show_progress(self, progress):
+        """Shows the number of re-encrypted entries (UI thread)."""
+
+        done, total = progress
+        self.progress_bar.set(done / total if total else 1)
+        self.status_label.configure(text=f"{done} von {total} Einträgen neu verschlüsselt …")
+
+    def _on_done(self, count: int, new_master_password: Optional[str]):
+        """Finishes the change: the session continues with the new master password, or logs in again after a resumed change."""
+
+        self.running = False
+        session = user_session.get_session()
+
+        if new_master_password is None: #Resumed change, the new password is only known to the user
+            messagebox.showinfo(
+                "Master-Passwort geändert",
+                f"Die Änderung wurde abgeschlossen ({count} Einträge). Bitte melden Sie sich mit dem neuen Master-Passwort an.",
+                parent=self
+            )
+            self.destroy()
+            if hasattr(self.master, 'relogin'):
+                self.master.relogin()
+            return
+
+        session.login(
+            user_id=session.get_user_id(),
+            master_password=new_master_password,
+            username=session.get_username(),
+            email=session.get_email()
+        )
+        messagebox.showinfo("Master-Passwort geändert", f"{count} Einträge wurden neu verschlüsselt.", parent=self)
+        self.destroy()
+
+        if hasattr(self.master, 'password_overview_ui'):
+            self.master.password_overview_ui.refresh_passwords()
+
+    def _on_error(self, error: Exception):
+        """Shows the error, the change can be resumed at the next login."""
+
+        self.running = False
+        self.status_label.configure(text="")
+        messagebox.showerror("Fehler", f"Das Master-Passwort konnte nicht geändert werden: {error}", parent=self)
+        self.destroy()
+
+    def on_closing(self):
+        """Closing the window interrupts the re-encryption, it is resumed at the next login."""
+
+        if self.running:
+            if not messagebox.askyesno(
+                "Abbrechen?",
+                "Die Änderung wird unterbrochen und bei der nächsten Anmeldung fortgesetzt. Fenster schließen?",
+                parent=self
+            ):
+                return
+            self.worker.cancel("master_password")
+        self.destroy()
@@ -0,0 +1,78 @@
+# API
+import customtkinter as ctk
+
+# Services
+from services import tracing
+
+# Config
+import config.colors as colors
+
+REFRESH_MS = 500 # Refresh interval while the overlay is shown
+MAX_PARTS = 12 # Slowest parts shown per breakdown
+
+
+class DebugOverlay(ctk.CTkFrame):
+    def __init__(self, master, breakdown: str = "unlock"):
+        """Small overlay in the bottom right corner that shows the latest breakdown recorded by the tracer.
+
+        Only created while tracing is enabled (EURA_TRACE), toggled with F12.
+
+        Args:
+            breakdown: Name of the breakdown span to show (see tracing.span).
+        """
+
+        super().__init__(
+            master=master,
+            fg_color=colors.second_button_color,
+            border_color=colors.border_color,
+            border_width=1,
+            corner_radius=8,
+        )
+        self.breakdown = breakdown
+        self.visible = False
+        self.refresh_job = None
+
+        self.label = ctk.CTkLabel(
+            self,
+            text="",
+            font=("Courier", 12),
+            text_color=colors.text_color,
+            justify="left",
+            anchor="w",
+        )
+        self.label.pack(padx=10, pady=8)
+
+    def toggle(self):
+        """Shows or hides the overlay."""
+
+        self.visible = not self.visible
+
+        if self.visible:
+            self.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor="se")
+            self.lift()
+            self._refresh()
+        else:
+            self.place_forget()
+            if self.refresh_job is not None:
+                self.after_cancel(self.refresh_job)
+                self.refresh_job = None
+
+    def _refresh(self):
+        """Updates the text and schedules the next refresh while the overlay is shown."""
+
+        self.label.configure(text=self._format_breakdown())
+        self.lift()
+        self.refresh_job = self.after(REFRESH_MS, self._refresh)
+
+    def _format_breakdown(self) -> str:
+        """Formats the latest run of the breakdown span as a table, slowest part first."""
+
+        latest = tracing.tracer.breakdowns.get(self.breakdown)
+        if latest is None:
+            return f"{self.breakdown}: noch keine Messung"
+
+        lines = [f"{self.breakdown}: {latest['total_ms']:.1f} ms"]
+        parts = sorted(latest["parts"].items(), key=lambda item: item[1]["ms"], reverse=True)
+        for name, part in parts[:MAX_PARTS]:
+            lines.append(f"  {name:<32} {part['ms']:>9.1f} ms  ×{part['count']}")
+        return "\n".join(lines)
@@ -0,0 +1,93 @@
+# API
+import os
+import threading
+import customtkinter as ctk
+from PIL import Image
+from typing import Dict, Iterable, Tuple
+
+ASSETS_DIR = "assets"
+CACHE_DIR = os.path.join(ASSETS_DIR, "cache") # Pre-scaled copies of the icons, rebuilt when the source changes
+MAX_SCALING = 2 # Icons are pre-scaled for up to 200 % window scaling
+
+# Icons of the main window as (file name, display size), warmed while the login window is shown
+MAIN_WINDOW_ICONS = (
+    ("home_screen_search_bar_icon.png", (20, 20)),
+    ("plus_icon.png", (15, 15)),
+    ("logo_title_icon.png", (30, 30)),
+    ("close_icon.png", (15, 15)),
+)
+
+
+class IconCache:
+    def __init__(self, assets_dir: str = ASSETS_DIR, cache_dir: str = CACHE_DIR):
+        """Loads icons pre-scaled to their display size.
+
+        The source PNGs are far larger than they are shown (512 px for a 15 px icon), so decoding and
+        scaling them down dominates the icon cost. Each icon is scaled once and kept on disk and in
+        memory; later starts only decode the small copy.
+        """
+
+        self.assets_dir = assets_dir
+        self.cache_dir = cache_dir
+        self._images: Dict[Tuple[str, Tuple[int, int]], Image.Image] = {}
+        self._icons: Dict[Tuple[str, Tuple[int, int]], ctk.CTkImage] = {}
+        self._lock = threading.Lock()
+
+    def get_image(self, name: str, size: Tuple[int, int]) -> Image.Image:
+        """Returns the icon as PIL image, scaled to size times MAX_SCALING (thread-safe, no Tk needed)."""
+
+        key = (name, size)
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                image = self._images[key] = self._load_scaled(name, size)
+            return image
+
+    def get_icon(self, name: str, size: Tuple[int, int]) -> ctk.CTkImage:
+        """Returns the icon as CTkImage for widgets (main thread only)."""
+
+        key = (name, size)
+        icon = self._icons.get(key)
+        if icon is None:
+            icon = self._icons[key] = ctk.CTkImage(light_image=self.get_image(name, size), size=size)
+        return icon
+
+    def warm(self, icons: Iterable[Tuple[str, Tuple[int, int]]] = MAIN_WINDOW_ICONS):
+        """Decodes and scales the given icons ahead of use (e.g. in a background thread)."""
+
+        for name, size in icons:
+            self.get_image(name, size)
+
+    def _load_scaled(self, name: str, size: Tuple[int, int]) -> Image.Image:
+        """Loads the pre-scaled copy from the disk cache, creating it from the source PNG if missing or outdated."""
+
+        source = os.path.join(self.assets_dir, name)
+        width, height = size[0] * MAX_SCALING, size[1] * MAX_SCALING
+        cached = os.path.join(self.cache_dir, f"{os.path.splitext(name)[0]}_{width}x{height}.png")
+
+        try:
+            if os.path.getmtime(cached) >= os.path.getmtime(source):
+                with Image.open(cached) as image:
+                    image.load()
+                    return image.copy()
+        except OSError: #Not cached yet
+            pass
+
+        with Image.open(source) as image:
+            scaled = image.convert("RGBA").resize((width, height), Image.LANCZOS)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            scaled.save(cached)
+        except OSError: #Read-only installation, keep the copy in memory only
+            pass
+        return scaled
+
+
+_icon_cache = IconCache()
+
+
+def get_icon_cache() -> IconCache:
+    """Returns the application's icon cache."""
+
+    return _icon_cache
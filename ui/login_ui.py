@@ -2,6 +2,7 @@
 import webbrowser
 import customtkinter as ctk
 from tkinter import messagebox
+from typing import Callable
 
 #Config
 import config.colors as colors
@@ -14,16 +15,20 @@ from services.auth_service import AuthService
 
 
 class LoginWindow(ctk.CTkToplevel):
-    def __init__(self, master, auth_service: AuthService):
+    def __init__(self, master, get_auth_service: Callable[[], AuthService]):
         """
         Initializes the login and registration window.
 
         - Configures window properties (title, size, appearance).
         -Sets up login and registration tabs with input fields and buttons.
+
+        Args:
+            get_auth_service: Returns the authentication service, waiting for the database setup
+                that runs in the background while this window is shown.
         """
         super().__init__(master)
         self.master = master
-        self.auth_service = auth_service
+        self.get_auth_service = get_auth_service
 
         self.title("Eura Pass - Anmeldung")
         self.geometry("400x500")
@@ -254,12 +259,12 @@ class LoginWindow(ctk.CTkToplevel):
         password = self.password_login_entry.get()
 
         # Checks validity of login data
-        is_valid, error_msg = self.auth_service.validate_login_data(username, password)
+        is_valid, error_msg = self.get_auth_service().validate_login_data(username, password)
         if not is_valid:
             messagebox.showwarning("Eingabe fehlt", error_msg)
             return
 
-        user = self.auth_service.authenticate_user(username, password)
+        user = self.get_auth_service().authenticate_user(username, password)
 
         if user:
             user_id, email, username_db = user
@@ -274,12 +279,25 @@ class LoginWindow(ctk.CTkToplevel):
             )
 
             self.destroy() # Close login window
+
+            # The main window is only built on the first login, so the login window appears sooner
+            if hasattr(self.master, 'build_main_window'):
+                self.master.build_main_window()
+
             self.master.deiconify() # Show main application window
 
             # Refresh password overview UI after login
             if hasattr(self.master, 'password_overview_ui'):
                 self.master.password_overview_ui.refresh_passwords()
 
+            # Re-encrypt legacy entries with the new vault format in the background
+            if hasattr(self.master, 'start_vault_migration'):
+                self.master.start_vault_migration()
+
+            # Finish a master password change that was interrupted
+            if hasattr(self.master, 'resume_master_password_change'):
+                self.master.resume_master_password_change()
+
         else:
             messagebox.showerror("Fehler", "Ungültiger Benutzername/E-Mail oder Passwort.")
 
@@ -292,14 +310,14 @@ class LoginWindow(ctk.CTkToplevel):
         password_2 = self.password_registration_entry_2.get()
 
         # Checks validity of registration data
-        is_valid, error_msg = self.auth_service.validate_registration_data(
+        is_valid, error_msg = self.get_auth_service().validate_registration_data(
             email, username, password_1, password_2
         )
         if not is_valid:
             messagebox.showwarning("Eingabe fehlt", error_msg)
             return
 
-        success = self.auth_service.register_user(email, username, password_1)
+        success = self.get_auth_service().register_user(email, username, password_1)
 
         if success:
             messagebox.showinfo("Erfolg", "Du wurdest registriert!")
@@ -6,6 +6,9 @@ from tkinter import messagebox
 # Services
 from services.password_service import PasswordService
 
+# Models
+from models.password_entry import PasswordEntry
+
 # Config
 import config.colors as colors
 
@@ -38,7 +41,20 @@ class PasswordDetailsUI(ctk.CTkFrame):
         )
         placeholder_label.pack(expand=True)
 
-    def display_password_details(self, password_dict: dict):
+    def show_loading(self):
+        """Displays a loading message while the selected password is decrypted in the background."""
+
+        self._clear_frame() # Clear existing content
+        self.current_password = None
+
+        ctk.CTkLabel(
+            self,
+            text="Wird geladen …",
+            font=("Manrope", 16),
+            text_color=colors.secondary_text_color
+        ).pack(expand=True)
+
+    def display_password_details(self, entry: PasswordEntry):
         """
         Displays the details of the selected password.
             - Title, Username, Password don't need a check as they are mandatory
@@ -46,7 +62,7 @@ class PasswordDetailsUI(ctk.CTkFrame):
            """
 
         self._clear_frame() # Clear existing content
-        self.current_password = password_dict # Store current password details
+        self.current_password = entry # Store current password details
 
         detail_container = ctk.CTkFrame(self, fg_color="transparent")
         detail_container.pack(pady=40, padx=40, fill="both", expand=True)
@@ -54,7 +70,7 @@ class PasswordDetailsUI(ctk.CTkFrame):
         # Title
         ctk.CTkLabel(
             detail_container,
-            text=password_dict["title"],
+            text=entry.title,
             font=("Manrope", 24, "bold"),
             text_color=colors.text_color
         ).pack(pady=(0, 20))
@@ -63,35 +79,35 @@ class PasswordDetailsUI(ctk.CTkFrame):
         self._create_detail_row(
             detail_container,
             "Benutzername:",
-            password_dict["username"]
+            entry.username
         )
 
         # Password
         self._create_detail_row(
             detail_container,
             "Passwort:",
-            password_dict["password"]
+            entry.password
         )
 
         # Website (if available)
-        if password_dict.get("website"):
+        if entry.website:
             self._create_detail_row(
                 detail_container,
                 "Website:",
-                password_dict["website"],
+                entry.website,
                 is_link=True
             )
 
         # 2FA Key (if available)
-        if password_dict.get("two_fa_key"):
+        if entry.two_fa_key:
             self._create_detail_row(
                 detail_container,
                 "2FA-Schlüssel:",
-                password_dict["two_fa_key"]
+                entry.two_fa_key
             )
 
         # Notes (if available)
-        if password_dict.get("notes"):
+        if entry.notes:
             ctk.CTkLabel(
                 detail_container,
                 text="Notizen:",
@@ -108,7 +124,7 @@ class PasswordDetailsUI(ctk.CTkFrame):
                 height=100
             )
             notes_textbox.pack(pady=5, fill="x")
-            notes_textbox.insert("1.0", password_dict["notes"])
+            notes_textbox.insert("1.0", entry.notes)
             notes_textbox.configure(state="disabled")
 
         self.delete_button = ctk.CTkButton(
@@ -182,12 +198,12 @@ class PasswordDetailsUI(ctk.CTkFrame):
         # Ask for user confirmation before deletion
         result = messagebox.askyesno(
             "Passwort löschen",
-            f"Möchten Sie das Passwort für '{self.current_password['title']}' wirklich löschen?"
+            f"Möchten Sie das Passwort für '{self.current_password.title}' wirklich löschen?"
         )
 
         # If user confirmed deletion or not
         if result:
-            password_id = self.current_password.get('id')
+            password_id = self.current_password.id
 
             if password_id:
                 success = self.password_service.delete_password(password_id)
@@ -196,6 +212,6 @@ class PasswordDetailsUI(ctk.CTkFrame):
                     messagebox.showinfo("Erfolg", "Passwort erfolgreich gelöscht")
                     self.show_placeholder()
                     if hasattr(self.master, 'password_overview_ui'):
-                        self.master.password_overview_ui.refresh_passwords()
+                        self.master.password_overview_ui.remove_entry(password_id)
                 else:
                     messagebox.showerror("Fehler", "Passwort konnte nicht gelöscht werden")
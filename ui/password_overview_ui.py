@@ -6,108 +6,301 @@ import config.colors as colors
 
 # Services
 from services.password_service import PasswordService
+from services import tracing
+
+# UI
+from ui.virtual_list import VirtualList
+from ui.background_worker import BackgroundWorker, Task
 
 # Models
 from models import user_session
+from models.password_entry import OverviewRow
+from models.search_index import SearchIndex
+
+CARD_HEIGHT = 90 # Fixed height of a password card, the virtual list relies on it
+SEARCH_DELAY_MS = 120 # The search runs once typing pauses for this long
+FIRST_PAGE_SIZE = 20 # Entries of the first page, enough to fill the visible list
+PAGE_SIZE = 500 # Entries per page fetched in the background after the first one
+
+class PasswordCard(ctk.CTkFrame):
+    def __init__(self, master, on_click):
+        """A reusable card showing the title and username of one password.
+        Cards are recycled by the virtual list, show() fills them with another entry.
+        """
+        super().__init__(
+            master,
+            fg_color="transparent",
+            corner_radius=0,
+            border_width=1,
+            border_color=colors.border_color,
+            width=280,
+            height=CARD_HEIGHT
+        )
+        self.pack_propagate(False) # Keep the fixed card height
+        self.password_id = None # ID of the entry the card currently shows
+
+        self.title_label = ctk.CTkButton(
+            self,
+            text="",
+            font=("Manrope", 20, "bold"),
+            text_color=colors.secondary_text_color,
+            fg_color="transparent",
+            corner_radius=0,
+            width=280,
+            hover=False,
+            cursor="hand2",
+            command=lambda: on_click(self.password_id)
+        )
+        self.title_label.pack(side="top", pady=(10, 3), padx=20)
+
+        self.username_label = ctk.CTkButton(
+            self,
+            text="",
+            font=("Manrope", 15),
+            text_color=colors.secondary_text_color,
+            width=280,
+            fg_color="transparent",
+            corner_radius=0,
+            hover=False,
+            cursor="hand2",
+            command=lambda: on_click(self.password_id)
+        )
+        self.username_label.pack(side="top", pady=(2, 10), padx=20)
+
+    def show(self, password_id: int, title: str, username: str):
+        """Shows another entry on this card."""
+        self.password_id = password_id
+        self.title_label.configure(text=title)
+        self.username_label.configure(text=username)
 
 class PasswordOverviewUI:
-    def __init__(self, master, password_service: PasswordService):
+    def __init__(self, master, password_service: PasswordService, worker: BackgroundWorker):
         """Initializes the Password Overview UI component.
         Args:
             master: The parent tkinter widget.
             password_service (PasswordService): Service for managing passwords.
+            worker (BackgroundWorker): Runs the unlock and decryption off the main loop.
         """
         self.master = master
         self.password_service = password_service
+        self.worker = worker
 
-        self.scroll_frame = ctk.CTkScrollableFrame(
+        # Only the visible cards are built and they are recycled while scrolling
+        self.list_view = VirtualList(
             master=master,
+            row_height=CARD_HEIGHT,
+            create_row=lambda parent: PasswordCard(parent, self.on_password_click),
+            render_row=self._render_card,
             width=300,
             corner_radius=0,
             fg_color=colors.background_color,
         )
-        self.scroll_frame.grid(column=0, row=1, sticky="nsew")
+        self.list_view.grid(column=0, row=1, sticky="nsew")
+
+        # Shows the loading progress at the bottom of the list
+        self.status_label = ctk.CTkLabel(
+            self.list_view,
+            text="",
+            font=("Manrope", 13),
+            text_color=colors.secondary_text_color,
+            fg_color=colors.background_color,
+        )
 
-        self.passwords = [] # Empty list to hold password data
+        self.passwords = {} # Overview model: entry ID -> OverviewRow
+        self.order = [] # Entry IDs in display order
+        self.search_query = "" # Current text of the search bar
+        self.search_results = None # Entry IDs matching the search (best first), None while not searching
+        self.search_job = None # Pending debounced search
         self.load_passwords() # Load passwords on initialization
 
     def load_passwords(self):
-        """Loads passwords from the password service and displays them."""
+        """Loads passwords from the password service in the background and displays them as they arrive.
+            A load that is still running is cancelled.
+        """
+
+        self.passwords = {}
+        self.order = []
+        if self.search_results is not None:
+            self.search_results = []
+        self.display_password_cards()
+
+        session = user_session.get_session()
+
+        # If no user is logged in, the list stays empty
+        if not session.is_logged_in():
+            self.worker.cancel("overview")
+            self._show_status("")
+            return
+
+        user_id = session.get_user_id()
+        master_password = session.get_master_password()
+        search_index = session.reset_search_index() #Owned by this load, a superseded load keeps filling its own
+
+        self._show_status("Tresor wird entsperrt …")
+        self.worker.submit(
+            lambda task: self._load_in_background(task, user_id, master_password, search_index),
+            on_progress=self._append_rows,
+            on_done=lambda _: self._show_status(""),
+            on_error=self._on_load_error,
+            key="overview",
+        )
+
+    def _load_in_background(self, task: Task, user_id: int, master_password: str, search_index: SearchIndex):
+        """Worker thread: decrypts the overview page by page, reports every page to the UI and indexes it for the search.
+
+        The first page is small, so the first cards appear as soon as the vault is unlocked,
+        independent of the vault size; the larger pages after it are fetched meanwhile.
+        search_index is the index this load installed in the session; once the load is superseded
+        (reload, logout) the session holds another one, so late rows never reach it.
+        """
+
+        with tracing.span("unlock", breakdown=True): #Shown by the debug overlay
+            pages = self.password_service.iter_password_overview(
+                user_id, master_password, page_size=PAGE_SIZE, first_page_size=FIRST_PAGE_SIZE, cancel_event=task.cancel_event
+            )
+            for rows in pages:
+                if task.cancelled:
+                    return
+                task.report(rows)
+                if task.cancelled: #Cancelled while reporting, skip the work (the index is detached anyway)
+                    return
+                with tracing.span("search.index_batch", "search"):
+                    search_index.add_many(rows) #Indexing here keeps the main loop free
+
+    @tracing.traced("ui.append_rows", "ui")
+    def _append_rows(self, rows):
+        """Adds a decrypted batch to the list (UI thread), the first cards appear before the vault is fully decrypted."""
+
+        for row in rows:
+            if row.id not in self.passwords: #May have been added meanwhile
+                self.passwords[row.id] = row
+                self.order.append(row.id)
 
-        # Attempt to load passwords for the logged-in user
-        try:
-            session = user_session.get_session()
+        if self.search_results is not None:
+            self._schedule_search() #Newly loaded entries may match the current search
+        else:
+            self.list_view.set_row_count(len(self.order), changed_from=None)
+        self._show_status(f"{len(self.order)} Passwörter geladen …")
 
-            # Check if a user is logged in
-            if session.is_logged_in():
-                user_id = session.get_user_id()
-                master_password = session.get_master_password()
-                self.passwords = self.password_service.get_password_overview(user_id, master_password)
+    def _on_load_error(self, error: Exception):
+        """Handle potential errors during password loading to prevent crashes."""
 
-            # If no user is logged in, set passwords to an empty list
-            else:
-                self.passwords = []
+        print(f"Fehler beim Laden der Passwörter: {error}")
+        self._show_status("")
 
-        # Handle potential errors during password loading to prevent crashes
-        except Exception as e:
-            print(f"Fehler beim Laden der Passwörter: {e}")
-            self.passwords = []
+    def _show_status(self, text: str):
+        """Shows a status text below the list, or hides it if text is empty."""
 
-        self.display_password_cards() # Display the loaded passwords
+        if text:
+            self.status_label.configure(text=text)
+            self.status_label.place(relx=0.5, rely=1.0, anchor="s")
+            self.status_label.lift()
+        else:
+            self.status_label.place_forget()
 
     def refresh_passwords(self):
-        """Refreshes the password list by reloading and displaying passwords."""
+        """Refreshes the password list by reloading and displaying passwords.
+            Only needed after bulk changes (import, restore), single changes use add/update/remove_entry.
+        """
 
-        for widget in self.scroll_frame.winfo_children():
-            widget.destroy()
         self.load_passwords()
 
     def display_password_cards(self):
-        """Displays password cards in the scrollable frame.
+        """Displays password cards in the virtual list.
             (title, username) pairs are shown for each password.
-            Details can be accessed by clicking on the cards.
+            Details can be accessed by clicking on the cards, which carry the entry ID.
+            The list geometry is computed from the row count, only visible cards exist as widgets.
         """
 
-        for i, (title, username) in enumerate(self.passwords):
-            password_frame = ctk.CTkFrame(
-                self.scroll_frame,
-                fg_color="transparent",
-                corner_radius=0,
-                border_width=1,
-                border_color=colors.border_color,
-                width=280,
-                height=100
-            )
-            password_frame.grid(row=i, column=0, sticky="ew")
-
-            title_label = ctk.CTkButton(
-                password_frame,
-                text=title,
-                font=("Manrope", 20, "bold"),
-                text_color=colors.secondary_text_color,
-                fg_color="transparent",
-                corner_radius=0,
-                width=280,
-                hover=False,
-                cursor="hand2",
-                command=lambda t=title, u=username: self.on_password_click(t, u)
-            )
-            title_label.pack(side="top", pady=(10, 3), padx=20)
-
-            username_label = ctk.CTkButton(
-                password_frame,
-                text=username,
-                font=("Manrope", 15),
-                text_color=colors.secondary_text_color,
-                width=280,
-                fg_color="transparent",
-                corner_radius=0,
-                hover=False,
-                cursor="hand2",
-                command=lambda t=title, u=username: self.on_password_click(t, u)
-            )
-            username_label.pack(side="top", pady=(2, 10), padx=20)
+        self.list_view.set_row_count(len(self._visible_ids()))
+
+    def add_entry(self, password_id: int, title: str, username: str, website: str = ""):
+        """Adds a newly saved entry to the end of the list without reloading the vault."""
+
+        if password_id in self.passwords:
+            self.update_entry(password_id, title, username, website)
+            return
+
+        self.passwords[password_id] = OverviewRow(password_id, title, username, website)
+        self.order.append(password_id)
+        user_session.get_session().get_search_index().add(password_id, title, username, website)
+
+        if self.search_results is not None:
+            self._run_search() #The new entry is shown if it matches the search
+        else:
+            self.list_view.set_row_count(len(self.order), changed_from=None) #Existing cards stay as they are
+
+    def update_entry(self, password_id: int, title: str, username: str, website: str = ""):
+        """Updates the card of an edited entry without reloading the vault."""
+
+        if password_id not in self.passwords:
+            return
+
+        self.passwords[password_id] = OverviewRow(password_id, title, username, website)
+        user_session.get_session().get_search_index().add(password_id, title, username, website)
+
+        if self.search_results is not None:
+            self._run_search()
+        else:
+            self.list_view.refresh_row(self.order.index(password_id))
+
+    def remove_entry(self, password_id: int):
+        """Removes the card of a deleted entry without reloading the vault."""
+
+        if self.passwords.pop(password_id, None) is None:
+            return
+
+        user_session.get_session().get_search_index().remove(password_id)
+        visible = self._visible_ids()
+        index = visible.index(password_id) if password_id in visible else len(visible)
+
+        self.order.remove(password_id)
+        if self.search_results is not None and password_id in self.search_results:
+            self.search_results.remove(password_id)
+        self.list_view.set_row_count(len(self._visible_ids()), changed_from=index) #Only the cards below it move up
+
+    def set_search_query(self, query: str):
+        """Filters the list by the search bar text. The search runs once typing pauses (debounced)."""
+
+        query = query.strip()
+        if query == self.search_query:
+            return
+
+        self.search_query = query
+        self._schedule_search()
+
+    def _schedule_search(self):
+        """(Re)starts the debounce timer of the search."""
+
+        if self.search_job is not None:
+            self.master.after_cancel(self.search_job)
+        self.search_job = self.master.after(SEARCH_DELAY_MS, self._run_search)
+
+    def _run_search(self):
+        """Filters the list by the current query using the session's search index."""
+
+        self.search_job = None
+
+        if not self.search_query:
+            self.search_results = None #Show every entry again
+        else:
+            results = user_session.get_session().get_search_index().search(self.search_query)
+            self.search_results = [password_id for password_id in results if password_id in self.passwords]
+
+        self.list_view.set_row_count(len(self._visible_ids()))
+        self.list_view.scroll_to(0)
+
+    def _visible_ids(self):
+        """Returns the entry IDs currently listed: the search results while searching, otherwise all entries."""
+
+        return self.order if self.search_results is None else self.search_results
+
+    def _render_card(self, card: PasswordCard, index: int):
+        """Fills a recycled card with the entry at the given list position."""
+
+        row = self.passwords[self._visible_ids()[index]]
+        card.show(row.id, row.title, row.username)
 
-    def on_password_click(self, title: str, username: str):
+    def on_password_click(self, password_id: int):
         """Handles the event when a password card is clicked."""
-        self.master.show_password_details(title, username)
\ No newline at end of file
+        self.master.show_password_details(password_id)
\ No newline at end of file
@@ -0,0 +1,182 @@
+# API
+import math
+import sys
+import tkinter
+import customtkinter as ctk
+from typing import Callable, List, Optional
+
+# Services
+from services import tracing
+
+# Config
+import config.colors as colors
+
+
+class VirtualList(ctk.CTkFrame):
+    def __init__(self, master, row_height: int, create_row: Callable, render_row: Callable, buffer_rows: int = 2, scroll_step: int = 30, **kwargs):
+        """Scrollable list that only builds widgets for the rows in view plus a small buffer.
+
+        Row widgets are recycled while scrolling, so the widget count stays constant no matter
+        how many rows the list has. The scroll geometry is computed from the row count.
+
+        Args:
+            master: Parent widget.
+            row_height: Fixed height of every row (unscaled pixels, like widget sizes).
+            create_row: create_row(parent) builds one reusable row widget (created with height=row_height).
+            render_row: render_row(widget, index) fills a row widget with the data of row index.
+            buffer_rows: Extra rows kept built above and below the visible area.
+            scroll_step: Pixels scrolled per mouse wheel unit.
+        """
+        super().__init__(master, **kwargs)
+
+        self.row_height = row_height
+        self.create_row = create_row
+        self.render_row = render_row
+        self.buffer_rows = buffer_rows
+        self.scroll_step = scroll_step
+
+        self.row_count = 0
+        self.offset = 0 # Scroll position in unscaled pixels
+        self.pool: List = [] # Recycled row widgets, row index i is shown by pool[i % len(pool)]
+        self.bound_rows: List[Optional[int]] = [] # Row index each pooled widget currently shows
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.viewport.grid(row=0, column=0, sticky="nsew")
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar, button_color=colors.border_color)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.viewport.bind("<Configure>", lambda event: self._render())
+
+        if sys.platform.startswith("linux"):
+            self.bind_all("<Button-4>", self._on_mousewheel, add=True)
+            self.bind_all("<Button-5>", self._on_mousewheel, add=True)
+        else:
+            self.bind_all("<MouseWheel>", self._on_mousewheel, add=True)
+
+    def set_row_count(self, row_count: int, changed_from: Optional[int] = 0):
+        """Sets the number of rows and redraws the visible ones.
+
+        Args:
+            changed_from: First row whose content changed (rows before it are kept as they are),
+                None if only rows were appended.
+        """
+
+        self.row_count = row_count
+
+        if changed_from is not None:
+            for slot, index in enumerate(self.bound_rows):
+                if index is not None and index >= changed_from:
+                    self.bound_rows[slot] = None
+
+        self._render()
+
+    def refresh(self):
+        """Redraws every visible row (e.g. after the underlying data changed)."""
+
+        self.bound_rows = [None] * len(self.pool)
+        self._render()
+
+    def refresh_row(self, index: int):
+        """Redraws a single row if it is currently built."""
+
+        if self.pool and self.bound_rows[index % len(self.pool)] == index:
+            self.render_row(self.pool[index % len(self.pool)], index)
+
+    def scroll_to(self, index: int):
+        """Scrolls so that the given row is at the top of the view."""
+
+        self._set_offset(index * self.row_height)
+
+    def _viewport_height(self) -> float:
+        """Returns the height of the visible area in unscaled pixels."""
+
+        return self.viewport.winfo_height() / self._get_widget_scaling()
+
+    def _max_offset(self) -> float:
+        """Returns the largest scroll position (last row at the bottom of the view)."""
+
+        return max(0, self.row_count * self.row_height - self._viewport_height())
+
+    def _set_offset(self, offset: float):
+        """Moves the view to the given scroll position and redraws."""
+
+        self.offset = int(min(max(0, offset), self._max_offset()))
+        self._render()
+
+    def _ensure_pool(self, size: int):
+        """Grows the widget pool to the given size (it never shrinks, widgets are reused)."""
+
+        if size <= len(self.pool):
+            return
+
+        for _ in range(size - len(self.pool)):
+            self.pool.append(self.create_row(self.viewport))
+        self.bound_rows = [None] * len(self.pool) #Row to widget mapping changes with the pool size
+
+    @tracing.traced("ui.render", "ui")
+    def _render(self):
+        """Places the row widgets for the visible rows and updates the scrollbar."""
+
+        view_height = self._viewport_height()
+        if view_height <= 1: #Not mapped yet
+            return
+
+        self.offset = int(min(self.offset, self._max_offset()))
+        self._ensure_pool(math.ceil(view_height / self.row_height) + 1 + 2 * self.buffer_rows)
+
+        pool_size = len(self.pool)
+        first = max(0, self.offset // self.row_height - self.buffer_rows)
+        visible = range(first, min(self.row_count, first + pool_size))
+
+        for index in visible:
+            slot = index % pool_size
+            widget = self.pool[slot]
+
+            if self.bound_rows[slot] != index: #Only recycled widgets are redrawn
+                self.render_row(widget, index)
+                self.bound_rows[slot] = index
+
+            widget.place(x=0, y=index * self.row_height - self.offset, relwidth=1)
+
+        # Hide every other widget, also those whose binding was already cleared (fewer rows, grown pool),
+        # so no card keeps showing a row that no longer exists
+        used_slots = {index % pool_size for index in visible}
+        for slot in range(pool_size):
+            if slot not in used_slots:
+                self.pool[slot].place_forget()
+                self.bound_rows[slot] = None
+
+        total_height = self.row_count * self.row_height
+        if total_height <= view_height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total_height, (self.offset + view_height) / total_height)
+
+    def _on_scrollbar(self, action: str, value, unit: str = "units"):
+        """Handles drag ('moveto', fraction) and wheel ('scroll', n, 'units') events of the scrollbar."""
+
+        if action == "moveto":
+            self._set_offset(float(value) * self.row_count * self.row_height)
+        elif action == "scroll":
+            step = self._viewport_height() if unit == "pages" else self.scroll_step
+            self._set_offset(self.offset + int(value) * step)
+
+    def _on_mousewheel(self, event):
+        """Scrolls the list when the mouse wheel is used over it."""
+
+        widget = event.widget
+        if not isinstance(widget, tkinter.Misc) or not str(widget).startswith(str(self)):
+            return
+
+        if sys.platform.startswith("linux"):
+            units = -1 if event.num == 4 else 1
+        elif sys.platform == "darwin":
+            units = -event.delta
+        else:
+            units = -int(event.delta / 120) or (-1 if event.delta > 0 else 1)
+
+        self._set_offset(self.offset + units * self.scroll_step)